@@ -270,6 +270,7 @@ def save_general_config():
             'ROOT_DIR': data.get('ROOT_DIR', ''),
             'FILE_TARGET': data.get('FILE_TARGET', 'l10n/DEFAULT/dictionary'),
             'lm_url': data.get('lm_url', LM_CONFIG['DEFAULT_URL']),
+            'lm_endpoints': data.get('lm_endpoints', existing_config.get('lm_endpoints', '')),
             'DEPLOY_DIR': data.get('DEPLOY_DIR', ''),
             'DEPLOY_OVERWRITE': data.get('DEPLOY_OVERWRITE', True)
         })
@@ -318,6 +319,20 @@ def save_model_config():
             'arg_compat': data.get('arg_compat', 'auto'),
             'arg_batch': str(data.get('arg_batch', 4)),  # Convertir a string
             'arg_timeout': str(data.get('arg_timeout', 200)),  # Convertir a string
+            'arg_max_in_flight': str(data.get('arg_max_in_flight', existing_config.get('arg_max_in_flight', 1))),
+            'arg_lm_transport': data.get('arg_lm_transport', existing_config.get('arg_lm_transport', 'requests')),
+            'arg_batch_mode': data.get('arg_batch_mode', existing_config.get('arg_batch_mode', 'items')),
+            'arg_batch_order': data.get('arg_batch_order', existing_config.get('arg_batch_order', 'dictionary')),
+            'arg_context_window': str(data.get('arg_context_window', existing_config.get('arg_context_window', 4096))),
+            'arg_adaptive_batch': str(data.get('arg_adaptive_batch', existing_config.get('arg_adaptive_batch', 'false'))).lower(),
+            'arg_template_cache': str(data.get('arg_template_cache', existing_config.get('arg_template_cache', 'false'))).lower(),
+            'arg_skip_unchanged': str(data.get('arg_skip_unchanged', existing_config.get('arg_skip_unchanged', 'true'))).lower(),
+            'arg_incremental': str(data.get('arg_incremental', existing_config.get('arg_incremental', 'true'))).lower(),
+            'arg_campaign_dedup': str(data.get('arg_campaign_dedup', existing_config.get('arg_campaign_dedup', 'false'))).lower(),
+            'arg_early_output': str(data.get('arg_early_output', existing_config.get('arg_early_output', 'false'))).lower(),
+            'arg_structured_output': str(data.get('arg_structured_output', existing_config.get('arg_structured_output', 'false'))).lower(),
+            'arg_compact_ids': str(data.get('arg_compact_ids', existing_config.get('arg_compact_ids', 'false'))).lower(),
+            'arg_prompt_glossary': data.get('arg_prompt_glossary', existing_config.get('arg_prompt_glossary', 'off')),
             # Parámetros del API del modelo (¡AHORA SE GUARDAN!)
             'api_temperature': data.get('api_temperature', 0.7),
             'api_top_p': data.get('api_top_p', 0.9),
@@ -2761,6 +2776,10 @@ def get_preset(preset_name):
             config['arg_batch'] = preset_data['batch_size']
         if 'timeout' in preset_data:
             config['arg_timeout'] = preset_data['timeout']
+        if 'max_concurrent_requests' in preset_data:
+            config['arg_max_in_flight'] = preset_data['max_concurrent_requests']
+        if 'context_window' in preset_data:
+            config['arg_context_window'] = preset_data['context_window']
         if 'name' in preset_data:
             config['preset_name'] = preset_data['name']
         if 'description' in preset_data:
@@ -3914,8 +3933,10 @@ def create_profile():
                     current_config[config_key] = model_config[frontend_key]
             
             # Otros campos del modelo
-            model_fields = ['arg_config', 'arg_compat', 'arg_batch', 'arg_timeout',
-                          'api_temperature', 'api_top_p', 'api_top_k', 'api_max_tokens',
+            model_fields = ['arg_config', 'arg_compat', 'arg_batch', 'arg_timeout', 'arg_max_in_flight',
+                          'arg_lm_transport', 'arg_batch_mode', 'arg_batch_order', 'arg_context_window',
+                          'arg_adaptive_batch', 'arg_template_cache', 'arg_skip_unchanged',
+                          'arg_incremental', 'arg_campaign_dedup', 'arg_early_output', 'arg_structured_output', 'arg_compact_ids', 'arg_prompt_glossary', 'api_temperature', 'api_top_p', 'api_top_k', 'api_max_tokens',
                           'api_repetition_penalty', 'api_presence_penalty']
             
             for field in model_fields:
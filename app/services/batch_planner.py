@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificación de lotes para LM Studio
+
+Empaqueta las frases por presupuesto de tokens en lugar de por número fijo de
+elementos: los lotes de frases cortas (llamadas de radio) crecen y los de
+párrafos largos (briefings) se reducen para no desbordar max_tokens ni la
+ventana de contexto del modelo. Opcionalmente las frases se ordenan por
+longitud (y prefijo de clave) antes de empaquetarlas, y max_tokens se ajusta al
+contenido de cada lote.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.file_utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Aproximación conservadora de caracteres por token (texto EN/ES + JSON)
+CHARS_PER_TOKEN = 3.5
+
+# Tokens fijos por elemento en la petición: {"id": "id_<16 hex>", "en": ""},
+ITEM_INPUT_OVERHEAD = 18
+# Tokens fijos por elemento en la respuesta: {"id": "id_<16 hex>", "es": ""},
+ITEM_OUTPUT_OVERHEAD = 18
+
+# El español suele ocupar algo más que el inglés de origen
+OUTPUT_EXPANSION = 1.3
+
+# Fracción de max_tokens utilizable (margen para desviaciones del estimador)
+OUTPUT_SAFETY = 0.85
+
+# Margen reservado en la ventana de contexto (plantilla de chat, tokens especiales)
+CONTEXT_MARGIN = 64
+
+DEFAULT_CONTEXT_WINDOW = 4096
+DEFAULT_MAX_TOKENS = 2048
+
+# Presupuesto de entrada mínimo: con prompts largos o contextos pequeños los
+# lotes no se degradan a una frase por petición
+MIN_INPUT_BUDGET = 256
+
+# Tope de elementos por lote aunque quepan más (mantiene la correspondencia de ids fiable)
+MAX_ITEMS_PER_BATCH = 32
+
+BATCH_MODE_TOKENS = "tokens"
+BATCH_MODE_ITEMS = "items"
+# Los lotes por tokens son opcionales: por defecto manda el tamaño de lote del usuario
+DEFAULT_BATCH_MODE = BATCH_MODE_ITEMS
+
+# Orden de las frases antes de empaquetarlas en lotes
+BATCH_ORDER_DICTIONARY = "dictionary"
+BATCH_ORDER_LENGTH = "length"
+BATCH_ORDER_LENGTH_PREFIX = "length_prefix"
+BATCH_ORDERS = (BATCH_ORDER_DICTIONARY, BATCH_ORDER_LENGTH, BATCH_ORDER_LENGTH_PREFIX)
+
+# Clave de LM_API que pide ajustar max_tokens al contenido de cada lote
+FIT_MAX_TOKENS_KEY = "fit_max_tokens"
+# Holgura sobre la salida estimada: el estimador no conoce el tokenizer del modelo
+FIT_MAX_TOKENS_HEADROOM = 1.5
+FIT_MAX_TOKENS_MARGIN = 64
+
+# Clave de LM_API que envía ids ordinales por lote ("1".."N") en lugar de id_<16 hex>
+COMPACT_IDS_KEY = "compact_ids"
+
+# Índice numérico final de las claves del dictionary (DictKey_ActionText_12)
+KEY_INDEX_REGEX = re.compile(r"\d+$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima los tokens de un texto sin depender del tokenizer del modelo"""
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def estimate_item_tokens(text: str) -> Tuple[int, int]:
+    """Estima (tokens_entrada, tokens_salida) de una frase dentro del lote JSON"""
+    # json.dumps refleja el coste real de escapes (\", \\, \n) en la petición
+    body_tokens = estimate_tokens(json.dumps(text, ensure_ascii=False))
+    return (body_tokens + ITEM_INPUT_OVERHEAD,
+            int(math.ceil(body_tokens * OUTPUT_EXPANSION)) + ITEM_OUTPUT_OVERHEAD)
+
+
+def estimate_prompt_tokens(cfg: Dict) -> int:
+    """Tokens fijos del prompt (SYSTEM + LM_INSTRUCTIONS) que acompañan a cada lote"""
+    return estimate_tokens(cfg.get("SYSTEM", "") or "") + estimate_tokens(cfg.get("LM_INSTRUCTIONS", "") or "")
+
+
+def compute_token_budget(cfg: Dict, context_window: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Calcula el presupuesto de tokens por lote
+
+    Args:
+        cfg: Configuración del prompt (LM_API, SYSTEM, LM_INSTRUCTIONS)
+        context_window: Ventana de contexto del modelo (preset context_window)
+
+    Returns:
+        Tupla (presupuesto_entrada, presupuesto_salida)
+    """
+    api = cfg.get("LM_API") or {}
+    max_tokens = int(api.get("max_tokens") or DEFAULT_MAX_TOKENS)
+    context_window = int(context_window or api.get("context_window") or DEFAULT_CONTEXT_WINDOW)
+
+    # La salida no puede superar max_tokens ni lo que deja libre el contexto;
+    # la entrada reserva solo esa salida, no el max_tokens completo
+    output_reserved = min(max_tokens, context_window // 2)
+    output_budget = int(output_reserved * OUTPUT_SAFETY)
+    input_budget = context_window - estimate_prompt_tokens(cfg) - output_reserved - CONTEXT_MARGIN
+    return max(input_budget, MIN_INPUT_BUDGET), max(output_budget, 0)
+
+
+def fit_max_tokens(items: List[Tuple[str, str]], cfg: Dict) -> int:
+    """max_tokens suficiente para la respuesta de un lote, sin pasar del configurado"""
+    api = cfg.get("LM_API") or {}
+    ceiling = int(api.get("max_tokens") or DEFAULT_MAX_TOKENS)
+    needed = sum(estimate_item_tokens(text)[1] for _, text in items)
+    return max(1, min(ceiling, int(math.ceil(needed * FIT_MAX_TOKENS_HEADROOM)) + FIT_MAX_TOKENS_MARGIN))
+
+
+def to_wire_ids(items: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], Dict[str, str]]:
+    """Lote con ids ordinales ("1".."N") y la correspondencia id ordinal -> id de segmento"""
+    wire = [(str(n), text) for n, (_, text) in enumerate(items, 1)]
+    return wire, {str(n): item_id for n, (item_id, _) in enumerate(items, 1)}
+
+
+def wire_id_savings(items: List[Tuple[str, str]], returned: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+    """
+    Tokens estimados que ahorran los ids ordinales en un lote
+
+    Returns:
+        Tupla (tokens_petición, tokens_respuesta); en la respuesta solo cuentan
+        los ids devueltos (returned, por id de segmento)
+    """
+    prompt_saved = completion_saved = 0
+    for n, (item_id, _) in enumerate(items, 1):
+        saved = estimate_tokens(json.dumps(item_id)) - estimate_tokens(json.dumps(str(n)))
+        prompt_saved += saved
+        if returned is None or item_id in returned:
+            completion_saved += saved
+    return prompt_saved, completion_saved
+
+
+def normalize_batch_order(order: Optional[str]) -> str:
+    order = (order or BATCH_ORDER_DICTIONARY).strip().lower()
+    if order not in BATCH_ORDERS:
+        logger.warning(f"Orden de lotes desconocido '{order}': se usa '{BATCH_ORDER_DICTIONARY}'")
+        return BATCH_ORDER_DICTIONARY
+    return order
+
+
+def length_bucket(text: str) -> int:
+    """Tramo de longitud de una frase (potencias de 2 de sus tokens de salida estimados)"""
+    return estimate_item_tokens(text)[1].bit_length()
+
+
+def key_prefix(key: str) -> str:
+    """Prefijo de una clave del dictionary sin su índice (DictKey_ActionText_)"""
+    return KEY_INDEX_REGEX.sub("", key or "")
+
+
+def order_batch_items(items: List[Tuple[str, str]], order: str,
+                      rank: Optional[Callable[[Tuple[str, str]], float]] = None,
+                      key_of: Optional[Callable[[str], str]] = None) -> List[Tuple[str, str]]:
+    """
+    Reordena (id, texto) antes de empaquetarlos para que cada lote sea homogéneo
+
+    - 'dictionary': sin cambios
+    - 'length': por tramos de longitud, de los más largos a los más cortos. Un
+      lote ya no mezcla llamadas de radio con briefings, y con varios lotes en
+      vuelo los largos salen primero en lugar de quedar como cola final
+    - 'length_prefix': agrupa además por prefijo de clave (key_of da la clave de
+      cada id), así las frases de un mismo contexto comparten lote
+
+    rank (menor primero) manda sobre la longitud, para no perder la prioridad
+    de KEY_PRIORITIES. Dentro de cada grupo se conserva el orden de entrada.
+    """
+    order = normalize_batch_order(order)
+    if order == BATCH_ORDER_DICTIONARY or len(items) < 2:
+        return list(items)
+
+    prefixes: Dict[str, int] = {}
+    sort_keys = {}
+    for item in items:
+        prefix = 0
+        if order == BATCH_ORDER_LENGTH_PREFIX and key_of is not None:
+            prefix = prefixes.setdefault(key_prefix(key_of(item[0])), len(prefixes))
+        sort_keys[item] = (rank(item) if rank else 0, prefix, -length_bucket(item[1]))
+    return sorted(items, key=sort_keys.__getitem__)
+
+
+def _take_token_batch(items: List[Tuple[str, str]], start: int, input_budget: int,
+                      output_budget: int, max_items: int) -> int:
+    """Devuelve el índice final del lote que empieza en start y cabe en el presupuesto"""
+    end = start
+    used_in = used_out = 0
+    while end < len(items) and end - start < max_items:
+        tok_in, tok_out = estimate_item_tokens(items[end][1])
+        if end > start and (used_in + tok_in > input_budget or used_out + tok_out > output_budget):
+            break
+        used_in += tok_in
+        used_out += tok_out
+        end += 1
+    return end
+
+
+def pack_batches_by_tokens(items: List[Tuple[str, str]], cfg: Dict,
+                           context_window: Optional[int] = None,
+                           max_items: int = MAX_ITEMS_PER_BATCH) -> List[List[Tuple[str, str]]]:
+    """
+    Agrupa (id, texto) en lotes que respetan el presupuesto de tokens
+
+    Se conserva el orden de entrada. Una frase que por sí sola excede el
+    presupuesto se envía en un lote individual.
+    """
+    input_budget, output_budget = compute_token_budget(cfg, context_window)
+    max_items = max(1, int(max_items or MAX_ITEMS_PER_BATCH))
+
+    batches: List[List[Tuple[str, str]]] = []
+    start = 0
+    while start < len(items):
+        end = _take_token_batch(items, start, input_budget, output_budget, max_items)
+        batches.append(items[start:end])
+        start = end
+
+    logger.info(f"📦 Lotes por tokens: {len(items)} frases -> {len(batches)} lotes "
+                f"(presupuesto entrada={input_budget}, salida={output_budget}, máx {max_items}/lote)")
+    return batches
+
+
+def plan_batches(items: List[Tuple[str, str]], cfg: Dict, batch_size: int,
+                 mode: str = DEFAULT_BATCH_MODE,
+                 context_window: Optional[int] = None) -> List[List[Tuple[str, str]]]:
+    """Devuelve los lotes según el modo configurado ('tokens' o 'items')"""
+    if (mode or DEFAULT_BATCH_MODE).strip().lower() == BATCH_MODE_ITEMS:
+        batch_size = max(1, int(batch_size or 1))
+        return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    return pack_batches_by_tokens(items, cfg, context_window)
+
+
+class BisectionRetry:
+    """
+    Reintento por bisección de las frases que el modelo no devolvió
+
+    Cada grupo fallido se parte en dos mitades que se reenvían; de cada mitad
+    solo vuelven a enviarse (otra vez partidos) los ids que siguen sin
+    traducción, hasta llegar a frases sueltas. Una frase "envenenada" en un
+    lote de n cuesta unas 2·log2(n) llamadas en lugar de n/2 pares seguidos, y
+    las mitades de un mismo nivel pueden ir en paralelo. Cada nivel tiene un
+    presupuesto de llamadas: los grupos que no caben pasan al nivel siguiente
+    (por delante de las mitades nuevas), así toda frase pendiente se reintenta
+    al menos una vez antes de caer al texto original.
+    """
+
+    LEVEL_BUDGET = 16
+
+    def __init__(self, groups: List[List[Tuple[str, str]]], level_budget: int = LEVEL_BUDGET):
+        self.level_budget = max(1, int(level_budget or self.LEVEL_BUDGET))
+        self.levels = 0
+        self.calls = 0
+        self.deferred = 0
+        self._next: List[List[Tuple[str, str]]] = [half for group in groups for half in self._split(group)]
+
+    @staticmethod
+    def _split(group: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        if len(group) <= 1:
+            return [group] if group else []
+        middle = (len(group) + 1) // 2
+        return [group[:middle], group[middle:]]
+
+    def next_level(self) -> List[List[Tuple[str, str]]]:
+        """Grupos a enviar en el siguiente nivel (vacío cuando ya no queda nada)"""
+        level, over = self._next[:self.level_budget], self._next[self.level_budget:]
+        self._next = over
+        if over:
+            self.deferred += len(over)
+            logger.info(f"✂️ Presupuesto de bisección del nivel {self.levels + 1} completo: "
+                        f"{len(over)} grupos pasan al siguiente nivel")
+        if level:
+            self.levels += 1
+            self.calls += len(level)
+        return level
+
+    def record(self, group: List[Tuple[str, str]], resolved) -> None:
+        """Anota la respuesta de un grupo; resolved son los ids ya traducidos"""
+        missing = [item for item in group if item[0] not in resolved]
+        # Una frase suelta que vuelve a fallar no se reintenta más
+        if missing and len(group) > 1:
+            self._next.extend(self._split(missing))
+
+    def summary(self) -> Dict[str, int]:
+        return {"levels": self.levels, "calls": self.calls, "deferred": self.deferred}
+
+
+class BatchStream:
+    """
+    Genera los lotes bajo demanda para que el tamaño pueda cambiar durante la
+    traducción (controlador adaptativo). Respeta el mismo modo que plan_batches.
+    """
+
+    def __init__(self, items: List[Tuple[str, str]], cfg: Dict, controller: "AdaptiveBatchController",
+                 mode: str = DEFAULT_BATCH_MODE, context_window: Optional[int] = None):
+        self.items = items
+        self.controller = controller
+        self.by_tokens = (mode or DEFAULT_BATCH_MODE).strip().lower() != BATCH_MODE_ITEMS
+        self.input_budget, self.output_budget = compute_token_budget(cfg, context_window)
+        self.position = 0
+        self.dispatched = 0
+
+    def __iter__(self) -> Iterator[List[Tuple[str, str]]]:
+        while self.position < len(self.items):
+            size = self.controller.size
+            if self.by_tokens:
+                end = _take_token_batch(self.items, self.position, self.input_budget, self.output_budget, size)
+            else:
+                end = min(self.position + size, len(self.items))
+            batch = self.items[self.position:end]
+            self.position = end
+            self.dispatched += 1
+            yield batch
+
+    def estimated_total(self) -> int:
+        """Lotes enviados más los que quedarían con el tamaño actual"""
+        remaining = len(self.items) - self.position
+        return self.dispatched + int(math.ceil(remaining / max(1, self.controller.size)))
+
+
+class AdaptiveBatchController:
+    """
+    Controlador AIMD del tamaño de lote
+
+    - Aumento aditivo: +INCREASE_STEP tras cada lote completo, rápido y sin fallos
+    - Reducción multiplicativa: x DECREASE_FACTOR si el lote superó la latencia
+      objetivo, no se pudo parsear, faltaron ids o hubo traducciones incompletas
+
+    Los lotes enviados con un tamaño mayor al actual (ya en vuelo cuando se
+    redujo) no vuelven a reducir, para no penalizar dos veces el mismo episodio.
+    El tamaño aprendido se guarda por modelo en el directorio del cache
+    centralizado (store_dir).
+    """
+
+    INCREASE_STEP = 1
+    DECREASE_FACTOR = 0.5
+    MAX_SIZE = MAX_ITEMS_PER_BATCH
+    # Latencia objetivo como fracción del timeout de la petición
+    LATENCY_TARGET_FRACTION = 0.5
+    # Fracción de traducciones incompletas tolerada antes de reducir
+    INCOMPLETE_TOLERANCE = 0.25
+
+    STORE_FILE = "adaptive_batch_sizes.json"
+    _store_lock = threading.Lock()
+
+    def __init__(self, model: str, initial: int, timeout: float,
+                 min_size: int = 1, max_size: int = MAX_ITEMS_PER_BATCH, store_dir: Optional[str] = None):
+        self.model = model or "default"
+        # Sin directorio el tamaño aprendido no se guarda
+        self.store_dir = store_dir
+        self.min_size = max(1, int(min_size))
+        self.max_size = max(self.min_size, int(max_size))
+        self.size = min(max(int(initial or 1), self.min_size), self.max_size)
+        self.initial_size = self.size
+        self.target_latency = float(timeout or 120) * self.LATENCY_TARGET_FRACTION
+        self.increases = 0
+        self.decreases = 0
+
+    @classmethod
+    def _read_store(cls, store_dir: str) -> Dict[str, Any]:
+        path = os.path.join(store_dir, cls.STORE_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.warning(f"⚠️ Error leyendo tamaños de lote aprendidos: {e}")
+            return {}
+
+    @classmethod
+    def for_model(cls, model: str, default_size: int, timeout: float, store_dir: str,
+                  max_size: int = MAX_ITEMS_PER_BATCH) -> "AdaptiveBatchController":
+        """Crea el controlador partiendo del tamaño aprendido para el modelo (si existe)"""
+        learned = cls._read_store(store_dir).get(model or "default", {}).get("batch_size")
+        controller = cls(model, learned or default_size, timeout, max_size=max_size, store_dir=store_dir)
+        if learned:
+            logger.info(f"🎛️ Tamaño de lote aprendido para {controller.model}: {controller.size}")
+        return controller
+
+    def record(self, batch_len: int, latency: Optional[float] = None, parse_failed: bool = False,
+               incomplete: int = 0, missing: int = 0, timed_out: bool = False):
+        """Registra el resultado de un lote y ajusta el tamaño"""
+        slow = latency is not None and latency > self.target_latency
+        failed = (timed_out or parse_failed or missing > 0
+                  or incomplete > batch_len * self.INCOMPLETE_TOLERANCE)
+
+        if slow or failed:
+            if batch_len > self.size:
+                return  # Lote enviado antes de la última reducción
+            new_size = max(self.min_size, int(self.size * self.DECREASE_FACTOR))
+            if new_size < self.size:
+                self.decreases += 1
+                logger.info(f"🎛️ Lote reducido {self.size} -> {new_size} "
+                            f"(latencia={latency if latency is None else round(latency, 2)}, "
+                            f"parse={parse_failed}, faltan={missing}, incompletas={incomplete}, timeout={timed_out})")
+                self.size = new_size
+        elif batch_len >= self.size and self.size < self.max_size:
+            # Solo crece si el lote llegó al tope actual (no lo limitó el presupuesto de tokens)
+            self.size = min(self.max_size, self.size + self.INCREASE_STEP)
+            self.increases += 1
+
+    def persist(self):
+        """Guarda el tamaño aprendido para el modelo"""
+        if not self.store_dir:
+            return
+        with self._store_lock:
+            data = self._read_store(self.store_dir)
+            data[self.model] = {
+                "batch_size": self.size,
+                "updated": datetime.now().isoformat()
+            }
+            try:
+                atomic_write_json(os.path.join(self.store_dir, self.STORE_FILE), data)
+            except Exception as e:
+                logger.warning(f"⚠️ Error guardando tamaño de lote aprendido: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "initial_size": self.initial_size,
+            "final_size": self.size,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "target_latency": self.target_latency
+        }
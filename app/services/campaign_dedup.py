@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deduplicación de frases a nivel de campaña antes de llamar al modelo
+
+En modo por misión cada misión consulta al modelo sus propios fallos de cache:
+las frases comunes (llamadas de radio, briefings estándar) llegan al modelo una
+vez por misión hasta que el cache las recoge, y cada misión cierra con su propio
+lote incompleto. En modo campaña se segmentan primero todas las misiones
+seleccionadas, se reúnen las frases únicas de la campaña y se traducen una sola
+vez por la ruta de lotes; después cada misión se escribe con esas traducciones.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.template_cache import extract_template
+
+# Cuenta los lotes que necesitaría una lista de frases pendientes
+BatchCounter = Callable[[List[str]], int]
+
+
+class CampaignDedupPlan:
+    """Frases únicas por misión y en toda la campaña, con la estimación del modo por misión"""
+
+    def __init__(self):
+        self.missions: List[Tuple[str, List[str]]] = []
+        self._unique: Dict[str, None] = {}
+
+    def add_mission(self, name: str, texts: Iterable[str]):
+        """Registra las frases (texto limpio para el modelo) de una misión"""
+        mission_texts = list(dict.fromkeys(texts))
+        self.missions.append((name, mission_texts))
+        self._unique.update(dict.fromkeys(mission_texts))
+
+    @property
+    def unique_texts(self) -> List[str]:
+        """Frases únicas de la campaña en orden de primera aparición"""
+        return list(self._unique)
+
+    @property
+    def mission_texts(self) -> int:
+        """Suma de las frases únicas de cada misión"""
+        return sum(len(texts) for _, texts in self.missions)
+
+    def estimate_per_mission_calls(self, known: Set[str], count_batches: BatchCounter,
+                                   cache_catches_up: bool, templates: bool = False) -> int:
+        """
+        Llamadas al modelo del modo por misión para las mismas frases
+
+        Es una cota inferior: no cuenta los pases extra por variantes de plantilla
+        que no se pudieron rellenar ni los reintentos.
+
+        Args:
+            known: Frases que ya resuelve el cache antes de empezar
+            count_batches: Lotes necesarios para una lista de frases
+            cache_catches_up: Si cada misión ve en el cache lo traducido por las
+                anteriores (use_cache=True)
+            templates: Si el cache resuelve también variantes de plantillas ya vistas
+        """
+        def template_of(text: str) -> Optional[str]:
+            template, slots = extract_template(text)
+            return template if templates and slots else None
+
+        seen = set(known)
+        seen_templates = {template_of(text) for text in known} - {None}
+        calls = 0
+        for _, texts in self.missions:
+            misses = [text for text in texts if text not in seen and template_of(text) not in seen_templates]
+            if misses:
+                calls += count_batches(misses)
+            if cache_catches_up:
+                seen.update(misses)
+                seen_templates.update(template_of(text) for text in misses)
+                seen_templates.discard(None)
+        return calls
+
+    def report(self, prepass_calls: int, mission_calls: int, per_mission_calls: int) -> Dict[str, int]:
+        """Resumen para el resultado de la fase de traducción"""
+        return {
+            "missions": len(self.missions),
+            "mission_texts": self.mission_texts,
+            "unique_texts": len(self._unique),
+            "prepass_calls": prepass_calls,
+            "mission_calls": mission_calls,
+            "per_mission_calls": per_mission_calls,
+            "calls_saved": per_mission_calls - prepass_calls - mission_calls,
+        }
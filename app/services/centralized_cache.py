@@ -1,173 +1,625 @@
+"""
+Cache centralizado de traducciones EN -> ES compartido por todas las campañas
+
+El almacenamiento es intercambiable (CACHE_CONFIG['BACKEND']):
+- SQLiteCacheBackend (por defecto): búsquedas indexadas por texto origen,
+  upserts por lotes y modo WAL para lectores concurrentes. La primera vez
+  importa global_translation_cache.json (que se conserva como copia).
+- JsonCacheBackend: el fichero JSON clásico, que se reescribe entero.
+
+Sobre el backend hay un único SharedTranslationCache en memoria por proceso
+(compartido por el orquestador y todos los motores): las lecturas no tocan
+disco y las escrituras se acumulan y se vuelcan en segundo plano cada
+FLUSH_INTERVAL segundos, al terminar cada misión (flush) y al salir.
+"""
+import atexit
 import json
 import os
-from typing import Dict, Optional
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
 import logging
 
+from config.settings import CACHE_CONFIG
+from app.utils.file_utils import atomic_write_json
+from app.services.translation_memory import normalize_source, restore_surface
+from app.services.template_cache import extract_template, fill_template, translate_template
+
+CACHE_BACKEND_SQLITE = "sqlite"
+CACHE_BACKEND_JSON = "json"
+
+JSON_CACHE_FILENAME = "global_translation_cache.json"
+SQLITE_CACHE_FILENAME = "global_translation_cache.sqlite3"
+
+
+class JsonCacheBackend:
+    """Backend legacy: un único fichero JSON {en: es}"""
+
+    name = CACHE_BACKEND_JSON
+    # Cada escritura reescribe el fichero completo: al volcar se pasa todo el cache
+    incremental_writes = False
+
+    def __init__(self, cache_dir: str):
+        self.path = os.path.join(cache_dir, JSON_CACHE_FILENAME)
+        if not os.path.exists(self.path):
+            self.replace_all({})
+
+    def load_all(self) -> Dict[str, str]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        cache = self.load_all()
+        return {en: cache[en] for en in texts if en in cache}
+
+    def upsert(self, translations: Dict[str, str]) -> int:
+        cache = self.load_all()
+        changed = 0
+        for en, es in translations.items():
+            if cache.get(en) != es:
+                cache[en] = es
+                changed += 1
+        if changed:
+            self.replace_all(cache)
+        return changed
+
+    def replace_all(self, cache: Dict[str, str]):
+        atomic_write_json(self.path, cache)
+
+    def count(self) -> int:
+        return len(self.load_all())
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def clear(self):
+        self.replace_all({})
+
+    def close_connection(self):
+        """Sin conexiones persistentes: nada que cerrar"""
+
+
+class SQLiteCacheBackend:
+    """Backend SQLite con una conexión por hilo y el texto origen como clave primaria"""
+
+    name = CACHE_BACKEND_SQLITE
+    incremental_writes = True
+
+    # Parámetros por consulta IN (...) (SQLITE_MAX_VARIABLE_NUMBER antiguo es 999)
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, cache_dir: str, json_path: Optional[str] = None):
+        self.path = os.path.join(cache_dir, SQLITE_CACHE_FILENAME)
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "en TEXT PRIMARY KEY, es TEXT NOT NULL, updated_at TEXT NOT NULL) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._migrate_from_json(json_path or os.path.join(cache_dir, JSON_CACHE_FILENAME))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close_connection(self):
+        """Cierra la conexión del hilo actual (hilos efímeros como el del volcado diferido)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    def _migrate_from_json(self, json_path: str):
+        """Importa el cache JSON una única vez (el fichero queda como copia de seguridad)"""
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        imported = 0
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    data = {en: es for en, es in data.items() if isinstance(en, str) and isinstance(es, str)}
+                    imported = self.upsert(data)
+            except Exception as e:
+                # Sin marcar la migración, para reintentarla en el siguiente arranque
+                self.logger.error(f"❌ Error migrando cache JSON a SQLite: {e}")
+                return
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                         (datetime.now().isoformat(),))
+        if imported:
+            self.logger.info(f"🗄️ Cache JSON migrado a SQLite: {imported} entradas ({json_path})")
+
+    def load_all(self) -> Dict[str, str]:
+        return dict(self._conn().execute("SELECT en, es FROM translations"))
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        texts = list(dict.fromkeys(texts))
+        found: Dict[str, str] = {}
+        conn = self._conn()
+        for i in range(0, len(texts), self.LOOKUP_CHUNK):
+            chunk = texts[i:i + self.LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(conn.execute(f"SELECT en, es FROM translations WHERE en IN ({placeholders})", chunk))
+        return found
+
+    def upsert(self, translations: Dict[str, str]) -> int:
+        if not translations:
+            return 0
+        now = datetime.now().isoformat()
+        conn = self._conn()
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                "INSERT INTO translations (en, es, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(en) DO UPDATE SET es = excluded.es, updated_at = excluded.updated_at "
+                "WHERE translations.es != excluded.es",
+                ((en, es, now) for en, es in translations.items())
+            )
+        return conn.total_changes - before
+
+    def replace_all(self, cache: Dict[str, str]):
+        now = datetime.now().isoformat()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM translations")
+            conn.executemany("INSERT INTO translations (en, es, updated_at) VALUES (?, ?, ?)",
+                             ((en, es, now) for en, es in cache.items()))
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM translations")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def create_cache_backend(kind: str, cache_dir: str):
+    """Crea el backend solicitado ('sqlite' o 'json'); por defecto SQLite"""
+    kind = (kind or CACHE_BACKEND_SQLITE).strip().lower()
+    if kind == CACHE_BACKEND_JSON:
+        return JsonCacheBackend(cache_dir)
+    if kind != CACHE_BACKEND_SQLITE:
+        logging.getLogger(__name__).warning(f"⚠️ Backend de cache desconocido '{kind}'; usando 'sqlite'")
+    return SQLiteCacheBackend(cache_dir)
+
+
+class SharedTranslationCache:
+    """
+    Cache en memoria con escritura diferida (write-behind) sobre un backend
+
+    Todo el contenido se carga una vez; update/get trabajan en memoria y los
+    cambios pendientes se vuelcan al backend desde un temporizador, con
+    flush() explícito o al terminar el proceso.
+    """
+
+    # Segundos entre un cambio y su volcado automático a disco
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.logger = logging.getLogger(__name__)
+        self._entries: Optional[Dict[str, str]] = None
+        # Índice secundario forma canónica -> frase origen (se construye al primer uso)
+        self._canonical: Optional[Dict[str, str]] = None
+        # Índice plantilla origen -> plantilla traducida (ver template_cache)
+        self._templates: Optional[Dict[str, str]] = None
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def _loaded(self) -> Dict[str, str]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self.backend.load_all()
+                    self.logger.info(f"🧠 Cache en memoria cargado: {len(self._entries)} entradas ({self.backend.name})")
+        return self._entries
+
+    def snapshot(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._loaded())
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        with self._lock:
+            entries = self._loaded()
+            return {en: entries[en] for en in texts if en in entries}
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._loaded())
+
+    def _canonical_index(self) -> Dict[str, str]:
+        if self._canonical is None:
+            index: Dict[str, str] = {}
+            for en in self._loaded():
+                index.setdefault(normalize_source(en), en)
+            self._canonical = index
+        return self._canonical
+
+    def _template_index(self) -> Dict[str, str]:
+        if self._templates is None:
+            index: Dict[str, str] = {}
+            for en, es in self._loaded().items():
+                derived = translate_template(en, es)
+                if derived:
+                    index.setdefault(*derived)
+            self._templates = index
+            self.logger.info(f"🧩 Índice de plantillas construido: {len(index)} plantillas")
+        return self._templates
+
+    def lookup_templates(self, texts: Iterable[str]) -> Dict[str, str]:
+        """Traduce rellenando plantillas ya conocidas; devuelve {en: es} de las resueltas"""
+        found: Dict[str, str] = {}
+        with self._lock:
+            index = self._template_index()
+            for en in texts:
+                template, slots = extract_template(en)
+                translated = index.get(template) if slots else None
+                if translated is not None:
+                    found[en] = fill_template(translated, slots)
+        return found
+
+    def lookup(self, texts: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Busca primero por texto exacto y, para los fallos, por forma normalizada
+
+        Returns:
+            Tupla (aciertos_exactos, aciertos_normalizados), ambos {en: es}; en
+            los normalizados la traducción ya tiene restaurada la superficie
+        """
+        exact: Dict[str, str] = {}
+        normalized: Dict[str, str] = {}
+        with self._lock:
+            entries = self._loaded()
+            misses = []
+            for en in texts:
+                if en in entries:
+                    exact[en] = entries[en]
+                else:
+                    misses.append(en)
+            if misses:
+                index = self._canonical_index()
+                for en in misses:
+                    cached_en = index.get(normalize_source(en))
+                    if cached_en is None:
+                        continue
+                    es = restore_surface(en, cached_en, entries[cached_en])
+                    if es is not None:
+                        normalized[en] = es
+        return exact, normalized
+
+    def upsert(self, translations: Dict[str, str]) -> int:
+        """Actualiza en memoria y programa el volcado; devuelve nuevas/modificadas"""
+        changed = 0
+        with self._lock:
+            entries = self._loaded()
+            for en, es in translations.items():
+                if entries.get(en) != es:
+                    entries[en] = es
+                    self._pending[en] = es
+                    changed += 1
+                    if self._canonical is not None:
+                        self._canonical.setdefault(normalize_source(en), en)
+                    if self._templates is not None:
+                        derived = translate_template(en, es)
+                        if derived:
+                            self._templates.setdefault(*derived)
+            if changed:
+                self._schedule_flush()
+        return changed
+
+    def replace_all(self, cache: Dict[str, str]):
+        """Reemplaza todo el contenido (operación administrativa, se escribe ya)"""
+        with self._flush_lock, self._lock:
+            self._cancel_timer()
+            self._pending.clear()
+            self.backend.replace_all(cache)
+            self._entries = dict(cache)
+            self._canonical = None
+            self._templates = None
+
+    def clear(self):
+        with self._flush_lock, self._lock:
+            self._cancel_timer()
+            self._pending.clear()
+            self.backend.clear()
+            self._entries = {}
+            self._canonical = None
+            self._templates = None
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.FLUSH_INTERVAL, self._flush_from_timer)
+            self._timer.name = "translation_cache_flush"
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_from_timer(self):
+        # Cada temporizador corre en un hilo nuevo: su conexión al backend no se reutiliza
+        try:
+            self.flush()
+        finally:
+            self.backend.close_connection()
+
+    def flush(self) -> int:
+        """Vuelca al backend los cambios pendientes; devuelve cuántas entradas escribió"""
+        with self._flush_lock:
+            with self._lock:
+                self._cancel_timer()
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+                # El backend JSON reescribe el fichero entero: se le pasa el cache completo
+                full = None if self.backend.incremental_writes else dict(self._entries)
+            try:
+                if full is None:
+                    self.backend.upsert(pending)
+                else:
+                    self.backend.replace_all(full)
+            except Exception as e:
+                with self._lock:
+                    # Reintentar en el siguiente volcado sin pisar cambios más recientes
+                    for en, es in pending.items():
+                        self._pending.setdefault(en, es)
+                    self._schedule_flush()
+                self.logger.error(f"❌ Error volcando cache de traducciones: {e}")
+                return 0
+        self.logger.info(f"💾 Cache de traducciones volcado: {len(pending)} entradas")
+        return len(pending)
+
+
+# Un cache en memoria por fichero de backend, compartido por todo el proceso
+_shared_caches: Dict[str, SharedTranslationCache] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_shared_cache(cache_dir: str, backend: str = None) -> SharedTranslationCache:
+    """Obtiene (o crea) el cache en memoria del directorio y backend indicados"""
+    kind = (backend or CACHE_CONFIG.get('BACKEND') or CACHE_BACKEND_SQLITE).strip().lower()
+    key = f"{os.path.abspath(cache_dir)}|{kind}"
+    with _shared_caches_lock:
+        shared = _shared_caches.get(key)
+        if shared is None:
+            shared = SharedTranslationCache(create_cache_backend(kind, cache_dir))
+            _shared_caches[key] = shared
+        return shared
+
+
+def flush_all_caches():
+    """Vuelca todos los caches en memoria (se ejecuta también al salir del proceso)"""
+    with _shared_caches_lock:
+        caches = list(_shared_caches.values())
+    for shared in caches:
+        shared.flush()
+
+
+atexit.register(flush_all_caches)
+
+
 class CentralizedCache:
     """Sistema de cache centralizado para traducciones DCS"""
-    
-    def __init__(self, cache_dir: str = None):
+
+    def __init__(self, cache_dir: str = None, backend: str = None):
         """
         Inicializar el cache centralizado
-        
+
         Args:
             cache_dir: Directorio donde guardar el cache. Si es None, usa app/data/cache/
+            backend: 'sqlite' o 'json'. Si es None, usa CACHE_CONFIG['BACKEND']
         """
         if cache_dir is None:
             # Usar directorio por defecto en app/data/cache/
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             cache_dir = os.path.join(base_dir, "data", "cache")
-        
+
         self.cache_dir = cache_dir
-        self.cache_file = os.path.join(cache_dir, "global_translation_cache.json")
         self.logger = logging.getLogger(__name__)
-        
+
         # Crear directorio si no existe
         os.makedirs(cache_dir, exist_ok=True)
-        
-        # Inicializar cache vacío si no existe
-        if not os.path.exists(self.cache_file):
-            self._save_cache({})
-    
+
+        # Todas las instancias del mismo directorio comparten el cache en memoria
+        self.store = get_shared_cache(cache_dir, backend)
+        self.backend = self.store.backend
+        self.cache_file = self.backend.path
+
+    def flush(self) -> int:
+        """Vuelca a disco las traducciones pendientes (fin de misión)"""
+        return self.store.flush()
+
     def load_cache(self, use_cache: bool = True) -> Dict[str, str]:
         """
         Cargar el cache centralizado
-        
+
         Args:
             use_cache: Si False, retorna un diccionario vacío (simula cache deshabilitado)
-            
+
         Returns:
             Diccionario con las traducciones en cache
         """
         if not use_cache:
             self.logger.info("Cache deshabilitado - retornando cache vacío")
             return {}
-            
+
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    cache = json.load(f)
-                    self.logger.info(f"Cache centralizado cargado: {len(cache)} entradas")
-                    return cache
-            else:
-                self.logger.info("Archivo de cache centralizado no existe - creando nuevo")
-                return {}
+            cache = self.store.snapshot()
+            self.logger.info(f"Cache centralizado cargado: {len(cache)} entradas")
+            return cache
         except Exception as e:
             self.logger.error(f"Error cargando cache centralizado: {e}")
             return {}
-    
+
+    def get_many(self, texts: Iterable[str], use_cache: bool = True) -> Dict[str, str]:
+        """
+        Buscar solo las traducciones de los textos indicados
+
+        Args:
+            texts: Textos origen (EN) a consultar
+            use_cache: Si False, retorna un diccionario vacío
+
+        Returns:
+            Diccionario {en: es} con los textos encontrados en cache
+        """
+        if not use_cache:
+            return {}
+        try:
+            return self.store.get_many(texts)
+        except Exception as e:
+            self.logger.error(f"Error consultando cache centralizado: {e}")
+            return {}
+
+    def lookup(self, texts: Iterable[str], use_cache: bool = True) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Buscar traducciones por texto exacto y, si falla, por forma normalizada
+        (espacios, comillas, forma Unicode y mayúsculas)
+
+        Returns:
+            Tupla (aciertos_exactos, aciertos_normalizados) con diccionarios {en: es}
+        """
+        if not use_cache:
+            return {}, {}
+        try:
+            return self.store.lookup(texts)
+        except Exception as e:
+            self.logger.error(f"Error consultando cache centralizado: {e}")
+            return {}, {}
+
+    def lookup_templates(self, texts: Iterable[str], use_cache: bool = True) -> Dict[str, str]:
+        """
+        Traducir frases que solo cambian en números, frecuencias, indicativos o
+        coordenadas respecto a otra ya cacheada (ver template_cache)
+
+        Returns:
+            Diccionario {en: es} con las frases resueltas por plantilla
+        """
+        if not use_cache:
+            return {}
+        try:
+            return self.store.lookup_templates(texts)
+        except Exception as e:
+            self.logger.error(f"Error consultando plantillas del cache: {e}")
+            return {}
+
     def _save_cache(self, cache: Dict[str, str]) -> bool:
         """
-        Guardar el cache centralizado
-        
+        Guardar el cache centralizado (reemplaza todo el contenido)
+
         Args:
             cache: Diccionario con traducciones
-            
+
         Returns:
             True si se guardó correctamente, False en caso de error
         """
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache, f, ensure_ascii=False, indent=2)
+            self.store.replace_all(cache)
             self.logger.info(f"Cache centralizado guardado: {len(cache)} entradas")
             return True
         except Exception as e:
             self.logger.error(f"Error guardando cache centralizado: {e}")
             return False
-    
+
     def update_cache(self, new_translations: Dict[str, str], use_cache: bool = True) -> bool:
         """
         Actualizar el cache centralizado con nuevas traducciones
-        
+
         Args:
             new_translations: Nuevas traducciones para añadir
             use_cache: Si False, no actualiza el cache (simula cache deshabilitado)
-            
+
         Returns:
             True si se actualizó correctamente
         """
         if not use_cache:
             self.logger.info("Cache deshabilitado - no se actualizará el cache centralizado")
             return True
-            
+
         try:
-            # Cargar cache actual (usar el parámetro use_cache)
-            current_cache = self.load_cache(use_cache=use_cache)
-            
             # Filtrar traducciones válidas
             valid_translations = {
                 en: es for en, es in new_translations.items()
-                if isinstance(en, str) and isinstance(es, str) and 
-                   en.strip() and es.strip() and 
+                if isinstance(en, str) and isinstance(es, str) and
+                   en.strip() and es.strip() and
                    en.strip().lower() != es.strip().lower()
             }
-            
-            # Merge sin duplicados
-            merged_count = 0
-            for en, es in valid_translations.items():
-                if en not in current_cache:
-                    current_cache[en] = es
-                    merged_count += 1
-                elif current_cache[en] != es:
-                    # Actualizar si la traducción es diferente
-                    current_cache[en] = es
-                    merged_count += 1
-            
-            # Guardar cache actualizado
-            if self._save_cache(current_cache):
-                self.logger.info(f"Cache actualizado con {merged_count} nuevas/modificadas traducciones")
-                return True
-            else:
-                return False
-                
+
+            # En memoria al instante; el volcado a disco es diferido
+            merged_count = self.store.upsert(valid_translations)
+            self.logger.info(f"Cache actualizado con {merged_count} nuevas/modificadas traducciones")
+            return True
+
         except Exception as e:
             self.logger.error(f"Error actualizando cache centralizado: {e}")
             return False
-    
+
     def merge_local_cache(self, local_cache_path: str, use_cache: bool = True) -> bool:
         """
         Fusionar un cache local (translation_cache.json) con el centralizado
-        
+
         Args:
             local_cache_path: Ruta al archivo de cache local
             use_cache: Si False, no fusiona el cache
-            
+
         Returns:
             True si se fusionó correctamente
         """
         if not use_cache:
             self.logger.info("Cache deshabilitado - no se fusionará el cache local")
             return True
-            
+
         try:
             if os.path.exists(local_cache_path):
                 with open(local_cache_path, 'r', encoding='utf-8') as f:
                     local_cache = json.load(f)
-                
+
                 result = self.update_cache(local_cache, use_cache=True)
                 self.logger.info(f"Cache local fusionado desde: {local_cache_path}")
                 return result
             else:
                 self.logger.warning(f"Cache local no encontrado: {local_cache_path}")
                 return True
-                
+
         except Exception as e:
             self.logger.error(f"Error fusionando cache local {local_cache_path}: {e}")
             return False
-    
+
     def get_cache_stats(self) -> Dict[str, any]:
         """
         Obtener estadísticas del cache centralizado
-        
+
         Returns:
             Diccionario con estadísticas del cache
         """
         try:
-            cache = self.load_cache(use_cache=True)
-            file_size = os.path.getsize(self.cache_file) if os.path.exists(self.cache_file) else 0
-            
+            file_size = self.backend.size_bytes()
+
             return {
-                'total_entries': len(cache),
+                'total_entries': self.store.count(),
+                'backend': self.backend.name,
                 'cache_file': self.cache_file,
                 'file_size_bytes': file_size,
                 'file_size_mb': round(file_size / (1024 * 1024), 2)
@@ -176,23 +628,24 @@ class CentralizedCache:
             self.logger.error(f"Error obteniendo estadísticas del cache: {e}")
             return {
                 'total_entries': 0,
+                'backend': self.backend.name,
                 'cache_file': self.cache_file,
                 'file_size_bytes': 0,
                 'file_size_mb': 0,
                 'error': str(e)
             }
-    
+
     def clear_cache(self) -> bool:
         """
         Limpiar completamente el cache centralizado
-        
+
         Returns:
             True si se limpió correctamente
         """
         try:
-            self._save_cache({})
+            self.store.clear()
             self.logger.info("Cache centralizado limpiado")
             return True
         except Exception as e:
             self.logger.error(f"Error limpiando cache centralizado: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retraducción incremental tras un parche de la campaña
+
+Compara los segmentos del diccionario nuevo con el *.translations.jsonl de la
+traducción anterior, por clave y texto origen: los segmentos sin cambios
+reutilizan su traducción y solo los nuevos o modificados van al modelo. El
+resultado se resume en un informe de cambios (claves añadidas, modificadas y
+eliminadas).
+"""
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Máximo de claves listadas por categoría en el informe (el resto solo se cuenta)
+MAX_REPORTED_KEYS = 500
+
+
+def load_previous_translations(jsonl_path: str) -> Optional[Dict[Tuple[str, str], Optional[str]]]:
+    """
+    Lee el JSONL de la traducción anterior como {(key, en): es}
+
+    Returns:
+        None si no hay traducción anterior legible. Las líneas sin traducción o
+        con el texto original (fallback tras un fallo del modelo, el mismo filtro
+        que aplica el cache) quedan con es=None: cuentan para el informe de
+        cambios pero no se reutilizan y vuelven al modelo
+    """
+    if not os.path.exists(jsonl_path):
+        return None
+    previous: Dict[Tuple[str, str], str] = {}
+    try:
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                en, es = obj.get("en"), obj.get("es")
+                if not isinstance(es, str) or not es.strip() or es.strip().lower() == str(en or "").strip().lower():
+                    es = None
+                previous[(obj.get("key"), en)] = es
+    except Exception as e:
+        logger.warning(f"JSONL anterior ilegible, se traduce todo: {jsonl_path}: {e}")
+        return None
+    return previous
+
+
+class IncrementalPlan:
+    """Qué segmentos se reutilizan y qué claves cambiaron respecto a la traducción anterior"""
+
+    def __init__(self, previous: Dict[Tuple[str, str], Optional[str]], segments: Iterable):
+        self.reused: Dict[str, str] = {}
+        new_pairs: Dict[str, Set[str]] = {}
+        for seg in segments:
+            if not seg.clean_for_model.strip():
+                continue
+            new_pairs.setdefault(seg.key, set()).add(seg.clean_for_model)
+            es = previous.get((seg.key, seg.clean_for_model))
+            if es is not None:
+                self.reused[seg.id] = es
+
+        old_pairs: Dict[str, Set[str]] = {}
+        for key, en in previous:
+            old_pairs.setdefault(key, set()).add(en)
+
+        self.added = sorted(k for k in new_pairs if k not in old_pairs)
+        self.removed = sorted(k for k in old_pairs if k not in new_pairs)
+        self.changed = sorted(k for k in new_pairs if k in old_pairs and new_pairs[k] != old_pairs[k])
+        self.unchanged = len(new_pairs) - len(self.added) - len(self.changed)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "reused_segments": len(self.reused),
+            "keys_unchanged": self.unchanged,
+            "keys_added": len(self.added),
+            "keys_changed": len(self.changed),
+            "keys_removed": len(self.removed),
+        }
+
+    def report(self) -> Dict:
+        """Informe de cambios para guardar junto a la traducción"""
+        def listed(keys: List[str]) -> List[str]:
+            return keys[:MAX_REPORTED_KEYS]
+        return {
+            "summary": self.summary(),
+            "added": listed(self.added),
+            "changed": listed(self.changed),
+            "removed": listed(self.removed),
+        }
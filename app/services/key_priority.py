@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prioridad de claves del dictionary para tener antes una misión jugable
+
+KEY_PRIORITIES en la configuración de prompts asigna un peso a cada prefijo de
+clave ({"DictKey_descriptionText_": 100, "DictKey_ActionText_": 10}); las
+claves sin prefijo configurado pesan 0 y, si varios prefijos encajan, manda el
+más largo. Las frases se envían al modelo de mayor a menor peso (a igual peso,
+en el orden del dictionary). El tramo prioritario lo forman las claves con peso
+>= PRIORITY_TIER_MIN_WEIGHT: al terminarlo se puede generar una salida
+intermedia mientras se traduce el resto.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+PRIORITIES_KEY = "KEY_PRIORITIES"
+TIER_MIN_WEIGHT_KEY = "PRIORITY_TIER_MIN_WEIGHT"
+DEFAULT_TIER_MIN_WEIGHT = 50.0
+
+logger = logging.getLogger(__name__)
+
+
+class KeyPriorities:
+    """Pesos por prefijo de clave leídos de la configuración de prompts"""
+
+    def __init__(self, cfg: Dict):
+        self.prefixes: List[Tuple[str, float]] = []
+        raw = cfg.get(PRIORITIES_KEY) or {}
+        if not isinstance(raw, dict):
+            logger.warning(f"{PRIORITIES_KEY} debe ser un diccionario prefijo -> peso (ignorado)")
+            raw = {}
+        for prefix, weight in raw.items():
+            try:
+                self.prefixes.append((str(prefix), float(weight)))
+            except (TypeError, ValueError):
+                logger.warning(f"{PRIORITIES_KEY} mal formado: {prefix!r} -> {weight!r} (ignorado)")
+        self.prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        try:
+            self.tier_min_weight = float(cfg.get(TIER_MIN_WEIGHT_KEY, DEFAULT_TIER_MIN_WEIGHT))
+        except (TypeError, ValueError):
+            self.tier_min_weight = DEFAULT_TIER_MIN_WEIGHT
+        self._weights: Dict[str, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.prefixes)
+
+    def weight(self, key: str) -> float:
+        """Peso de la clave: el del prefijo configurado más largo que encaje, o 0"""
+        weight = self._weights.get(key)
+        if weight is None:
+            weight = next((w for prefix, w in self.prefixes if key.startswith(prefix)), 0.0)
+            self._weights[key] = weight
+        return weight
+
+    def in_priority_tier(self, key: str) -> bool:
+        return bool(self.prefixes) and self.weight(key) >= self.tier_min_weight
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de endpoints LM Studio (compatibles con OpenAI) con balanceo de carga
+
+Con varias instancias de LM Studio (distintos puertos o máquinas) cada lote se
+envía al endpoint sano menos cargado (lotes en vuelo ponderados por su latencia
+media). Tras FAILURE_THRESHOLD fallos seguidos (error de conexión, HTTP o
+timeout) el endpoint se expulsa del pool; pasado PROBE_INTERVAL un hilo en
+segundo plano lo sondea (GET /models) y, si responde, vuelve a entrar. Cada endpoint acumula lotes, frases, segundos y
+fallos para el reporte de la misión.
+
+Formato de configuración (lm_endpoints): lista o texto separado por comas o
+saltos de línea con entradas "url" o "url|modelo".
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+
+FAILURE_THRESHOLD = 3
+PROBE_INTERVAL = 30.0
+PROBE_TIMEOUT = 3.0
+
+EndpointSpec = Union[str, Dict[str, Any], Iterable[Union[str, Dict[str, Any]]], None]
+
+
+def parse_endpoints(spec: EndpointSpec, default_model: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Normaliza la configuración de endpoints a [(url, modelo), ...] sin duplicados"""
+    if not spec:
+        return []
+    if isinstance(spec, str):
+        spec = [part for chunk in spec.splitlines() for part in chunk.split(",")]
+    elif isinstance(spec, dict):
+        spec = [spec]
+    endpoints: List[Tuple[str, str]] = []
+    for entry in spec:
+        if isinstance(entry, dict):
+            url, model = entry.get("url"), entry.get("model")
+        else:
+            url, _, model = str(entry).strip().partition("|")
+        url = (url or "").strip().rstrip("/")
+        if not url:
+            continue
+        if not url.endswith("/v1"):
+            url += "/v1"
+        endpoint = (url, (model or "").strip() or default_model or "")
+        if endpoint not in endpoints:
+            endpoints.append(endpoint)
+    return endpoints
+
+
+class LMEndpoint:
+    """Estado y estadísticas de una instancia de LM Studio"""
+
+    def __init__(self, url: str, model: str):
+        self.url = url
+        self.model = model
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.ejected_at = 0.0
+        self.probing = False
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        # Solo los lotes correctos cuentan para la latencia media
+        self.ok_batches = 0
+        self.ok_seconds = 0.0
+
+    def seconds_per_batch(self) -> float:
+        """Latencia media de los lotes correctos (0 mientras no haya ninguno: se prueba primero)"""
+        return self.ok_seconds / self.ok_batches if self.ok_batches else 0.0
+
+    def counters(self) -> Dict[str, float]:
+        return {"batches": self.batches, "items": self.items, "failures": self.failures,
+                "busy_seconds": self.busy_seconds}
+
+
+class LMEndpointPool:
+    """Reparte lotes entre endpoints sanos según carga y vigila su salud"""
+
+    def __init__(self, endpoints: List[Tuple[str, str]], failure_threshold: int = FAILURE_THRESHOLD,
+                 probe_interval: float = PROBE_INTERVAL):
+        if not endpoints:
+            raise ValueError("El pool de LM Studio necesita al menos un endpoint")
+        self.endpoints = [LMEndpoint(url, model) for url, model in endpoints]
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    @property
+    def healthy_count(self) -> int:
+        return sum(1 for ep in self.endpoints if ep.healthy)
+
+    # === Selección ===
+
+    def acquire(self, exclude: Optional[LMEndpoint] = None) -> LMEndpoint:
+        """
+        Endpoint sano con menor carga estimada: lotes en vuelo por latencia media,
+        así una instancia más rápida recibe más lotes. Si no queda ninguno sano se
+        usa el expulsado hace más tiempo.
+        """
+        self._schedule_probes()
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep.healthy and ep is not exclude]
+            if not candidates:
+                candidates = [ep for ep in self.endpoints if ep.healthy] or \
+                             sorted(self.endpoints, key=lambda ep: ep.ejected_at)[:1]
+            endpoint = min(candidates, key=lambda ep: ((ep.in_flight + 1) * ep.seconds_per_batch(), ep.in_flight))
+            endpoint.in_flight += 1
+            return endpoint
+
+    def release(self, endpoint: LMEndpoint, ok: bool, items: int = 0, seconds: float = 0.0):
+        """Registra el resultado de un lote enviado a endpoint"""
+        with self._lock:
+            endpoint.in_flight = max(0, endpoint.in_flight - 1)
+            endpoint.batches += 1
+            endpoint.items += items
+            endpoint.busy_seconds += seconds
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.ok_batches += 1
+                endpoint.ok_seconds += seconds
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold:
+                self._eject(endpoint, f"{endpoint.consecutive_failures} fallos seguidos")
+
+    def eject(self, endpoint: LMEndpoint, reason: str):
+        with self._lock:
+            if endpoint.healthy:
+                self._eject(endpoint, reason)
+
+    def _eject(self, endpoint: LMEndpoint, reason: str):
+        endpoint.healthy = False
+        endpoint.ejected_at = time.monotonic()
+        self.logger.warning(f"⛔ Endpoint LM expulsado del pool: {endpoint.url} ({reason})")
+
+    # === Salud ===
+
+    def _schedule_probes(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [ep for ep in self.endpoints
+                   if not ep.healthy and not ep.probing and now - ep.ejected_at >= self.probe_interval]
+            for ep in due:
+                ep.probing = True
+        for ep in due:
+            threading.Thread(target=self._probe, args=(ep,), name="lm_endpoint_probe", daemon=True).start()
+
+    def _probe(self, endpoint: LMEndpoint):
+        try:
+            ok = requests.get(f"{endpoint.url}/models", timeout=PROBE_TIMEOUT).ok
+        except requests.RequestException:
+            ok = False
+        with self._lock:
+            endpoint.probing = False
+            if ok:
+                endpoint.healthy = True
+                endpoint.consecutive_failures = 0
+                self.logger.info(f"✅ Endpoint LM reincorporado al pool: {endpoint.url}")
+            else:
+                endpoint.ejected_at = time.monotonic()
+
+    # === Estadísticas ===
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {ep.url: ep.counters() for ep in self.endpoints}
+
+    def report(self, since: Optional[Dict[str, Dict[str, float]]] = None) -> List[Dict[str, Any]]:
+        """Estadísticas por endpoint desde since (snapshot previo) para el reporte de misión"""
+        since = since or {}
+        rows = []
+        with self._lock:
+            for ep in self.endpoints:
+                base = since.get(ep.url, {})
+                delta = {k: v - base.get(k, 0) for k, v in ep.counters().items()}
+                busy = delta["busy_seconds"]
+                rows.append({
+                    "url": ep.url,
+                    "model": ep.model,
+                    "healthy": ep.healthy,
+                    "batches": int(delta["batches"]),
+                    "items": int(delta["items"]),
+                    "failures": int(delta["failures"]),
+                    "busy_seconds": round(busy, 2),
+                    "items_per_second": round(delta["items"] / busy, 2) if busy > 0 else 0.0,
+                })
+        return rows
+
+
+# Un pool por configuración de endpoints: la salud se conserva entre misiones
+_pools: Dict[Tuple[Tuple[str, str], ...], LMEndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_endpoint_pool(endpoints: List[Tuple[str, str]]) -> LMEndpointPool:
+    key = tuple(endpoints)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = LMEndpointPool(endpoints)
+        return _pools[key]
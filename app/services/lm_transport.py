@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transportes HTTP para las llamadas de traducción a LM Studio
+
+Ambos transportes exponen la misma interfaz (post / post_stream / cancel /
+close) y devuelven objetos requests.Response, de modo que el motor conserva su
+manejo de errores (raise_for_status, HTTPError, Timeout) sin importar cómo
+viaja la petición. En post_stream las líneas SSE se entregan a un callback
+(on_line) que puede devolver False para dejar de leer.
+
+- RequestsTransport: requests.Session síncrona (un hilo por lote en vuelo)
+- AsyncLMTransport: aiohttp sobre un único event loop compartido por todo el
+  proceso, capaz de mantener cientos de lotes en vuelo sin un hilo por petición
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_REQUESTS = "requests"
+TRANSPORT_ASYNC = "async"
+
+
+class RequestsTransport:
+    """Transporte síncrono clásico basado en requests.Session"""
+
+    name = TRANSPORT_REQUESTS
+    is_async = False
+
+    def __init__(self, session_factory: Callable[[], requests.Session] = None):
+        self._session_factory = session_factory or requests.Session
+        self.session = self._session_factory()
+
+    def post(self, url: str, body: Dict[str, Any], headers: Dict[str, str],
+             timeout: float, owner: Any = None) -> requests.Response:
+        """Envía la petición y devuelve la respuesta HTTP"""
+        return self.session.post(url, json=body, headers=headers, timeout=timeout)
+
+    def post_stream(self, url: str, body: Dict[str, Any], headers: Dict[str, str], timeout: float,
+                    on_line: Callable[[str], Optional[bool]], owner: Any = None) -> requests.Response:
+        """Envía la petición en streaming y entrega cada línea a on_line"""
+        r = self.session.post(url, json=body, headers=headers, timeout=timeout, stream=True)
+        try:
+            if r.status_code >= 400:
+                r.content  # Cargar el cuerpo del error antes de cerrar
+                return r
+            # Con chunked, chunk_size=None entrega cada fragmento según llega; sin
+            # chunked se lee byte a byte para no esperar a llenar un búfer
+            chunk_size = None if getattr(r.raw, "chunked", False) else 1
+            for raw in r.iter_lines(chunk_size=chunk_size):
+                if raw and on_line(raw.decode("utf-8", "replace")) is False:
+                    break
+            return r
+        finally:
+            r.close()
+
+    def cancel(self, owner: Any = None):
+        """Cierra la sesión para abortar peticiones en curso y crea una nueva"""
+        try:
+            self.session.close()
+        finally:
+            self.session = self._session_factory()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncLMTransport:
+    """
+    Transporte asyncio con un pool de conexiones aiohttp compartido
+
+    El event loop vive en un hilo propio; los llamadores síncronos usan post()
+    y los asíncronos (call_lmstudio_batch_async) esperan post_async() dentro
+    del loop. submit() permite encolar corrutinas desde cualquier hilo y
+    obtener un concurrent.futures.Future.
+    """
+
+    name = TRANSPORT_ASYNC
+    is_async = True
+
+    # Conexiones simultáneas máximas en el pool compartido
+    MAX_CONNECTIONS = 256
+
+    def __init__(self, max_connections: int = None):
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp no está instalado: pip install aiohttp")
+        self.max_connections = max_connections or self.MAX_CONNECTIONS
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._tasks: Dict[Any, set] = {}
+        self._cancelled: set = set()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="lm_async_transport", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def submit(self, coro):
+        """Programa una corrutina en el loop del transporte (thread-safe)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def post(self, url: str, body: Dict[str, Any], headers: Dict[str, str],
+             timeout: float, owner: Any = None) -> requests.Response:
+        """Versión bloqueante de post_async para llamadores síncronos"""
+        return self.submit(self.post_async(url, body, headers, timeout, owner)).result()
+
+    async def post_async(self, url: str, body: Dict[str, Any], headers: Dict[str, str],
+                         timeout: float, owner: Any = None) -> requests.Response:
+        """Envía la petición desde el loop y devuelve un requests.Response equivalente"""
+        return await self._run_tracked(self._do_post(url, body, headers, timeout), owner)
+
+    def post_stream(self, url: str, body: Dict[str, Any], headers: Dict[str, str], timeout: float,
+                    on_line: Callable[[str], Optional[bool]], owner: Any = None) -> requests.Response:
+        """Versión bloqueante de post_stream_async"""
+        return self.submit(self.post_stream_async(url, body, headers, timeout, on_line, owner)).result()
+
+    async def post_stream_async(self, url: str, body: Dict[str, Any], headers: Dict[str, str], timeout: float,
+                                on_line: Callable[[str], Optional[bool]], owner: Any = None) -> requests.Response:
+        """Petición en streaming desde el loop; cada línea SSE se entrega a on_line"""
+        return await self._run_tracked(self._do_stream(url, body, headers, timeout, on_line), owner)
+
+    async def _run_tracked(self, coro, owner: Any):
+        """Ejecuta la petición registrándola para poder cancelarla por propietario"""
+        task = asyncio.ensure_future(coro)
+        with self._lock:
+            self._tasks.setdefault(owner, set()).add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Cancelación propia (cancel()): se traduce al error de conexión que
+            # produciría cerrar la sesión en el transporte síncrono
+            if id(task) in self._cancelled:
+                raise requests.exceptions.ConnectionError("Petición cancelada") from None
+            raise
+        finally:
+            with self._lock:
+                self._tasks.get(owner, set()).discard(task)
+                self._cancelled.discard(id(task))
+
+    async def _do_post(self, url: str, body: Dict[str, Any], headers: Dict[str, str],
+                       timeout: float) -> requests.Response:
+        session = await self._get_session()
+        try:
+            async with session.post(url, json=body, headers=headers,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                content = await resp.read()
+                return self._to_response(url, resp.status, resp.reason, resp.headers, content)
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"Timeout tras {timeout}s: {url}") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    async def _do_stream(self, url: str, body: Dict[str, Any], headers: Dict[str, str], timeout: float,
+                         on_line: Callable[[str], Optional[bool]]) -> requests.Response:
+        session = await self._get_session()
+        try:
+            async with session.post(url, json=body, headers=headers,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                if resp.status >= 400:
+                    content = await resp.read()
+                    return self._to_response(url, resp.status, resp.reason, resp.headers, content)
+                async for raw in resp.content:
+                    line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                    if line and on_line(line) is False:
+                        break
+                return self._to_response(url, resp.status, resp.reason, resp.headers, b"")
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"Timeout tras {timeout}s: {url}") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    @staticmethod
+    def _to_response(url: str, status: int, reason: str, headers, content: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason or ""
+        response.url = url
+        response.headers = CaseInsensitiveDict(dict(headers))
+        response._content = content
+        response.encoding = "utf-8"
+        return response
+
+    def cancel(self, owner: Any = None):
+        """Cancela las peticiones en vuelo del propietario indicado (o todas)"""
+        def _cancel():
+            with self._lock:
+                if owner is None:
+                    tasks = [t for group in self._tasks.values() for t in group]
+                else:
+                    tasks = list(self._tasks.get(owner, ()))
+                for task in tasks:
+                    self._cancelled.add(id(task))
+                    task.cancel()
+            if tasks:
+                logger.info(f"🔌 Canceladas {len(tasks)} peticiones asíncronas en vuelo")
+        self._loop.call_soon_threadsafe(_cancel)
+
+    def close(self):
+        """Cierra la sesión aiohttp y detiene el loop"""
+        async def _close():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+        try:
+            self.submit(_close()).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"⚠️ Error cerrando transporte asíncrono: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+# Instancia global del transporte asíncrono (un único loop para todo el proceso)
+_async_transport = None
+_async_transport_lock = threading.Lock()
+
+
+def get_async_lm_transport() -> AsyncLMTransport:
+    """Obtiene la instancia global del transporte asíncrono"""
+    global _async_transport
+    with _async_transport_lock:
+        if _async_transport is None:
+            _async_transport = AsyncLMTransport()
+        return _async_transport
+
+
+def create_lm_transport(kind: str, session_factory: Callable[[], requests.Session] = None):
+    """
+    Crea el transporte solicitado ('requests' o 'async')
+
+    Si se pide el asíncrono y aiohttp no está instalado, se avisa y se usa el
+    transporte síncrono para no interrumpir la traducción.
+    """
+    kind = (kind or TRANSPORT_REQUESTS).strip().lower()
+    if kind == TRANSPORT_ASYNC:
+        if AIOHTTP_AVAILABLE:
+            return get_async_lm_transport()
+        logger.warning("⚠️ Transporte 'async' solicitado pero aiohttp no está instalado; usando 'requests'")
+    elif kind != TRANSPORT_REQUESTS:
+        logger.warning(f"⚠️ Transporte LM desconocido '{kind}'; usando 'requests'")
+    return RequestsTransport(session_factory)
@@ -23,7 +23,8 @@ class MissionCacheManager:
             project_root = Path(__file__).parent.parent.parent
             self.base_path = project_root / "app" / "data" / "traducciones"
             
-        self.global_cache_path = self.base_path.parent / "cache" / "global_translation_cache.json"
+        self.global_cache_dir = self.base_path.parent / "cache"
+        self._global_cache = None  # CentralizedCache, creado al primer uso
         self.cache_filename = "translation_cache.json"  # Usar archivos existentes
         self.cache_subpath = "out_lua"  # Subdirectorio donde están los caches
         
@@ -385,17 +386,24 @@ class MissionCacheManager:
             logger.error(f"Error leyendo cache {cache_path}: {e}")
             return None
     
+    @property
+    def global_cache(self):
+        """Cache centralizado (mismo backend que usa el motor de traducción)"""
+        if self._global_cache is None:
+            from app.services.centralized_cache import CentralizedCache
+            self._global_cache = CentralizedCache(str(self.global_cache_dir))
+        return self._global_cache
+
+    @property
+    def global_cache_path(self) -> Path:
+        return Path(self.global_cache.cache_file)
+
     def _load_global_cache(self) -> Dict:
         """Cargar cache global"""
         try:
-            if self.global_cache_path.exists():
-                with open(self.global_cache_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                logger.info(f"Cache global cargado: {len(data) if isinstance(data, dict) else 0} entradas")
-                return data
-            else:
-                logger.info("Cache global no existe, creando uno nuevo")
-                return {}
+            data = self.global_cache.load_cache(use_cache=True)
+            logger.info(f"Cache global cargado: {len(data)} entradas")
+            return data
         except Exception as e:
             logger.error(f"Error cargando cache global: {e}")
             return {}
@@ -403,13 +411,9 @@ class MissionCacheManager:
     def _save_global_cache(self, cache_data: Dict) -> bool:
         """Guardar cache global"""
         try:
-            self.global_cache_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.global_cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
-            
-            entries_count = len(cache_data) if isinstance(cache_data, dict) else 0
-            logger.info(f"✅ Cache global guardado: {entries_count} entradas")
+            # Solo cuentan las entradas nuevas o modificadas; el volcado es diferido
+            changed = self.global_cache.store.upsert(cache_data)
+            logger.info(f"✅ Cache global guardado: {changed} entradas nuevas/modificadas")
             return True
             
         except Exception as e:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diario de traducción por misión para reanudar tras una caída
+
+Cada lote terminado se añade como una línea JSON al <misión>.journal.jsonl de
+la carpeta de salida (append + fsync), con los ids de segmento, el texto
+origen y la traducción. Si LM Studio se cae, el usuario cancela o el proceso
+muere, la siguiente ejecución con la misma configuración recupera esas
+traducciones y solo envía al modelo lo que faltaba. Al terminar la misión las
+traducciones ya están en los caches y el diario se elimina.
+"""
+import json
+import logging
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.services.mission_manifest import hash_config
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+class MissionJournal:
+    """Diario append-only de lotes terminados de una misión"""
+
+    def __init__(self, path: str, fingerprint: Dict[str, str]):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.logger = logging.getLogger(__name__)
+        self._has_header = False
+
+    def load(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Lee las traducciones guardadas como {id: (en, es)}
+
+        Un diario de otra configuración o modelo, o sin cabecera legible, se
+        descarta. Las líneas corruptas (p. ej. la última, cortada por la caída)
+        y las que no son objetos JSON se ignoran.
+        """
+        entries: Dict[str, Tuple[str, str]] = {}
+        if not os.path.exists(self.path):
+            return entries
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            self.logger.warning(f"No se pudo leer el diario {self.path}: {e}")
+            return entries
+
+        for n, line in enumerate(lines):
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                obj = None
+            if n == 0:
+                if not isinstance(obj, dict) or obj.get("fingerprint") != self.fingerprint:
+                    self.logger.info("📓 Diario de otra configuración o modelo: se descarta")
+                    self.discard()
+                    return {}
+                self._has_header = True
+                continue
+            items = obj.get("items") if isinstance(obj, dict) else None
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if isinstance(item, dict) and isinstance(item.get("id"), str) and isinstance(item.get("es"), str):
+                    entries[item["id"]] = (item.get("en"), item["es"])
+        return entries
+
+    def append(self, items: Iterable[Tuple[str, str, str]]):
+        """Añade un lote terminado [(id, en, es), ...] y lo lleva a disco"""
+        items = [{"id": _id, "en": en, "es": es} for _id, en, es in items]
+        if not items:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if not self._has_header:
+                    f.write(json.dumps({"fingerprint": self.fingerprint}) + "\n")
+                    self._has_header = True
+                f.write(json.dumps({"items": items}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            self.logger.warning(f"No se pudo escribir el diario {self.path}: {e}")
+
+    def discard(self):
+        self._has_header = False
+        if os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                self.logger.warning(f"No se pudo eliminar el diario {self.path}: {e}")
+
+
+def journal_path(output_dir: str, base_name: str) -> str:
+    return os.path.join(output_dir, base_name + JOURNAL_SUFFIX)
+
+
+def build_fingerprint(cfg: Dict, lm_model: Optional[str], keys_filter) -> Dict[str, str]:
+    """Huella que debe coincidir para reutilizar un diario"""
+    return {"config_sha256": hash_config({"cfg": cfg, "keys_filter": keys_filter}), "model": lm_model or ""}
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifiesto por misión para saltar misiones sin cambios
+
+Tras traducir una misión se guarda en su carpeta un mission_manifest.json con
+el hash del diccionario original, el hash de la configuración de traducción
+(prompt, API del preset, modelo y opciones que afectan a la salida) y las
+rutas de salida. En la siguiente ejecución el diccionario se lee directamente
+del .miz (sin extraerlo) y, si todo coincide y el .translated.lua sigue
+existiendo, la misión se da por traducida sin pasar por el motor.
+"""
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from typing import Any, Dict, Optional
+
+from app.utils.file_utils import atomic_write_json
+
+MANIFEST_FILE = "mission_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_config(data: Any) -> str:
+    """Hash estable de una estructura JSON (orden de claves indiferente)"""
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def read_miz_member(miz_path: str, member: str) -> Optional[bytes]:
+    """Lee un fichero del .miz sin extraerlo; None si no existe o el ZIP no se puede leer"""
+    wanted = member.replace("\\", "/").strip("/")
+    try:
+        with zipfile.ZipFile(miz_path, "r") as zf:
+            for info in zf.infolist():
+                if info.filename.replace("\\", "/").strip("/") == wanted:
+                    return zf.read(info)
+    except (OSError, zipfile.BadZipFile) as e:
+        logging.getLogger(__name__).warning(f"No se pudo leer {member} de {miz_path}: {e}")
+    return None
+
+
+class MissionManifest:
+    """Lectura y escritura del manifiesto de una misión"""
+
+    def __init__(self, mission_dir: str):
+        self.path = os.path.join(mission_dir, MANIFEST_FILE)
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def fingerprint(dictionary: bytes, translation_cfg: Dict[str, Any], lm_model: str,
+                    options: Dict[str, Any]) -> Dict[str, str]:
+        """Huella de todo lo que determina la traducción de la misión"""
+        return {
+            "dictionary_sha256": hash_bytes(dictionary),
+            "config_sha256": hash_config({"cfg": translation_cfg, "options": options}),
+            "model": lm_model or "",
+        }
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION else None
+        except Exception as e:
+            self.logger.warning(f"Manifiesto de misión ilegible, se ignora: {e}")
+            return None
+
+    def find_unchanged(self, fingerprint: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve el resultado guardado si la misión no cambió desde la última
+        traducción y su .translated.lua sigue en disco; None en otro caso
+        """
+        manifest = self.load()
+        if not manifest or manifest.get("fingerprint") != fingerprint:
+            return None
+        translated = (manifest.get("output_files") or {}).get("translated_lua")
+        if not translated or not os.path.isfile(translated):
+            return None
+        return manifest
+
+    def same_config(self, fingerprint: Dict[str, str]) -> bool:
+        """True si la última traducción usó la misma configuración y modelo (aunque cambie el diccionario)"""
+        manifest = self.load()
+        if not manifest:
+            return False
+        stored = manifest.get("fingerprint") or {}
+        return all(stored.get(k) == fingerprint.get(k) for k in ("config_sha256", "model"))
+
+    def save(self, fingerprint: Dict[str, str], mission_result: Dict[str, Any]):
+        try:
+            atomic_write_json(self.path, {
+                "version": MANIFEST_VERSION,
+                "fingerprint": fingerprint,
+                "output_files": mission_result.get("output_files") or {},
+                "result": {k: v for k, v in mission_result.items() if k != "output_files"},
+            })
+        except Exception as e:
+            self.logger.warning(f"No se pudo guardar el manifiesto de misión: {e}")
+
+    def invalidate(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
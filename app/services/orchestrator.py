@@ -807,6 +807,8 @@ class DCSOrchestrator:
                             'missions': [],
                             'errors': campaign.get('errors', [])
                         }
+                        if campaign.get('campaign_dedup'):
+                            campaign_summary['campaign_dedup'] = campaign['campaign_dedup']
                         
                         # Procesar misiones de la campaña
                         campaign_missions = campaign.get('missions', [])
@@ -820,9 +822,11 @@ class DCSOrchestrator:
                             mission_summary = {
                                 'name': mission_name,
                                 'success': mission.get('success', False),
+                                'skipped': mission.get('skipped', False),
                                 'errors': mission.get('errors', []),
                                 'duration': mission.get('duration', 0),
                                 'cache_hits': mission.get('cache_hits', 0),
+                                'cache_hits_normalized': mission.get('cache_hits_normalized', 0),
                                 'api_calls': mission.get('api_calls', 0),
                                 'processing_time': mission.get('processing_time', 0)
                             }
@@ -841,12 +845,14 @@ class DCSOrchestrator:
             
             # Calcular estadísticas globales de caché
             total_cache_hits = 0
+            total_cache_hits_normalized = 0
             total_api_calls = 0
             total_processing_time = 0
             
             for campaign in campaigns_summary:
                 for mission in campaign['missions']:
                     total_cache_hits += mission.get('cache_hits', 0)
+                    total_cache_hits_normalized += mission.get('cache_hits_normalized', 0)
                     total_api_calls += mission.get('api_calls', 0)
                     total_processing_time += mission.get('processing_time', 0)
             
@@ -858,11 +864,14 @@ class DCSOrchestrator:
                 'campaigns': campaigns_summary,
                 'total_missions': total_missions,
                 'successful_missions': successful_missions,
+                'skipped_missions': sum(1 for c in campaigns_summary for m in c['missions'] if m['skipped']),
                 'failed_missions': failed_missions,
                 'total_errors': total_errors,
                 'success': successful_missions > 0 and failed_missions == 0,
                 'cache_stats': {
                     'total_cache_hits': total_cache_hits,
+                    'total_cache_hits_exact': total_cache_hits - total_cache_hits_normalized,
+                    'total_cache_hits_normalized': total_cache_hits_normalized,
                     'total_api_calls': total_api_calls,
                     'total_processing_time': total_processing_time,
                     'cache_hit_rate': (total_cache_hits / (total_cache_hits + total_api_calls) * 100) if (total_cache_hits + total_api_calls) > 0 else 0
@@ -1192,6 +1201,21 @@ class DCSOrchestrator:
             'prompt_file': self._extract_prompt_file(payload.get('ARGS', '')),
             'batch_size': payload.get('batch_size', 4),
             'timeout': payload.get('timeout', 200),
+            'max_in_flight': payload.get('max_in_flight'),
+            'batch_mode': payload.get('batch_mode'),
+            'batch_order': payload.get('batch_order'),
+            'context_window': payload.get('context_window'),
+            'adaptive_batch': payload.get('adaptive_batch'),
+            'template_cache': payload.get('template_cache'),
+            'skip_unchanged': payload.get('skip_unchanged'),
+            'incremental': payload.get('incremental'),
+            'campaign_dedup': payload.get('campaign_dedup'),
+            'early_output': payload.get('early_output'),
+            'structured_output': payload.get('structured_output'),
+            'compact_ids': payload.get('compact_ids'),
+            'prompt_glossary': payload.get('prompt_glossary'),
+            'lm_endpoints': payload.get('lm_endpoints'),
+            'lm_transport': payload.get('lm_transport'),
             'file_target': self._get_file_target_from_config(payload.get('FILE_TARGET')),
             'keys_filter': payload.get('keys_filter'),
             'include_fc': payload.get('include_fc', False),
@@ -1360,6 +1384,8 @@ class DCSOrchestrator:
                 successful_missions += translate_res.get('successful_missions', 0)
                 failed_missions += translate_res.get('failed_missions', 0)
                 all_missions.extend(translate_res.get('mission_results', []))
+                if translate_res.get('campaign_dedup'):
+                    result['campaign_dedup'] = translate_res['campaign_dedup']
             
             # Resultados de empaquetado MIZ
             if workflow_result.get('miz_results'):
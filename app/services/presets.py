@@ -296,6 +296,14 @@ class PresetService:
         if 'timeout' in yaml_data:
             config['arg_timeout'] = yaml_data['timeout']
         
+        # --max-in-flight (lotes simultáneos)
+        if 'max_concurrent_requests' in yaml_data:
+            config['arg_max_in_flight'] = yaml_data['max_concurrent_requests']
+        
+        # --context-window (presupuesto de tokens por lote)
+        if 'context_window' in yaml_data:
+            config['arg_context_window'] = yaml_data['context_window']
+        
         # Valores por defecto para campos requeridos
         from app.services.user_config import UserConfigService
         config.setdefault('lm_url', UserConfigService.get_lm_studio_url())
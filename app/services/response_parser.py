@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades para interpretar las respuestas de LM Studio
+
+- SSEChunkDecoder: decodifica las líneas SSE (stream=true) de /chat/completions
+  y /completions y devuelve el fragmento de texto generado
+- StreamingItemExtractor: extrae los objetos {"id", "es"} ya completos de un
+  array JSON que llega por trozos, para conservarlos aunque la respuesta se
+  corte por timeout o cancelación
+- parse_batch_response: interpreta en una sola pasada la respuesta completa de
+  un lote, tolerando preámbulos, bloques ```json, tokens de fin y basura final
+- build_response_schema / parse_structured_response: salida restringida por
+  esquema JSON (response_format) y su lectura estricta, sin heurísticas
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SSE_DONE = "[DONE]"
+
+# Clave de LM_API que activa la salida restringida por esquema JSON
+STRUCTURED_OUTPUT_KEY = "structured_output"
+STRUCTURED_SCHEMA_NAME = "dcs_translation_batch"
+
+# Caracteres que cambian el estado del parser; el resto se salta sin mirarlo
+STRUCTURAL_REGEX = re.compile(r'[{}"\\]')
+# Inicio de un objeto de traducción: no puede aparecer dentro de una cadena JSON válida
+ITEM_START_REGEX = re.compile(r'\{\s*"id"\s*:')
+
+
+class SSEChunkDecoder:
+    """Decodifica las líneas 'data: {...}' del streaming compatible con OpenAI"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.done = False
+
+    def decode(self, line: str) -> Optional[str]:
+        """Devuelve el texto del fragmento o None si la línea no aporta contenido"""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return None
+        payload = line[5:].strip()
+        if payload == SSE_DONE:
+            self.done = True
+            return None
+        try:
+            choice = json.loads(payload)["choices"][0]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+        if self.endpoint == "chat":
+            return (choice.get("delta") or {}).get("content") or None
+        return choice.get("text") or None
+
+
+class StreamingItemExtractor:
+    """
+    Extractor incremental de objetos {"id": .., "es": ..} de un array JSON parcial
+
+    Recorre los caracteres una sola vez siguiendo profundidad de llaves y
+    cadenas (con escapes); cada objeto que se cierra y contiene "id" se
+    intenta decodificar. Los objetos anidados ({"data": [...]}) también se
+    detectan porque se evalúa cada cierre, no solo el de nivel superior.
+    """
+
+    def __init__(self):
+        self.items: Dict[str, str] = {}
+        # Motivo por el que se dejó de leer el stream ('timeout' / 'cancelled')
+        self.interrupted: Optional[str] = None
+        self._buf: List[str] = []
+        self._starts: List[int] = []
+        self._in_str = False
+        self._esc = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Procesa un fragmento y devuelve los pares (id, es) completados en él"""
+        completed: List[Tuple[str, str]] = []
+        for ch in chunk:
+            if not self._starts:
+                if ch == "{":
+                    self._buf = ["{"]
+                    self._starts = [0]
+                    self._in_str = False
+                    self._esc = False
+                continue
+
+            self._buf.append(ch)
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                continue
+
+            if ch == '"':
+                self._in_str = True
+            elif ch == "{":
+                self._starts.append(len(self._buf) - 1)
+            elif ch == "}":
+                start = self._starts.pop()
+                item = self._decode_item("".join(self._buf[start:]))
+                if item and item[0] not in self.items:
+                    self.items[item[0]] = item[1]
+                    completed.append(item)
+                if not self._starts:
+                    self._buf = []
+        return completed
+
+    @staticmethod
+    def _decode_item(text: str) -> Optional[Tuple[str, str]]:
+        if '"id"' not in text:
+            return None
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            return None
+        return _item_from_object(obj)
+
+
+def _item_id(value) -> Optional[str]:
+    """Id como cadena: los enteros (ids ordinales devueltos como número) se convierten"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
+def _item_from_object(obj) -> Optional[Tuple[str, str]]:
+    """(id, traducción) de un objeto {"id", "es"} (o "text"), o None si no lo es"""
+    if not isinstance(obj, dict):
+        return None
+    _id = _item_id(obj.get("id"))
+    value = obj.get("es")
+    if not isinstance(value, str):
+        value = obj.get("text")
+    if _id and isinstance(value, str) and value.strip():
+        return _id, value.strip()
+    return None
+
+
+class BatchResponse:
+    """Resultado de parse_batch_response"""
+
+    def __init__(self):
+        self.items: Dict[str, str] = {}
+        # Objetos JSON cerrados encontrados (sin contar envoltorios como {"data": [...]})
+        self.objects = 0
+        # Objetos rotos: no decodificables, sin cerrar o interrumpidos por otro item
+        self.errors = 0
+        # Primer {"text": ...} sin id (respuestas de un solo item)
+        self.loose_text: Optional[str] = None
+
+    @property
+    def well_formed(self) -> bool:
+        """La respuesta traía JSON y todos sus objetos se pudieron leer"""
+        return self.objects > 0 and self.errors == 0
+
+
+def parse_batch_response(content: str) -> BatchResponse:
+    """
+    Extrae los pares {"id", "es"} de la respuesta de un lote en una sola pasada
+
+    Solo se miran los caracteres estructurales ({, }, comillas y barras); todo
+    lo que queda fuera de un objeto (preámbulo, ```json, corchetes del array,
+    </s>, <|eot_id|>, explicaciones finales) se ignora. Cada objeto que se
+    cierra se decodifica por separado, así un array mal formado, truncado o con
+    un item roto no arrastra a los demás, y un "]" dentro de una traducción no
+    corta nada. Si una comilla sin escapar deja el parser dentro de una cadena,
+    el siguiente '{"id":' lo resincroniza (en JSON válido no puede aparecer
+    dentro de una cadena). Los objetos que contienen otros (p. ej.
+    {"data": [...]}) no se decodifican: sus items ya se leyeron al cerrarse.
+    """
+    result = BatchResponse()
+    starts: List[int] = []
+    has_children: List[bool] = []
+    in_str = False
+    skip_until = -1
+    for m in STRUCTURAL_REGEX.finditer(content):
+        pos = m.start()
+        if pos < skip_until:
+            continue  # Carácter escapado
+        ch = content[pos]
+        if in_str:
+            if ch == "\\":
+                skip_until = pos + 2
+            elif ch == '"':
+                in_str = False
+            elif ch == "{" and ITEM_START_REGEX.match(content, pos):
+                # Cadena sin cerrar: el objeto en curso está roto, empieza otro item
+                result.errors += 1
+                in_str = False
+                starts, has_children = [pos], [False]
+            continue
+
+        if ch == "{":
+            if has_children:
+                has_children[-1] = True
+            starts.append(pos)
+            has_children.append(False)
+        elif not starts:
+            continue  # Texto fuera de cualquier objeto
+        elif ch == '"':
+            in_str = True
+        elif ch == "}":
+            start = starts.pop()
+            if has_children.pop():
+                continue
+            result.objects += 1
+            try:
+                obj = json.loads(content[start:pos + 1])
+            except ValueError:
+                result.errors += 1
+                continue
+            item = _item_from_object(obj)
+            if item is not None:
+                result.items.setdefault(item[0], item[1])
+            elif isinstance(obj, dict) and "id" in obj and _item_id(obj["id"]) is None:
+                # Id que no es cadena ni entero (null, lista, decimal...): el item se pierde
+                result.errors += 1
+            elif isinstance(obj, dict) and result.loose_text is None:
+                text = obj.get("text")
+                if isinstance(text, str) and text.strip():
+                    result.loose_text = text.strip()
+    # Objetos abiertos al final: respuesta truncada
+    result.errors += len(starts)
+    return result
+
+
+def build_response_schema(ids: Iterable[str]) -> Dict[str, Any]:
+    """
+    response_format (json_schema) para un lote: {"data": [{"id", "es"}, ...]}
+
+    Los ids se limitan a los del lote (enum) y el array debe traer uno por
+    frase. La raíz es un objeto porque es lo que exige el modo estricto de la
+    API de OpenAI que imita LM Studio.
+    """
+    ids = list(ids)
+    item = {
+        "type": "object",
+        "properties": {"id": {"type": "string", "enum": ids}, "es": {"type": "string"}},
+        "required": ["id", "es"],
+        "additionalProperties": False,
+    }
+    schema = {
+        "type": "object",
+        "properties": {"data": {"type": "array", "items": item, "minItems": len(ids), "maxItems": len(ids)}},
+        "required": ["data"],
+        "additionalProperties": False,
+    }
+    return {"type": "json_schema", "json_schema": {"name": STRUCTURED_SCHEMA_NAME, "strict": True, "schema": schema}}
+
+
+def parse_structured_response(content: str, ids: Iterable[str]) -> Optional[Dict[str, str]]:
+    """
+    Lee una respuesta que debería cumplir build_response_schema
+
+    Returns:
+        {id: es} (sin las traducciones vacías) o None si la respuesta no cumple
+        el esquema: el servidor lo ignoró y hay que usar el parser tolerante
+    """
+    try:
+        obj = json.loads(content)
+    except ValueError:
+        return None
+    data = obj.get("data") if isinstance(obj, dict) else None
+    if not isinstance(data, list):
+        return None
+    ids = set(ids)
+    out: Dict[str, str] = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            return None
+        _id, es = _item_id(entry.get("id")), entry.get("es")
+        if _id not in ids or not isinstance(es, str):
+            return None
+        if es.strip():
+            out.setdefault(_id, es.strip())
+    return out
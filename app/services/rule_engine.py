@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reglas de texto compiladas para el motor de traducción
+
+El glosario OTAN y los términos protegidos se convierten en un único patrón
+(trie de alternativas) que recorre el texto una sola vez, en lugar de un
+re.sub por término. PHRASEOLOGY_RULES y POST_RULES se compilan una vez con
+sus flags. Los conjuntos compilados se cachean por contenido de la
+configuración de prompts, así que cada prompt cargado se compila una sola vez.
+
+El glosario y los términos protegidos también forman un índice (PromptGlossary)
+para inyectar en el prompt de cada lote solo los términos que aparecen en él.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Claves de la configuración de prompts que afectan a las reglas compiladas
+RULE_CONFIG_KEYS = (
+    "GLOSSARY_OTAN", "PHRASEOLOGY_RULES", "POST_RULES", "A_A_TERMS", "A_G_TERMS",
+    "PROTECT_WORDS", "NO_TRANSLATE_TERMS", "TECHNICAL_TERMS_NO_TRASLATE", "TECHNICAL_GLOSSARY",
+)
+
+# Glosario en el prompt (--prompt-glossary): nada, completo o solo los términos del lote
+PROMPT_GLOSSARY_OFF = "off"
+PROMPT_GLOSSARY_FULL = "full"
+PROMPT_GLOSSARY_BATCH = "batch"
+PROMPT_GLOSSARY_MODES = (PROMPT_GLOSSARY_OFF, PROMPT_GLOSSARY_FULL, PROMPT_GLOSSARY_BATCH)
+# Clave de LM_API con el modo de glosario de las peticiones
+PROMPT_GLOSSARY_KEY = "prompt_glossary"
+
+SPLASH_REGEX = re.compile(r'\bsplash\s*(?:one|two|three|four|five|six|seven|eight|nine|ten|[0-9]+)?\b', re.IGNORECASE)
+
+# Conjuntos compilados que se conservan en memoria (uno por prompt distinto)
+MAX_CACHED_RULESETS = 16
+
+
+def build_rule_flags(rule: Dict) -> int:
+    """Construye flags regex desde configuración"""
+    flags = 0
+    for f in (rule.get("flags") or []):
+        f = str(f).upper().strip()
+        if f in ("I", "IGNORECASE"): flags |= re.IGNORECASE
+        elif f in ("M", "MULTILINE"): flags |= re.MULTILINE
+        elif f in ("S", "DOTALL"): flags |= re.DOTALL
+    return flags
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Construye una alternativa regex con forma de trie a partir de los términos
+
+    Los prefijos comunes se factorizan para que el motor de regex no pruebe
+    cada término por separado; en cada nodo se prefieren las continuaciones
+    más largas, de modo que gana la coincidencia más larga (como al aplicar
+    los términos ordenados por longitud).
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        if not term:
+            continue
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def render(node: Dict[str, Any]) -> str:
+        ends_here = "" in node
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+def _compile_rules(rules: Optional[List[Dict]], section: str) -> List[Tuple[Pattern, str]]:
+    compiled = []
+    for rule in rules or []:
+        try:
+            pat = rule.get("pattern")
+            rep = rule.get("replacement", "")
+            if not pat or not isinstance(rep, str):
+                continue
+            compiled.append((re.compile(pat, build_rule_flags(rule)), rep))
+        except Exception as e:
+            logger.warning("%s error en patrón %r: %s", section, rule.get("pattern"), e)
+    return compiled
+
+
+class TermMatcher:
+    """Sustituye un conjunto de términos en una sola pasada (sin distinguir mayúsculas)"""
+
+    def __init__(self, replacements: Dict[str, str], prefix: str, suffix: str):
+        # El primer término de cada grafía en minúsculas manda, como al aplicarlos en orden
+        self.replacements: Dict[str, str] = {}
+        for term, value in replacements.items():
+            self.replacements.setdefault(term.lower(), value)
+        self.regex: Optional[Pattern] = None
+        if self.replacements:
+            self.regex = re.compile(prefix + "(?:" + trie_pattern(self.replacements) + ")" + suffix,
+                                    re.IGNORECASE)
+
+    def _replace(self, m: re.Match) -> str:
+        return self.replacements.get(m.group(0).lower(), m.group(0))
+
+    def sub(self, text: str) -> str:
+        if self.regex is None or not text:
+            return text
+        return self.regex.sub(self._replace, text)
+
+
+def _string_map(value: Any) -> Dict[str, str]:
+    if not isinstance(value, dict):
+        return {}
+    return {k: v for k, v in value.items() if isinstance(k, str) and k and isinstance(v, str)}
+
+
+def normalize_prompt_glossary(mode: Optional[str]) -> str:
+    mode = (mode or PROMPT_GLOSSARY_OFF).strip().lower()
+    if mode not in PROMPT_GLOSSARY_MODES:
+        logger.warning("Modo de glosario en el prompt desconocido '%s': se usa '%s'", mode, PROMPT_GLOSSARY_OFF)
+        return PROMPT_GLOSSARY_OFF
+    return mode
+
+
+class PromptGlossary:
+    """
+    Índice de términos del glosario para el prompt de cada lote
+
+    Cada entrada es un término protegido (se deja tal cual) o una traducción fija
+    (TECHNICAL_GLOSSARY y GLOSSARY_OTAN). El glosario OTAN ya se aplica al texto
+    antes de enviarlo, así que una traducción se reconoce por el término en
+    inglés o por el español. Un único patrón (trie) recorre las frases del lote;
+    las entradas encontradas salen en el orden del índice, de modo que el mismo
+    conjunto de términos produce siempre el mismo bloque.
+    """
+
+    HEADER = "GLOSARIO (respetar en la traducción):"
+
+    def __init__(self, glossary: Dict[str, str], protected: Iterable[str]):
+        self.lines: List[str] = []
+        self._lookup: Dict[str, int] = {}
+        for term in sorted(protected):
+            self._add((term,), f"- {term}: no traducir")
+        for en, es in glossary.items():
+            self._add((en, es), f"- {en} = {es}")
+        self.regex: Optional[Pattern] = None
+        if self._lookup:
+            self.regex = re.compile(r'(?<![A-Za-z0-9])(?:' + trie_pattern(self._lookup) + r')(?![A-Za-z0-9])',
+                                    re.IGNORECASE)
+        self.full_block = self.block(range(len(self.lines)))
+
+    def _add(self, forms: Tuple[str, ...], line: str):
+        forms = tuple(form.lower() for form in forms if form.lower() not in self._lookup)
+        if not forms:
+            return
+        for form in forms:
+            self._lookup[form] = len(self.lines)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def terms_in(self, texts: Iterable[str]) -> List[int]:
+        """Índices de las entradas que aparecen en las frases"""
+        if self.regex is None:
+            return []
+        found = set()
+        for text in texts:
+            for m in self.regex.finditer(text or ""):
+                found.add(self._lookup[m.group(0).lower()])
+        return sorted(found)
+
+    def block(self, indices: Iterable[int]) -> str:
+        """Bloque de glosario para el mensaje de usuario ('' si no hay términos)"""
+        lines = [self.lines[i] for i in indices]
+        if not lines:
+            return ""
+        return self.HEADER + "\n" + "\n".join(lines) + "\n\n"
+
+
+def term_protector(terms: Iterable[str]) -> TermMatcher:
+    """Matcher que restaura la grafía original de los términos protegidos"""
+    unique = sorted({t for t in terms if isinstance(t, str) and t}, key=len, reverse=True)
+    return TermMatcher({t: t for t in unique}, r'(?<![A-Za-z0-9])', r'(?![A-Za-z0-9])')
+
+
+class CompiledRuleSet:
+    """Reglas de una configuración de prompts, compiladas una sola vez"""
+
+    def __init__(self, cfg: Dict):
+        glossary = _string_map(cfg.get("GLOSSARY_OTAN"))
+        self.glossary = TermMatcher(glossary, r'\b', r'\b')
+        self.phraseology = _compile_rules(cfg.get("PHRASEOLOGY_RULES"), "PHRASEOLOGY_RULES")
+        self.post_rules = _compile_rules(cfg.get("POST_RULES"), "POST_RULES")
+        self.a_a_terms = {str(term).lower() for term in cfg.get("A_A_TERMS") or []}
+        self.a_g_terms = {str(term).lower() for term in cfg.get("A_G_TERMS") or []}
+        self.protected_terms = set(
+            (cfg.get("PROTECT_WORDS") or [])
+            + (cfg.get("NO_TRANSLATE_TERMS") or [])
+            + (cfg.get("TECHNICAL_TERMS_NO_TRASLATE") or [])
+        )
+        self.protector = term_protector(self.protected_terms)
+        self.prompt_glossary = PromptGlossary(
+            {**_string_map(cfg.get("TECHNICAL_GLOSSARY")), **glossary},
+            {t for t in self.protected_terms if isinstance(t, str) and t})
+
+    def apply_glossary(self, text: str) -> str:
+        return self.glossary.sub(text)
+
+    def apply_phraseology(self, text: str) -> str:
+        for regex, rep in self.phraseology:
+            try:
+                text = regex.sub(rep, text)
+            except Exception:
+                pass
+        return text
+
+    def apply_post(self, text: str) -> str:
+        for regex, rep in self.post_rules:
+            try:
+                text = regex.sub(rep, text)
+            except Exception as e:
+                logger.warning("POST_RULES error en patrón %r: %s", regex.pattern, e)
+        return text
+
+    def apply_splash(self, text: str) -> str:
+        if not SPLASH_REGEX.search(text):
+            return text
+        processed_text = text.lower()
+        if any(term in processed_text for term in self.a_a_terms):
+            word = "derribado"
+        elif any(term in processed_text for term in self.a_g_terms):
+            word = "impacto"
+        else:
+            return text
+
+        def splash_repl(m: re.Match) -> str:
+            num_part = m.group(0).lower().replace('splash', '').strip()
+            return f"{word} {num_part}" if num_part else word
+        return SPLASH_REGEX.sub(splash_repl, text)
+
+    def protect(self, text: str) -> str:
+        return self.protector.sub(text)
+
+
+def config_fingerprint(cfg: Dict) -> str:
+    """Huella del contenido de las reglas (cambia si se edita el prompt)"""
+    sections = {key: cfg.get(key) for key in RULE_CONFIG_KEYS}
+    raw = json.dumps(sections, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _LRUCache:
+    """Caché LRU mínima y thread-safe de objetos compilados"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Any, builder: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = builder()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return value
+
+
+_ruleset_cache = _LRUCache(MAX_CACHED_RULESETS)
+_protector_cache = _LRUCache(MAX_CACHED_RULESETS)
+
+
+def get_compiled_rules(cfg: Dict) -> CompiledRuleSet:
+    """Devuelve las reglas compiladas de la configuración (compilándolas la primera vez)"""
+    return _ruleset_cache.get_or_build(config_fingerprint(cfg or {}), lambda: CompiledRuleSet(cfg or {}))
+
+
+def get_term_protector(terms: Iterable[str]) -> TermMatcher:
+    """Devuelve el matcher compilado para una lista arbitraria de términos protegidos"""
+    key = frozenset(t for t in terms or () if isinstance(t, str) and t)
+    return _protector_cache.get_or_build(key, lambda: term_protector(key))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache por plantillas: reutiliza una traducción para frases que solo cambian
+en números, frecuencias, indicativos o coordenadas
+
+"Contact Tower on 251.000" y "Contact Tower on 124.500" comparten la plantilla
+"Contact Tower on ⟦FREQ1⟧". Cuando se conoce la traducción de una variante, la
+plantilla traducida se obtiene localizando los valores de los huecos en la
+traducción, y el resto de variantes se rellenan sin llamar al modelo. Si algún
+valor no aparece exactamente una vez en la traducción (p. ej. el modelo
+escribió el número con letras) no se genera plantilla y la frase va al modelo.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SLOT_OPEN = "⟦"
+SLOT_CLOSE = "⟧"
+
+SLOT_CALLSIGN = "CALLSIGN"
+SLOT_FREQ = "FREQ"
+SLOT_GRID = "GRID"
+SLOT_NUM = "NUM"
+
+# Orden de prioridad: los tipos más específicos primero
+SLOT_REGEX = re.compile(
+    r'(?P<CALLSIGN>\b[A-Z][a-z]+ \d{1,2}-\d{1,2}\b)'
+    r'|(?P<FREQ>(?<![\d.])\d{2,3}\.\d{1,3}(?!\d|\.\d))'
+    r'|(?P<GRID>\b[A-Z]{2} ?\d{2,5} ?\d{2,5}\b)'
+    r'|(?P<NUM>(?<![\w.])\d+(?:\.\d+)?(?!\w|\.\d))'
+)
+
+Slots = List[Tuple[str, str]]
+
+
+def extract_template(text: str) -> Tuple[str, Slots]:
+    """Devuelve (plantilla, [(tipo, valor), ...]) con huecos tipados ⟦TIPOn⟧"""
+    slots: Slots = []
+    counters: Dict[str, int] = {}
+
+    def repl(m: re.Match) -> str:
+        kind = m.lastgroup
+        counters[kind] = counters.get(kind, 0) + 1
+        slots.append((kind, m.group(0)))
+        return f"{SLOT_OPEN}{kind}{counters[kind]}{SLOT_CLOSE}"
+
+    if SLOT_OPEN in text:
+        return text, []  # No mezclar con marcadores literales
+    return SLOT_REGEX.sub(repl, text), slots
+
+
+def _slot_tokens(slots: Slots) -> List[str]:
+    counters: Dict[str, int] = {}
+    tokens = []
+    for kind, _ in slots:
+        counters[kind] = counters.get(kind, 0) + 1
+        tokens.append(f"{SLOT_OPEN}{kind}{counters[kind]}{SLOT_CLOSE}")
+    return tokens
+
+
+def translate_template(source: str, translation: str) -> Optional[Tuple[str, str]]:
+    """
+    Deriva (plantilla_origen, plantilla_traducida) de un par conocido
+
+    Returns:
+        None si la frase no tiene huecos o algún valor no se puede localizar
+        sin ambigüedad en la traducción
+    """
+    template, slots = extract_template(source)
+    if not slots or SLOT_OPEN in translation:
+        return None
+    values = [value for _, value in slots]
+    if len(set(values)) != len(values):
+        return None
+    translated = translation
+    for token, value in zip(_slot_tokens(slots), values):
+        pattern = re.compile(r'(?<![\w.])' + re.escape(value) + r'(?!\w|\.\d)')
+        found = pattern.findall(translated)
+        if len(found) != 1:
+            return None
+        translated = pattern.sub(lambda _m: token, translated, count=1)
+    return template, translated
+
+
+def fill_template(translated_template: str, slots: Slots) -> str:
+    """Rellena la plantilla traducida con los valores de otra variante"""
+    result = translated_template
+    for token, (_, value) in zip(_slot_tokens(slots), slots):
+        result = result.replace(token, value)
+    return result
+
+
+def translate_from_example(example_source: str, example_translation: str, source: str) -> Optional[str]:
+    """Traduce source a partir de otra variante de la misma plantilla ya traducida"""
+    derived = translate_template(example_source, example_translation)
+    if derived is None:
+        return None
+    template, slots = extract_template(source)
+    if template != derived[0]:
+        return None
+    return fill_template(derived[1], slots)
+
+
+def group_by_template(texts: Iterable[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Agrupa las frases por plantilla: solo la primera variante de cada una (el
+    representante) necesita el modelo
+
+    Returns:
+        Tupla (frases_a_enviar, {representante: [variantes]}) en el orden de entrada
+    """
+    to_send: List[str] = []
+    groups: Dict[str, List[str]] = {}
+    representatives: Dict[str, str] = {}
+    for text in texts:
+        template, slots = extract_template(text)
+        if slots:
+            representative = representatives.setdefault(template, text)
+            if representative != text:
+                groups.setdefault(representative, []).append(text)
+                continue
+        to_send.append(text)
+    return to_send, groups
@@ -13,13 +13,16 @@ import time
 import unicodedata
 import shutil
 import zipfile
+from collections import deque
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
 from typing import Callable
 
 # Importar el nuevo detector FC optimizado
 from app.utils.fc_detector import get_fc_detector, DetectionResult
 import glob
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, Generator, List, Tuple, Optional, Any
 import requests
 
 try:
@@ -31,11 +34,39 @@ except Exception:
 from config.settings import TRANSLATIONS_DIR, PROMPTS_DIR, LOGS_DIR
 from app.services.centralized_cache import CentralizedCache
 from app.services.lm_studio import LMStudioService
-from app.utils.file_utils import ensure_directory
+from app.services.lm_transport import create_lm_transport, TRANSPORT_REQUESTS
+from app.services.response_parser import (SSEChunkDecoder, StreamingItemExtractor, STRUCTURED_OUTPUT_KEY,
+                                          build_response_schema, parse_batch_response, parse_structured_response)
+from app.services.batch_planner import (plan_batches, BatchStream, BisectionRetry, AdaptiveBatchController,
+                                        DEFAULT_BATCH_MODE, BATCH_ORDER_DICTIONARY, COMPACT_IDS_KEY,
+                                        FIT_MAX_TOKENS_KEY, estimate_tokens, fit_max_tokens, normalize_batch_order,
+                                        order_batch_items, to_wire_ids, wire_id_savings)
+from app.services.rule_engine import (build_rule_flags, get_compiled_rules, get_term_protector,
+                                      normalize_prompt_glossary, PROMPT_GLOSSARY_BATCH, PROMPT_GLOSSARY_KEY,
+                                      PROMPT_GLOSSARY_OFF)
+from app.services.template_cache import group_by_template, translate_from_example
+from app.services.mission_manifest import MissionManifest, read_miz_member
+from app.services.incremental_translation import IncrementalPlan, load_previous_translations
+from app.services.mission_journal import MissionJournal, build_fingerprint, journal_path
+from app.services.lm_endpoint_pool import LMEndpointPool, get_endpoint_pool, parse_endpoints
+from app.services.campaign_dedup import CampaignDedupPlan
+from app.services.key_priority import KeyPriorities
+from app.utils.file_utils import ensure_directory, atomic_write_json
 from app.utils.validators import validate_translation_config
 
 # === FUNCIONES HELPER PARA EL MOTOR DE TRADUCCIÓN ===
 
+# Marcador que sustituye a cada segmento en el .lua temporal (ver Segment.id)
+PLACEHOLDER_REGEX = re.compile(r'id_[0-9a-f]{16}')
+
+# Pasos de una llamada al modelo: cede (endpoint, request, timeout, extractor),
+# recibe el texto generado y devuelve el dict id -> traducción
+LMSteps = Generator[Tuple[str, Dict[str, Any], int, Any], str, Dict[str, str]]
+
+def reinsert_placeholders(value: str, id_to_text: Dict[str, str]) -> str:
+    """Sustituye cada marcador id_<hash> por su texto en una sola pasada (los desconocidos se conservan)"""
+    return PLACEHOLDER_REGEX.sub(lambda pm: id_to_text.get(pm.group(0), pm.group(0)), value)
+
 def key_is_target(key: str, keys_filter: Optional[List[str]], cfg: Dict) -> bool:
     """Determina si una clave debe ser traducida según filtros y configuración"""
     if keys_filter:
@@ -56,82 +87,27 @@ def unprotect_tokens(text: str, mapping: Dict[str, str]) -> str:
         text = text.replace(tok, val)
     return text
 
-def build_rule_flags(rule: Dict) -> int:
-    """Construye flags regex desde configuración"""
-    flags = 0
-    for f in (rule.get("flags") or []):
-        f = str(f).upper().strip()
-        if f in ("I", "IGNORECASE"): flags |= re.IGNORECASE
-        elif f in ("M", "MULTILINE"): flags |= re.MULTILINE
-        elif f in ("S", "DOTALL"): flags |= re.DOTALL
-    return flags
-
 def apply_phraseology_rules(text: str, cfg: Dict) -> str:
     """Aplica reglas de fraseología desde configuración"""
-    for rule in cfg.get("PHRASEOLOGY_RULES", []) or []:
-        try:
-            pat = rule.get("pattern"); rep = rule.get("replacement", "")
-            if not pat: continue
-            flags = build_rule_flags(rule)
-            text = re.sub(pat, rep, text, flags=flags)
-        except Exception:
-            pass
-    return text
+    return get_compiled_rules(cfg).apply_phraseology(text)
 
 def apply_post_rules(text: str, cfg: Dict) -> str:
     """Aplica reglas de post-procesamiento"""
-    for rule in cfg.get("POST_RULES", []) or []:
-        try:
-            pat = rule.get("pattern")
-            rep = rule.get("replacement", "")
-            if not pat or not isinstance(rep, str):
-                continue
-            flags = build_rule_flags(rule)
-            text = re.sub(pat, rep, text, flags=flags)
-        except Exception as e:
-            logging.warning("POST_RULES error en patrón %r: %s", rule.get("pattern"), e)
-    return text
+    return get_compiled_rules(cfg).apply_post(text)
 
 def apply_glossary_rules(text: str, cfg: Dict) -> str:
-    """Aplica glosario OTAN desde configuración"""
-    glossary = cfg.get("GLOSSARY_OTAN", {})
-    if not glossary:
-        return text
-    for en_term, es_translation in glossary.items():
-        pattern = r"\b" + re.escape(en_term) + r"\b"
-        text = re.sub(pattern, es_translation, text, flags=re.IGNORECASE)
-    return text
+    """Aplica glosario OTAN desde configuración (un único patrón para todos los términos)"""
+    return get_compiled_rules(cfg).apply_glossary(text)
 
 def apply_smart_splash_rules(text: str, cfg: Dict) -> str:
     """Aplica reglas inteligentes para términos 'splash'"""
-    a_a_terms = set(term.lower() for term in cfg.get("A_A_TERMS", []))
-    a_g_terms = set(term.lower() for term in cfg.get("A_G_TERMS", []))
-    splash_pattern = re.compile(r'\bsplash\s*(?:one|two|three|four|five|six|seven|eight|nine|ten|[0-9]+)?\b', re.IGNORECASE)
-    if not splash_pattern.search(text):
-        return text
-    processed_text = text.lower()
-    found_a_a = any(term in processed_text for term in a_a_terms)
-    found_a_g = any(term in processed_text for term in a_g_terms)
-    if found_a_a:
-        def derribado_repl(m):
-            num_part = m.group(0).lower().replace('splash', '').strip()
-            return f"derribado {num_part}" if num_part else "derribado"
-        return splash_pattern.sub(derribado_repl, text)
-    elif found_a_g:
-        def impacto_repl(m):
-            num_part = m.group(0).lower().replace('splash', '').strip()
-            return f"impacto {num_part}" if num_part else "impacto"
-        return splash_pattern.sub(impacto_repl, text)
-    return text
+    return get_compiled_rules(cfg).apply_splash(text)
 
 def protect_terms(text: str, terms) -> str:
     """Protege términos específicos evitando coincidencias dentro de palabras"""
     if not terms:
         return text
-    for term in sorted(set(terms), key=len, reverse=True):
-        pat = re.compile(rf'(?<![A-Za-z0-9]){re.escape(term)}(?![A-Za-z0-9])', re.IGNORECASE)
-        text = pat.sub(term, text)
-    return text
+    return get_term_protector(terms).sub(text)
 
 def escape_for_lua(s: str) -> str:
     """Escapa texto para inserción segura en archivos Lua"""
@@ -147,33 +123,50 @@ def format_for_jsonl(en: str, es: str) -> str:
 
 # === CLASE SEGMENT PARA MANEJO DE SEGMENTOS DE TRADUCCIÓN ===
 
+# Patrones compartidos por todos los segmentos (compilados una sola vez)
+BRACKET_REGEX = re.compile(r'\[[^\]\r\n]+\]')
+# Variante del flujo alternativo: [..], {..}, <..> y (..)
+LEGACY_BRACKET_REGEX = re.compile(r'(\[[^\]]*\])|(\{[^}]*\})|(<[^>]*>)|(\([^)]*\))')
+# Puntuación final que se separa del núcleo (además de los espacios)
+TRAIL_PUNCT_CHARS = frozenset(".!?,;:\u2026")
+_NO_BR_TOKENS: Dict[str, str] = MappingProxyType({})
+
+
 class Segment:
-    """Segmento de texto para traducción con manejo de metadatos y protección de tokens"""
-    
+    """
+    Segmento de texto para traducción con manejo de metadatos y protección de tokens
+
+    Usa __slots__ porque un dictionary grande genera decenas de miles de
+    segmentos: sin __dict__ por instancia, y el mapa de corchetes solo se crea
+    cuando el segmento contiene alguno.
+    """
+
+    __slots__ = ("key", "index", "lb", "protect_brackets", "leading_ws", "core", "punct",
+                 "clean_for_model", "id", "es", "_br_tokens")
+
+    BRACKET_REGEX = BRACKET_REGEX
+    # Caracteres que indican que puede haber algo que proteger (atajo sin regex)
+    BRACKET_OPENERS = frozenset("[")
+
     def __init__(self, key: str, index: int, raw_seg: str, lb: str, protect_brackets: bool = True):
         self.key = key
         self.index = index
-        self.raw_seg = raw_seg
         self.lb = lb
         self.protect_brackets = protect_brackets
 
-        # Regex patterns necesarios
-        LEADING_WHITESPACE_REGEX = re.compile(r'^(?P<ws>\s*)(?P<text>.*)$', flags=re.DOTALL)
-        TRAIL_PUNCT_REGEX = re.compile(r'^(?P<core>.*?)(?P<punct>[\s\.\!\?\,;:\u2026]*)$', flags=re.DOTALL)
-        BRACKET_REGEX = re.compile(r'\[[^\]\r\n]+\]')
-        
-        ws_match = LEADING_WHITESPACE_REGEX.match(raw_seg)
-        self.leading_ws = ws_match.group("ws") if ws_match else ""
-        text_without_ws = ws_match.group("text") if ws_match else raw_seg
-
-        m = TRAIL_PUNCT_REGEX.match(text_without_ws)
-        self.core = m.group("core")
-        self.punct = m.group("punct")
-        self.br_tokens: Dict[str, str] = {}
+        # Equivalente a ^(\s*)(.*)$ y ^(.*?)([\s.!?,;:…]*)$ sin regex
+        text_without_ws = raw_seg.lstrip()
+        self.leading_ws = raw_seg[:len(raw_seg) - len(text_without_ws)]
+        end = len(text_without_ws)
+        while end and (text_without_ws[end - 1] in TRAIL_PUNCT_CHARS or text_without_ws[end - 1].isspace()):
+            end -= 1
+        self.core = text_without_ws[:end]
+        self.punct = text_without_ws[end:]
+        self._br_tokens: Optional[Dict[str, str]] = None
 
         # Protección opcional de [ ... ]
-        if self.protect_brackets:
-            self.clean_for_model = self._protect_brackets(self.core, BRACKET_REGEX)
+        if protect_brackets and not self.BRACKET_OPENERS.isdisjoint(self.core):
+            self.clean_for_model = self._protect_brackets(self.core, self.BRACKET_REGEX)
         else:
             self.clean_for_model = self.core
 
@@ -182,18 +175,44 @@ class Segment:
         self.id = f"id_{h}"
         self.es: Optional[str] = None
 
+    @property
+    def raw_seg(self) -> str:
+        return self.leading_ws + self.core + self.punct
+
+    @property
+    def br_tokens(self) -> Dict[str, str]:
+        """Tokens BR_n -> texto original entre corchetes (vacío y compartido si no hay)"""
+        return self._br_tokens if self._br_tokens is not None else _NO_BR_TOKENS
+
     def _protect_brackets(self, text: str, bracket_regex) -> str:
         """Protege tokens entre corchetes reemplazándolos por placeholders"""
+        tokens: Dict[str, str] = {}
+
         def repl(m):
-            token = f"BR_{len(self.br_tokens) + 1}"
-            self.br_tokens[token] = m.group(0)
+            token = f"BR_{len(tokens) + 1}"
+            tokens[token] = m.group(0)
             return token
-        return bracket_regex.sub(repl, text)
+        protected = bracket_regex.sub(repl, text)
+        if tokens:
+            self._br_tokens = tokens
+        return protected
 
 
 class TranslationEngine:
     """Motor de traducción DCS - Servicio principal de traducción"""
     
+    # Límite superior de lotes simultáneos contra LM Studio (slots paralelos)
+    MAX_IN_FLIGHT_LIMIT = 16
+    
+    # Segundos que se espera a los lotes en vuelo al cancelar para conservar su resultado
+    CANCEL_DRAIN_TIMEOUT = 2.0
+    
+    # Misiones que cada etapa de la tubería de traducción puede adelantar
+    PIPELINE_DEPTH = 2
+    
+    # Carpeta de la misión con el .miz intermedio (solo el tramo prioritario traducido)
+    EARLY_MIZ_DIR = "parcial"
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
@@ -201,8 +220,10 @@ class TranslationEngine:
         self.lm_studio_service = LMStudioService()
         
         # Session HTTP para cancelación agresiva
-        self.http_session = requests.Session()
-        self.http_session.timeout = 5  # Timeout muy corto por defecto
+        self.http_session = self._create_http_session()
+        
+        # Transporte de las llamadas de traducción ('requests' o 'async')
+        self.lm_transport = create_lm_transport(TRANSPORT_REQUESTS, self._create_http_session)
         
         # Regex patterns del motor original
         self.entry_regex = re.compile(
@@ -255,12 +276,34 @@ class TranslationEngine:
             self.logger.info("🔌 Cerrando sesión HTTP para cancelar requests en curso...")
             self.http_session.close()
             # Crear nueva sesión para futuros requests (si es necesario)
-            self.http_session = requests.Session()
-            self.http_session.timeout = 5
+            self.http_session = self._create_http_session()
             self.logger.info("✅ Sesión HTTP reiniciada")
         except Exception as e:
             self.logger.warning(f"⚠️ Error cerrando sesión HTTP: {e}")
         
+        # Abortar también los lotes en vuelo del transporte de traducción
+        try:
+            self.lm_transport.cancel(owner=id(self))
+        except Exception as e:
+            self.logger.warning(f"⚠️ Error cancelando peticiones del transporte LM: {e}")
+        
+    def set_lm_transport(self, kind: str):
+        """Selecciona el transporte de las llamadas de traducción ('requests' o 'async')"""
+        kind = (kind or TRANSPORT_REQUESTS).strip().lower()
+        if kind == self.lm_transport.name:
+            return
+        self.lm_transport = create_lm_transport(kind, self._create_http_session)
+        self.logger.info(f"🔌 Transporte LM Studio: {self.lm_transport.name}")
+        
+    def _create_http_session(self) -> requests.Session:
+        """Crea la sesión HTTP con pool suficiente para varios lotes en vuelo"""
+        session = requests.Session()
+        session.timeout = 5  # Timeout muy corto por defecto
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=self.MAX_IN_FLIGHT_LIMIT)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+        
     # === UTILIDADES DEL ORQUESTADOR INTEGRADAS ===
     
     
@@ -442,6 +485,10 @@ class TranslationEngine:
             'workflow': {
                 'mode': workflow_config.get('mode', 'translate'),
                 'batch_size': workflow_config.get('batch_size', 4),
+                'max_in_flight': workflow_config.get('max_in_flight', 1),
+                'batch_mode': workflow_config.get('batch_mode', DEFAULT_BATCH_MODE),
+                'batch_order': workflow_config.get('batch_order', BATCH_ORDER_DICTIONARY),
+                'lm_transport': self.lm_transport.name,
                 'timeout': workflow_config.get('timeout', 200),
                 'lm_config': workflow_config.get('lm_config', {}),
                 'prompt_file': workflow_config.get('prompt_file', '')
@@ -696,6 +743,28 @@ class TranslationEngine:
             self.logger.error(f"Error comprimiendo a {output_miz_path}: {e}")
             raise
     
+    def repack_miz_with_dictionary(self, miz_path: str, file_target: str, dictionary_path: str,
+                                   output_miz_path: str):
+        """Copia el .miz sustituyendo el diccionario, sin extraerlo a disco"""
+        ensure_directory(os.path.dirname(output_miz_path))
+        wanted = file_target.replace("\\", "/").strip("/")
+        tmp_path = output_miz_path + ".tmp"
+        try:
+            with zipfile.ZipFile(miz_path, "r") as src, \
+                    zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+                for info in src.infolist():
+                    if info.filename.replace("\\", "/").strip("/") == wanted:
+                        continue
+                    with src.open(info) as member, dst.open(info, "w") as out:
+                        shutil.copyfileobj(member, out, 1024 * 1024)
+                dst.write(dictionary_path, wanted)
+            os.replace(tmp_path, output_miz_path)
+        except Exception as e:
+            self.logger.error(f"Error reempaquetando {miz_path} en {output_miz_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
     def backup_miz(self, miz_path: str, backup_dir: str):
         """Crea backup de archivo .miz"""
         ensure_directory(backup_dir)
@@ -1091,7 +1160,8 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         return strict_prefix + original_instructions + strict_suffix
 
     def call_lmstudio_batch(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int, 
-                           lm_url: str, lm_model: str, compat: str = "auto") -> Dict[str, str]:
+                           lm_url: str, lm_model: str, compat: str = "auto",
+                           stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
         """
         Llama a LM Studio para traducir un lote de elementos con reintento automático y validación
         
@@ -1102,64 +1172,89 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             lm_url: URL base de LM Studio
             lm_model: Nombre del modelo
             compat: Modo de compatibilidad ("auto", "chat", "completions")
+            stats: Dict opcional donde se anotan latencia, fallos de parseo,
+                   timeouts e incompletas del lote (controlador adaptativo)
         
         Returns:
             Dict mapeando ids a traducciones
         """
+        return self._run_lm_steps(self._batch_steps(items, cfg, timeout, lm_url, lm_model, compat, stats))
+
+    async def call_lmstudio_batch_async(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int,
+                                        lm_url: str, lm_model: str, compat: str = "auto",
+                                        stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        Variante asíncrona de call_lmstudio_batch para el transporte 'async'
+
+        Mismos reintentos y validación que la versión síncrona; se ejecuta dentro
+        del event loop del transporte, sin ocupar un hilo por lote en vuelo.
+        """
+        return await self._run_lm_steps_async(self._batch_steps(items, cfg, timeout, lm_url, lm_model, compat, stats))
+
+    # === Pasos de una llamada al modelo ===
+    #
+    # La lógica de lotes, reintentos y pool se escribe una sola vez como generador:
+    # cada petición HTTP se cede como (endpoint, request, timeout, extractor) y el
+    # generador recibe el texto generado (o la excepción de la petición). Los
+    # conductores _run_lm_steps y _run_lm_steps_async solo difieren en el transporte.
+
+    def _run_lm_steps(self, steps: LMSteps) -> Dict[str, str]:
+        """Ejecuta los pasos con el transporte síncrono"""
+        try:
+            post = next(steps)
+            while True:
+                try:
+                    content = self._lm_post(*post)
+                except Exception as e:
+                    post = steps.throw(e)
+                else:
+                    post = steps.send(content)
+        except StopIteration as done:
+            return done.value
+
+    async def _run_lm_steps_async(self, steps: LMSteps) -> Dict[str, str]:
+        """Ejecuta los pasos desde el event loop del transporte asíncrono"""
+        try:
+            post = next(steps)
+            while True:
+                try:
+                    content = await self._lm_post_async(*post)
+                except Exception as e:
+                    post = steps.throw(e)
+                else:
+                    post = steps.send(content)
+        except StopIteration as done:
+            return done.value
+
+    def _batch_steps(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int, lm_url: str, lm_model: str,
+                     compat: str = "auto", stats: Optional[Dict[str, Any]] = None) -> LMSteps:
+        """Pasos de call_lmstudio_batch: intento, re-proceso de incompletas y reintento estricto"""
         # Verificar cancelación antes de procesar el lote
         if self._check_cancellation():
             self.logger.warning("🛑 Cancelación detectada - Abortando procesamiento de lote")
             raise Exception("Operación cancelada por el usuario - Lote cancelado")
         
         # Primer intento con configuración normal
-        result = self._call_lmstudio_single_attempt(items, cfg, timeout, lm_url, lm_model, compat)
+        result = yield from self._single_attempt_steps(items, cfg, timeout, lm_url, lm_model, compat, stats)
         
         # VALIDACIÓN DE TRADUCCIONES INCOMPLETAS
-        if result:
-            incomplete_translations = self._detect_incomplete_translations(result)
-            
-            if incomplete_translations:
-                self.logger.warning(f"Detectadas {len(incomplete_translations)} traducciones incompletas. Re-procesando...")
-                
-                # Crear items para re-procesar solo las traducciones incompletas
-                items_to_retry = []
-                original_items_dict = dict(items)
-                
-                for trans_id, incomplete_text in incomplete_translations:
-                    if trans_id in original_items_dict:
-                        items_to_retry.append((trans_id, original_items_dict[trans_id]))
-                        self.logger.info(f"Re-procesando {trans_id}: '{incomplete_text[:60]}...'")
-                
-                if items_to_retry:
-                    # Crear prompt más específico para traducciones incompletas
-                    retry_cfg = cfg.copy()
-                    incomplete_instructions = self._create_incomplete_translation_instructions(cfg.get("LM_INSTRUCTIONS", ""))
-                    retry_cfg["LM_INSTRUCTIONS"] = incomplete_instructions
-                    
-                    try:
-                        retry_result = self._call_lmstudio_single_attempt(items_to_retry, retry_cfg, timeout, lm_url, lm_model, compat)
-                        
-                        # Reemplazar las traducciones incompletas con las nuevas
-                        if retry_result:
-                            for trans_id, new_translation in retry_result.items():
-                                result[trans_id] = new_translation
-                            self.logger.info(f"Re-procesamiento exitoso: {len(retry_result)} traducciones corregidas")
-                        else:
-                            self.logger.warning("Re-procesamiento falló, manteniendo traducciones originales")
-                    except Exception as e:
-                        self.logger.error(f"Error en re-procesamiento de incompletas: {e}")
+        items_to_retry, retry_cfg = self._plan_incomplete_retry(result, items, cfg)
+        if stats is not None:
+            stats['incomplete'] = len(items_to_retry)
+        if items_to_retry:
+            try:
+                retry_result = yield from self._single_attempt_steps(items_to_retry, retry_cfg, timeout,
+                                                                     lm_url, lm_model, compat)
+                self._merge_incomplete_retry(result, retry_result)
+            except Exception as e:
+                self.logger.error(f"Error en re-procesamiento de incompletas: {e}")
         
         # REINTENTO AUTOMÁTICO: Si no obtuvimos resultados y hay múltiples items, intentar con prompt más estricto
-        if len(result) == 0 and len(items) > 1 and len(items) <= 3:  # Solo para lotes pequeños
+        if self._needs_strict_retry(result, items):
             self.logger.info("Reintentando con instrucciones más estrictas...")
-            
-            # Crear configuración con instrucciones más estrictas
-            retry_cfg = cfg.copy()
-            retry_cfg["LM_INSTRUCTIONS"] = self._create_strict_retry_instructions(cfg.get("LM_INSTRUCTIONS", ""))
-            
-            # Llamada recursiva con prompt más estricto (solo una vez)
             try:
-                retry_result = self._call_lmstudio_single_attempt(items, retry_cfg, timeout, lm_url, lm_model, compat)
+                retry_result = yield from self._single_attempt_steps(items, self._strict_retry_cfg(cfg), timeout,
+                                                                     lm_url, lm_model, compat)
                 if retry_result:
                     self.logger.info(f"Reintento exitoso: {len(retry_result)} traducciones recuperadas")
                     return retry_result
@@ -1170,27 +1265,228 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         
         return result
 
-    def _call_lmstudio_single_attempt(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int, 
-                                     lm_url: str, lm_model: str, compat: str = "auto") -> Dict[str, str]:
+    def _plan_incomplete_retry(self, result: Dict[str, str], items: List[Tuple[str, str]],
+                               cfg: Dict) -> Tuple[List[Tuple[str, str]], Optional[Dict]]:
+        """Selecciona los items con traducción incompleta y prepara su configuración de reintento"""
+        if not result:
+            return [], None
+        incomplete_translations = self._detect_incomplete_translations(result)
+        if not incomplete_translations:
+            return [], None
+        
+        self.logger.warning(f"Detectadas {len(incomplete_translations)} traducciones incompletas. Re-procesando...")
+        
+        # Crear items para re-procesar solo las traducciones incompletas
+        items_to_retry = []
+        original_items_dict = dict(items)
+        for trans_id, incomplete_text in incomplete_translations:
+            if trans_id in original_items_dict:
+                items_to_retry.append((trans_id, original_items_dict[trans_id]))
+                self.logger.info(f"Re-procesando {trans_id}: '{incomplete_text[:60]}...'")
+        
+        # Crear prompt más específico para traducciones incompletas
+        retry_cfg = cfg.copy()
+        retry_cfg["LM_INSTRUCTIONS"] = self._create_incomplete_translation_instructions(cfg.get("LM_INSTRUCTIONS", ""))
+        return items_to_retry, retry_cfg
+
+    def _merge_incomplete_retry(self, result: Dict[str, str], retry_result: Dict[str, str]):
+        """Reemplaza las traducciones incompletas con las del reintento"""
+        if retry_result:
+            for trans_id, new_translation in retry_result.items():
+                result[trans_id] = new_translation
+            self.logger.info(f"Re-procesamiento exitoso: {len(retry_result)} traducciones corregidas")
+        else:
+            self.logger.warning("Re-procesamiento falló, manteniendo traducciones originales")
+
+    @staticmethod
+    def _needs_strict_retry(result: Dict[str, str], items: List[Tuple[str, str]]) -> bool:
+        """Reintento estricto solo para lotes pequeños (2-3 items) sin ningún resultado"""
+        return len(result) == 0 and 1 < len(items) <= 3
+
+    def _strict_retry_cfg(self, cfg: Dict) -> Dict:
+        """Configuración con instrucciones más estrictas para el reintento"""
+        retry_cfg = cfg.copy()
+        retry_cfg["LM_INSTRUCTIONS"] = self._create_strict_retry_instructions(cfg.get("LM_INSTRUCTIONS", ""))
+        return retry_cfg
+
+    def _call_pooled_batch(self, pool: LMEndpointPool, items: List[Tuple[str, str]], cfg: Dict, timeout: int,
+                           lm_model: str, compat: str = "auto",
+                           stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
         """
-        Intento único a LM Studio sin reintento automático
-        
+        call_lmstudio_batch contra el endpoint menos cargado del pool
+
+        Si la petición falla (conexión, HTTP o timeout) el lote se reintenta una
+        vez en otro endpoint. El resultado de cada intento alimenta la salud y
+        las estadísticas del pool.
+        """
+        return self._run_lm_steps(self._pooled_batch_steps(pool, items, cfg, timeout, lm_model, compat, stats))
+
+    async def _call_pooled_batch_async(self, pool: LMEndpointPool, items: List[Tuple[str, str]], cfg: Dict,
+                                       timeout: int, lm_model: str, compat: str = "auto",
+                                       stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Variante asíncrona de _call_pooled_batch para el transporte 'async'"""
+        return await self._run_lm_steps_async(
+            self._pooled_batch_steps(pool, items, cfg, timeout, lm_model, compat, stats))
+
+    def _pooled_batch_steps(self, pool: LMEndpointPool, items: List[Tuple[str, str]], cfg: Dict, timeout: int,
+                            lm_model: str, compat: str = "auto",
+                            stats: Optional[Dict[str, Any]] = None) -> LMSteps:
+        """Pasos de _call_pooled_batch: el lote contra un endpoint y, si falla, contra otro"""
+        endpoint, resp = None, {}
+        for _ in range(min(2, len(pool))):
+            endpoint = pool.acquire(exclude=endpoint)
+            attempt_stats: Dict[str, Any] = {}
+            t0 = time.perf_counter()
+            try:
+                resp = yield from self._batch_steps(items, cfg, timeout, endpoint.url, endpoint.model or lm_model,
+                                                    compat, attempt_stats)
+            except Exception:
+                # La cancelación no es culpa del endpoint
+                pool.release(endpoint, ok=self._check_cancellation(), seconds=time.perf_counter() - t0)
+                raise
+            failed = bool(attempt_stats.get('request_failed'))
+            pool.release(endpoint, ok=not failed, items=len(resp), seconds=time.perf_counter() - t0)
+            if stats is not None:
+                stats.clear()
+                stats.update(attempt_stats, endpoint=endpoint.url)
+            if resp or not failed:
+                break
+        return resp
+
+    def _iter_batch_responses(self, batches: List[List[Tuple[str, str]]], cfg: Dict, timeout: int,
+                              lm_url: str, lm_model: str, compat: str = "auto",
+                              max_in_flight: int = 1,
+                              on_dispatch: Callable[[int], None] = None,
+                              endpoint_pool: Optional[LMEndpointPool] = None):
+        """
+        Envía los lotes al modelo manteniendo hasta max_in_flight peticiones en vuelo
+
+        Las respuestas se entregan en el mismo orden que los lotes de entrada, así la
+        fusión en los segmentos es idéntica al modo secuencial aunque el servidor
+        termine los lotes en otro orden.
+
+        Con el transporte 'async' los lotes se programan como corrutinas en el loop
+        compartido del transporte (sin hilos por lote); con 'requests' se usa un
+        pool de hilos acotado a MAX_IN_FLIGHT_LIMIT.
+
         Args:
-            items: Lista de tuplas (id, texto_en)
-            cfg: Configuración con LM_API y LM_INSTRUCTIONS
-            timeout: Timeout para requests
-            lm_url: URL base de LM Studio
-            lm_model: Nombre del modelo
-            compat: Modo de compatibilidad ("auto", "chat", "completions")
-        
+            batches: Lotes (lista o iterable perezoso de listas de tuplas (id, texto_en))
+            max_in_flight: Lotes simultáneos (1 = comportamiento secuencial clásico)
+            on_dispatch: Callback opcional invocado con el número de lote al enviarlo
+            endpoint_pool: Pool de endpoints; si se indica, lm_url se ignora y cada
+                lote va al endpoint sano menos cargado
+
+        Yields:
+            Tuplas (numero_lote, lote, respuesta, estadísticas_del_lote)
+        """
+        transport = self.lm_transport
+        limit = transport.max_connections if transport.is_async else self.MAX_IN_FLIGHT_LIMIT
+        max_in_flight = max(1, min(int(max_in_flight or 1), limit))
+
+        def call_batch(batch, batch_stats):
+            if endpoint_pool is not None:
+                return self._call_pooled_batch(endpoint_pool, batch, cfg, timeout, lm_model, compat, batch_stats)
+            return self.call_lmstudio_batch(batch, cfg, timeout, lm_url, lm_model, compat, batch_stats)
+
+        def call_batch_async(batch, batch_stats):
+            if endpoint_pool is not None:
+                return self._call_pooled_batch_async(endpoint_pool, batch, cfg, timeout, lm_model, compat, batch_stats)
+            return self.call_lmstudio_batch_async(batch, cfg, timeout, lm_url, lm_model, compat, batch_stats)
+
+        if max_in_flight == 1 and not transport.is_async:
+            for batch_number, batch in enumerate(batches, 1):
+                if self._check_cancellation():
+                    self.logger.warning("🛑 Cancelación detectada - Deteniendo envío de frases al modelo")
+                    raise Exception("Operación cancelada por el usuario - Envío de frases interrumpido")
+                if on_dispatch:
+                    on_dispatch(batch_number)
+                batch_stats = {}
+                resp = call_batch(batch, batch_stats)
+                yield batch_number, batch, resp, batch_stats
+            return
+
+        executor = None
+        if transport.is_async:
+            self.logger.info(f"🚀 Despacho asíncrono: hasta {max_in_flight} lotes en vuelo")
+            def submit(batch, batch_stats):
+                return transport.submit(call_batch_async(batch, batch_stats))
+        else:
+            self.logger.info(f"🚀 Despacho concurrente: hasta {max_in_flight} lotes en vuelo")
+            executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="lm_batch")
+            def submit(batch, batch_stats):
+                return executor.submit(call_batch, batch, batch_stats)
+
+        pending = deque()
+        batch_iter = iter(enumerate(batches, 1))
+        try:
+            while True:
+                # Rellenar la ventana de lotes en vuelo
+                while len(pending) < max_in_flight:
+                    next_item = next(batch_iter, None)
+                    if next_item is None:
+                        break
+                    if self._check_cancellation():
+                        self.logger.warning("🛑 Cancelación detectada - Deteniendo envío de frases al modelo")
+                        # Entregar lo que los lotes en vuelo ya hayan terminado (p. ej. items por streaming)
+                        yield from self._drain_pending_batches(pending)
+                        raise Exception("Operación cancelada por el usuario - Envío de frases interrumpido")
+                    batch_number, batch = next_item
+                    if on_dispatch:
+                        on_dispatch(batch_number)
+                    batch_stats = {}
+                    pending.append((batch_number, batch, batch_stats, submit(batch, batch_stats)))
+
+                if not pending:
+                    break
+
+                # Entregar siempre el lote más antiguo para conservar el orden
+                batch_number, batch, batch_stats, future = pending.popleft()
+                yield batch_number, batch, future.result(), batch_stats
+        finally:
+            for _, _, _, future in pending:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drain_pending_batches(self, pending: deque):
+        """Entrega en orden los lotes en vuelo que terminen dentro de CANCEL_DRAIN_TIMEOUT"""
+        if not pending:
+            return
+        wait_futures([future for _, _, _, future in pending], timeout=self.CANCEL_DRAIN_TIMEOUT)
+        while pending and pending[0][3].done():
+            batch_number, batch, batch_stats, future = pending.popleft()
+            try:
+                resp = future.result()
+            except Exception:
+                continue
+            yield batch_number, batch, resp, batch_stats
+
+    @staticmethod
+    def _build_prompt_for_model(model_name: str, system_text: str, user_text: str) -> str:
+        """Construye el prompt crudo para /completions según la plantilla del modelo"""
+        name = (model_name or "").lower()
+        if "qwen" in name:  # ChatML (Qwen)
+            return (
+                f"<|im_start|>system\n{system_text}\n<|im_end|>\n"
+                f"<|im_start|>user\n{user_text}\n<|im_end|>\n"
+                f"<|im_start|>assistant\n"
+            )
+        else:  # Llama-3 default
+            BOS = "<|begin_of_text|>"; EOT = "<|eot_id|>"
+            S = "<|start_header_id|>"; E = "<|end_header_id|>"
+            sys = f"{S}system{E}\n{system_text}{EOT}"
+            usr = f"{S}user{E}\n{user_text}{EOT}"
+            asst = f"{S}assistant{E}\n"
+            return f"{BOS}{sys}{usr}{asst}"
+
+    def _build_lm_request(self, items: List[Tuple[str, str]], cfg: Dict,
+                          lm_url: str, lm_model: str) -> Dict[str, Any]:
+        """
+        Prepara las peticiones a LM Studio para un lote
+
         Returns:
-            Dict mapeando ids a traducciones
+            Dict con 'headers' y, por endpoint ('chat' / 'completions'), la tupla (url, body)
         """
-        # Verificar cancelación antes de procesar
-        if self._check_cancellation():
-            self.logger.warning("🛑 Cancelación detectada - Abortando intento de llamada")
-            raise Exception("Operación cancelada por el usuario - Intento cancelado")
-        
         lm_instructions = cfg.get("LM_INSTRUCTIONS", "")
         
         # NUEVO: Usar campo SYSTEM si está disponible, sino usar LM_INSTRUCTIONS
@@ -1220,136 +1516,180 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         default_stop = ["</s>", "<|eot_id|>", "]}", "]}\n", "]},\n]", "\n```", "```json"]
         supports_system = bool(api.get("supports_system", True))
 
-        def post_chat() -> str:
-            url_chat = f"{lm_url.rstrip('/')}/chat/completions"
-            if supports_system:
-                messages = [
-                    {"role": "system", "content": actual_system_content},
-                    {"role": "user", "content": actual_user_content + json_content}
-                ]
+        # Glosario tras las instrucciones: el prefijo estático (SYSTEM + LM_INSTRUCTIONS)
+        # no cambia entre lotes y el servidor puede reutilizarlo de su cache de prompts
+        glossary_mode = api.get(PROMPT_GLOSSARY_KEY)
+        if glossary_mode:
+            prompt_glossary = get_compiled_rules(cfg).prompt_glossary
+            if glossary_mode == PROMPT_GLOSSARY_BATCH:
+                terms = prompt_glossary.terms_in(text for _, text in items)
+                glossary_block = prompt_glossary.block(terms)
+                static_tokens = estimate_tokens(actual_system_content + actual_user_content + json_content)
+                self.logger.info(
+                    f"📚 Glosario del lote: {len(terms)}/{len(prompt_glossary)} términos, prompt "
+                    f"~{static_tokens + estimate_tokens(glossary_block)} tokens "
+                    f"(~{static_tokens + estimate_tokens(prompt_glossary.full_block)} con el glosario completo)")
             else:
-                messages = [
-                    {"role": "user", "content": actual_system_content + "\n\n" + actual_user_content + json_content}
-                ]
-            body = {
-                "model": lm_model,
-                "messages": messages,
-                "temperature": api.get("temperature", 0.2),
-                "top_p": api.get("top_p", 0.9),
-                "top_k": api.get("top_k", 40),
-                "max_tokens": api.get("max_tokens", 2048),
-                "stop": api.get("stop", default_stop)
-            }
-            # Parámetros específicos para modelos Llama
-            if "repetition_penalty" in api:
-                body["repetition_penalty"] = api["repetition_penalty"]
-            if "presence_penalty" in api:
-                body["presence_penalty"] = api["presence_penalty"]
-            if "frequency_penalty" in api:
-                body["frequency_penalty"] = api["frequency_penalty"]
-            
-            # Verificar cancelación ANTES del request HTTP
-            if self._check_cancellation():
-                self.logger.warning("🛑 Cancelación detectada - Abortando llamada HTTP al modelo")
-                raise Exception("Operación cancelada por el usuario - Request HTTP cancelado")
-            
-            r = self.http_session.post(url_chat, json=body, headers=headers, timeout=timeout)
-            if r.status_code >= 400:
-                self.logger.error("LM Studio /chat/completions %s: %s", r.status_code, r.text[:1000])
-                r.raise_for_status()
+                glossary_block = prompt_glossary.full_block
+            actual_user_content += glossary_block
+
+        sampling = {
+            "temperature": api.get("temperature", 0.2),
+            "top_p": api.get("top_p", 0.9),
+            "top_k": api.get("top_k", 40),
+            "max_tokens": fit_max_tokens(items, cfg) if api.get(FIT_MAX_TOKENS_KEY) else api.get("max_tokens", 2048),
+            "stop": api.get("stop", default_stop)
+        }
+        # Parámetros específicos para modelos Llama
+        for extra in ("repetition_penalty", "presence_penalty", "frequency_penalty"):
+            if extra in api:
+                sampling[extra] = api[extra]
+        # Salida restringida por esquema: la gramática cierra el JSON, así que se
+        # quitan las stop sequences que lo cortarían ("]}")
+        structured = bool(api.get(STRUCTURED_OUTPUT_KEY))
+        if structured:
+            sampling["response_format"] = build_response_schema(k for k, _ in items)
+            sampling["stop"] = [stop for stop in sampling["stop"] if "]" not in stop and "}" not in stop]
+
+        if supports_system:
+            messages = [
+                {"role": "system", "content": actual_system_content},
+                {"role": "user", "content": actual_user_content + json_content}
+            ]
+        else:
+            messages = [
+                {"role": "user", "content": actual_system_content + "\n\n" + actual_user_content + json_content}
+            ]
+        chat_body = {"model": lm_model, "messages": messages, **sampling}
+
+        prompt = self._build_prompt_for_model(lm_model, actual_system_content, actual_user_content + json_content)
+        comp_body = {"model": lm_model, "prompt": prompt, **sampling}
+
+        base = lm_url.rstrip('/')
+        return {
+            "headers": headers,
+            "stream": bool(api.get("stream", False)),
+            "structured": structured,
+            "chat": (f"{base}/chat/completions", chat_body),
+            "completions": (f"{base}/completions", comp_body),
+        }
+
+    def _raise_for_lm_status(self, endpoint: str, r: requests.Response):
+        """Registra y lanza HTTPError si LM Studio devolvió un error"""
+        if r.status_code >= 400:
+            self.logger.error("LM Studio /%s %s: %s",
+                              "chat/completions" if endpoint == "chat" else "completions",
+                              r.status_code, r.text[:1000])
+            r.raise_for_status()
+
+    def _check_lm_response(self, endpoint: str, r: requests.Response) -> str:
+        """Valida el estado HTTP y extrae el texto generado según el endpoint"""
+        self._raise_for_lm_status(endpoint, r)
+        if endpoint == "chat":
             return r.json()["choices"][0]["message"]["content"]
+        return r.json()["choices"][0].get("text", "")
 
-        def build_prompt_for_model(model_name: str, system_text: str, user_text: str) -> str:
-            name = (model_name or "").lower()
-            if "qwen" in name:  # ChatML (Qwen)
-                return (
-                    f"<|im_start|>system\n{system_text}\n<|im_end|>\n"
-                    f"<|im_start|>user\n{user_text}\n<|im_end|>\n"
-                    f"<|im_start|>assistant\n"
-                )
-            else:  # Llama-3 default
-                BOS = "<|begin_of_text|>"; EOT = "<|eot_id|>"
-                S = "<|start_header_id|>"; E = "<|end_header_id|>"
-                sys = f"{S}system{E}\n{system_text}{EOT}"
-                usr = f"{S}user{E}\n{user_text}{EOT}"
-                asst = f"{S}assistant{E}\n"
-                return f"{BOS}{sys}{usr}{asst}"
-
-        def post_comp() -> str:
-            url_comp = f"{lm_url.rstrip('/')}/completions"
-            prompt = build_prompt_for_model(lm_model, actual_system_content, actual_user_content + json_content)
-            body = {
-                "model": lm_model,
-                "prompt": prompt,
-                "temperature": api.get("temperature", 0.2),
-                "top_p": api.get("top_p", 0.9),
-                "top_k": api.get("top_k", 40),
-                "max_tokens": api.get("max_tokens", 2048),
-                "stop": api.get("stop", default_stop)
-            }
-            # Parámetros específicos para modelos Llama
-            if "repetition_penalty" in api:
-                body["repetition_penalty"] = api["repetition_penalty"]
-            if "presence_penalty" in api:
-                body["presence_penalty"] = api["presence_penalty"]
-            if "frequency_penalty" in api:
-                body["frequency_penalty"] = api["frequency_penalty"]
-            
-            # Verificar cancelación ANTES del request HTTP
+    def _ensure_not_cancelled_before_request(self):
+        """Verificar cancelación ANTES del request HTTP"""
+        if self._check_cancellation():
+            self.logger.warning("🛑 Cancelación detectada - Abortando llamada HTTP al modelo")
+            raise Exception("Operación cancelada por el usuario - Request HTTP cancelado")
+
+    def _make_stream_consumer(self, endpoint: str, extractor: StreamingItemExtractor,
+                              timeout: int) -> Tuple[Callable[[str], bool], List[str]]:
+        """
+        Crea el callback que consume las líneas SSE
+
+        Cada fragmento se acumula y se pasa al extractor, que guarda los items
+        {"id","es"} ya cerrados. Deja de leer al terminar el stream, al
+        superar el timeout total o si el usuario cancela.
+        """
+        decoder = SSEChunkDecoder(endpoint)
+        parts: List[str] = []
+        deadline = time.perf_counter() + timeout
+
+        def on_line(line: str) -> bool:
+            chunk = decoder.decode(line)
+            if chunk:
+                parts.append(chunk)
+                extractor.feed(chunk)
+            if decoder.done:
+                return False
             if self._check_cancellation():
-                self.logger.warning("🛑 Cancelación detectada - Abortando llamada HTTP al modelo")
-                raise Exception("Operación cancelada por el usuario - Request HTTP cancelado")
-            
-            r = self.http_session.post(url_comp, json=body, headers=headers, timeout=timeout)
-            if r.status_code >= 400:
-                self.logger.error("LM Studio /completions %s: %s", r.status_code, r.text[:1000])
-                r.raise_for_status()
-            
-            # Extraer solo la parte JSON válida para modelos Llama
-            full_text = r.json()["choices"][0].get("text", "")
-            
-            # Buscar JSON array al inicio de la respuesta
-            import re
-            json_match = re.search(r'(\[[\s\S]*?\])', full_text)
-            if json_match:
-                json_part = json_match.group(1)
-                try:
-                    # Validar que sea JSON válido
-                    import json
-                    json.loads(json_part)
-                    self.logger.debug(f"Extraído JSON válido de completions: {json_part[:100]}...")
-                    return json_part
-                except json.JSONDecodeError:
-                    self.logger.warning(f"JSON encontrado pero inválido: {json_part[:100]}...")
-            
-            # Si no encuentra JSON válido, devolver texto completo (fallback)
-            self.logger.debug(f"No se encontró JSON válido, devolviendo texto completo: {full_text[:100]}...")
-            return full_text
+                extractor.interrupted = "cancelled"
+                return False
+            if time.perf_counter() > deadline:
+                extractor.interrupted = "timeout"
+                return False
+            return True
 
-        t0 = time.perf_counter()
-        content = ""
-        try:
-            if compat == "chat":
-                content = post_chat()
-            elif compat == "completions":
-                content = post_comp()
-            else:
-                try:
-                    content = post_chat()
-                except requests.HTTPError as e:
-                    if e.response is not None and e.response.status_code in (404, 405):
-                        content = post_comp()
-                    else:
-                        raise
-        except requests.exceptions.Timeout:
+        return on_line, parts
+
+    def _finish_stream(self, endpoint: str, r: requests.Response, parts: List[str],
+                       extractor: StreamingItemExtractor, timeout: int) -> str:
+        """Valida el stream terminado y devuelve el texto completo generado"""
+        self._raise_for_lm_status(endpoint, r)
+        if extractor.interrupted == "timeout":
+            raise requests.exceptions.Timeout(f"Streaming superó {timeout}s")
+        if extractor.interrupted == "cancelled":
+            return ""
+        return "".join(parts)
+
+    def _lm_post(self, endpoint: str, request: Dict[str, Any], timeout: int,
+                 extractor: Optional[StreamingItemExtractor] = None) -> str:
+        self._ensure_not_cancelled_before_request()
+        url, body = request[endpoint]
+        if extractor is None:
+            r = self.lm_transport.post(url, body, request["headers"], timeout, owner=id(self))
+            return self._check_lm_response(endpoint, r)
+        on_line, parts = self._make_stream_consumer(endpoint, extractor, timeout)
+        r = self.lm_transport.post_stream(url, {**body, "stream": True}, request["headers"],
+                                          timeout, on_line, owner=id(self))
+        return self._finish_stream(endpoint, r, parts, extractor, timeout)
+
+    async def _lm_post_async(self, endpoint: str, request: Dict[str, Any], timeout: int,
+                             extractor: Optional[StreamingItemExtractor] = None) -> str:
+        self._ensure_not_cancelled_before_request()
+        url, body = request[endpoint]
+        if extractor is None:
+            r = await self.lm_transport.post_async(url, body, request["headers"], timeout, owner=id(self))
+            return self._check_lm_response(endpoint, r)
+        on_line, parts = self._make_stream_consumer(endpoint, extractor, timeout)
+        r = await self.lm_transport.post_stream_async(url, {**body, "stream": True}, request["headers"],
+                                                      timeout, on_line, owner=id(self))
+        return self._finish_stream(endpoint, r, parts, extractor, timeout)
+
+    def _merge_streamed_items(self, out: Dict[str, str], extractor: Optional[StreamingItemExtractor],
+                              items: List[Tuple[str, str]]) -> Dict[str, str]:
+        """Completa el resultado con los items ya recibidos por streaming"""
+        if extractor is None or not extractor.items:
+            return out
+        batch_ids = {item_id for item_id, _ in items}
+        salvaged = 0
+        for item_id, es in extractor.items.items():
+            if item_id in batch_ids and item_id not in out:
+                out[item_id] = es
+                salvaged += 1
+        if salvaged and extractor.interrupted:
+            self.logger.warning(f"♻️ Streaming interrumpido ({extractor.interrupted}): "
+                                f"conservadas {len(out)}/{len(items)} traducciones ya recibidas")
+        return out
+
+    def _handle_lm_request_error(self, e: Exception, timeout: int):
+        """Registra el error de la petición; relanza solo si no hay modelos cargados"""
+        if self._check_cancellation():
+            self.logger.warning(f"🛑 Petición a LM Studio interrumpida por cancelación: {e}")
+            return
+        if isinstance(e, requests.exceptions.Timeout):
             self.logger.warning("LM Studio timed out after %d seconds.", timeout)
-        except requests.HTTPError as e:
+            return
+        if isinstance(e, requests.HTTPError):
             # Detectar específicamente si no hay modelos cargados
             if e.response is not None and e.response.status_code == 404:
                 try:
                     error_data = e.response.json()
                     if (error_data.get("error", {}).get("code") == "model_not_found" or 
-                        "No models loade        self._prevent_problematic_directories()d" in error_data.get("error", {}).get("message", "")):
+                        "No models loaded" in error_data.get("error", {}).get("message", "")):
                         
                         error_msg = (
                             "❌ ERROR: No hay modelos cargados en LM Studio.\n\n"
@@ -1364,139 +1704,289 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                         raise RuntimeError("No hay modelos cargados en LM Studio. Por favor, carga un modelo primero.") from e
                 except (json.JSONDecodeError, ValueError):
                     pass
-            
-            self.logger.exception("ERROR LM Studio: %s", e)
+        self.logger.exception("ERROR LM Studio: %s", e)
+
+    def _call_lmstudio_single_attempt(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int, 
+                                     lm_url: str, lm_model: str, compat: str = "auto",
+                                     stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        Intento único a LM Studio sin reintento automático
+        
+        Args:
+            items: Lista de tuplas (id, texto_en)
+            cfg: Configuración con LM_API y LM_INSTRUCTIONS
+            timeout: Timeout para requests
+            lm_url: URL base de LM Studio
+            lm_model: Nombre del modelo
+            compat: Modo de compatibilidad ("auto", "chat", "completions")
+        
+        Returns:
+            Dict mapeando ids a traducciones
+        """
+        return self._run_lm_steps(self._single_attempt_steps(items, cfg, timeout, lm_url, lm_model, compat, stats))
+
+    async def _call_lmstudio_single_attempt_async(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int,
+                                                  lm_url: str, lm_model: str, compat: str = "auto",
+                                                  stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Intento único a LM Studio desde el event loop del transporte asíncrono"""
+        return await self._run_lm_steps_async(
+            self._single_attempt_steps(items, cfg, timeout, lm_url, lm_model, compat, stats))
+
+    def _single_attempt_steps(self, items: List[Tuple[str, str]], cfg: Dict, timeout: int, lm_url: str,
+                              lm_model: str, compat: str = "auto",
+                              stats: Optional[Dict[str, Any]] = None) -> LMSteps:
+        """Pasos de un intento: petición (con caída de /chat a /completions), errores y parseo"""
+        # Verificar cancelación antes de procesar
+        if self._check_cancellation():
+            self.logger.warning("🛑 Cancelación detectada - Abortando intento de llamada")
+            raise Exception("Operación cancelada por el usuario - Intento cancelado")
+        
+        wire_items, to_segment = self._wire_batch(items, cfg)
+        request = self._build_lm_request(wire_items, cfg, lm_url, lm_model)
+        # En modo streaming los items cerrados se conservan aunque la respuesta se corte
+        extractor = StreamingItemExtractor() if request["stream"] else None
+
+        t0 = time.perf_counter()
+        content = ""
+        try:
+            if compat in ("chat", "completions"):
+                content = yield compat, request, timeout, extractor
+            else:
+                try:
+                    content = yield "chat", request, timeout, extractor
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code in (404, 405):
+                        content = yield "completions", request, timeout, extractor
+                    else:
+                        raise
         except Exception as e:
-            self.logger.exception("ERROR LM Studio: %s", e)
+            if stats is not None:
+                stats['request_failed'] = True
+                if isinstance(e, requests.exceptions.Timeout):
+                    stats['timed_out'] = True
+            self._handle_lm_request_error(e, timeout)
 
         if not content:
-            return {}
+            return self._from_wire(self._merge_streamed_items({}, extractor, wire_items), to_segment, items)
 
         dt = time.perf_counter() - t0
         self.logger.info("Lote LM Studio: %d frases | %.2fs", len(items), dt)
+        if stats is not None:
+            stats.setdefault('latency', dt)
+        out = self._merge_streamed_items(self._parse_lm_content(content, wire_items, stats, request["structured"]),
+                                         extractor, wire_items)
+        return self._from_wire(out, to_segment, items)
 
-        # Parse response - Mejorado para modelos Llama
-        # Primero extraer JSON de bloques de código si los hay
-        m_fence = re.search(r'```json\s*([\s\S]*?)\s*```', content)
-        if m_fence:
-            clean_content = m_fence.group(1).strip()
-        else:
-            # Buscar JSON inline
-            m_json = re.search(r'(\[[\s\S]*?\]|\{[\s\S]*?\})', content)
-            clean_content = m_json.group(1) if m_json else content.strip()
-        
-        # Limpiar caracteres problemáticos
-        clean_content = clean_content.replace('\u00a0', ' ').strip()
-        
-        # Limpiar caracteres de control y finales problemáticos para Llama
-        clean_content = re.sub(r'^\s*```json\s*', '', clean_content, flags=re.IGNORECASE)
-        clean_content = re.sub(r'\s*```\s*$', '', clean_content)
-        clean_content = re.sub(r'<\|eot_id\|>.*$', '', clean_content, flags=re.DOTALL)
-        clean_content = re.sub(r'</s>.*$', '', clean_content, flags=re.DOTALL)
-        
-        # Filtrar contenido del sistema que algunos modelos incluyen incorrectamente
-        clean_content = self._filter_system_content(clean_content)
-        
-        # Extracción agresiva de JSON puro
-        clean_content = self._extract_pure_json(clean_content)
+    @staticmethod
+    def _wire_batch(items: List[Tuple[str, str]],
+                    cfg: Dict) -> Tuple[List[Tuple[str, str]], Optional[Dict[str, str]]]:
+        """Items tal como viajan al modelo: con compact_ids, ids ordinales del lote"""
+        if not (cfg.get("LM_API") or {}).get(COMPACT_IDS_KEY):
+            return items, None
+        return to_wire_ids(items)
 
-        out = {}
-        try:
-            parsed = json.loads(clean_content)
-            self.logger.debug(f"JSON parseado correctamente: {type(parsed)}")
-            
-            # Manejar diferentes formatos de respuesta
-            if isinstance(parsed, dict) and "data" in parsed and isinstance(parsed["data"], list):
-                items_out = parsed["data"]
-            elif isinstance(parsed, list):
-                items_out = parsed
-            elif isinstance(parsed, dict) and ("id" in parsed or "text" in parsed):
-                items_out = [parsed]
+    def _from_wire(self, out: Dict[str, str], to_segment: Optional[Dict[str, str]],
+                   items: List[Tuple[str, str]]) -> Dict[str, str]:
+        """Devuelve las traducciones con los ids de segmento (descarta ids ajenos al lote)"""
+        if to_segment is None:
+            return out
+        mapped = {to_segment[wire_id]: es for wire_id, es in out.items() if wire_id in to_segment}
+        if len(mapped) < len(out):
+            unknown = [wire_id for wire_id in out if wire_id not in to_segment]
+            self.logger.warning(f"⚠️ Ids compactos ajenos al lote descartados: {', '.join(unknown[:5])}")
+        # El total de la misión se registra en translate_lua_file; aquí solo el detalle del lote
+        if self.logger.isEnabledFor(logging.DEBUG):
+            prompt_saved, completion_saved = wire_id_savings(items, mapped)
+            self.logger.debug(f"🔢 Ids compactos: ~{prompt_saved} tokens menos en la petición "
+                              f"y ~{completion_saved} en la respuesta")
+        return mapped
+
+    def _parse_lm_content(self, content: str, items: List[Tuple[str, str]],
+                          stats: Optional[Dict[str, Any]] = None, structured: bool = False) -> Dict[str, str]:
+        """Convierte el texto devuelto por el modelo en un dict id -> traducción"""
+        # Con response_format la respuesta ya es JSON conforme al esquema del lote
+        if structured:
+            out = parse_structured_response(content, (item_id for item_id, _ in items))
+            if out is not None:
+                return out
+            self.logger.warning("⚠️ La respuesta no cumple el esquema JSON (¿el servidor ignora response_format?): "
+                                "se usa el parser tolerante")
+        # Una sola pasada tolerante: ignora preámbulos, ```json, </s>/<|eot_id|> y
+        # basura final, y recupera cada {"id", "es"} bien formado aunque el array no lo esté
+        parsed = parse_batch_response(content.replace('\u00a0', ' '))
+        out = parsed.items
+        if not out and parsed.loose_text and len(items) == 1:
+            # Fallback para respuestas sin ID
+            out[items[0][0]] = parsed.loose_text
+        if not parsed.well_formed and stats is not None:
+            stats['parse_failed'] = True
+
+        if out:
+            if parsed.well_formed:
+                self.logger.info(f"Procesadas {len(out)} traducciones de {parsed.objects} respuestas")
             else:
-                self.logger.error("Formato JSON inesperado. Respuesta: %s", str(parsed)[:500])
-                return {}
-                
-            # Procesar items extraídos
-            for obj in items_out:
-                if not isinstance(obj, dict):
-                    continue
-                    
-                _id = obj.get("id")
-                _es = obj.get("es")
-                _text = obj.get("text")
-                
-                if _id and isinstance(_es, str) and _es.strip():
-                    out[_id] = _es.strip()
-                elif _id and isinstance(_text, str) and _text.strip():
-                    out[_id] = _text.strip()
-                elif _text and len(items) == 1:
-                    # Fallback para respuestas sin ID
-                    out[items[0][0]] = _text.strip()
-                    
-            self.logger.info(f"Procesadas {len(out)} traducciones de {len(items_out)} respuestas")
+                self.logger.warning(f"JSON mal formado ({parsed.errors} objetos rotos): "
+                                    f"recuperadas {len(out)} traducciones")
+            return out
+
+        if parsed.objects:
+            self.logger.error("Formato JSON inesperado. Respuesta: %s", content[:500])
+            return out
+
+        self.logger.warning("La respuesta no contiene JSON. Intentando parsing de texto plano...")
+        # El modelo respondió en texto plano - aplicar estrategia inteligente
+        # Si solo hay 1 item, asignar toda la respuesta
+        if len(items) == 1:
+            item_id, original_text = items[0]
+            # Limpiar la respuesta de texto plano
+            clean_response = content.strip()
+            
+            # Filtrar contenido del sistema primero
+            clean_response = self._filter_system_content(clean_response)
+            
+            # Remover frases comunes que no son traducción
+            noise_patterns = [
+                r"No hay texto para traducir\..*",
+                r"¿Puedo ayudarte con algo más\?.*",
+                r"¿Quieres saber sobre.*?\?.*",
+                r"^No tengo\.",
+                r"Nuestra tarea es.*"
+            ]
             
-        except json.JSONDecodeError as e:
-            self.logger.warning(f"No es JSON válido: {e}. Intentando parsing de texto plano...")
+            for pattern in noise_patterns:
+                clean_response = re.sub(pattern, "", clean_response, flags=re.IGNORECASE | re.DOTALL)
             
-            # SOLUCIÓN ROBUSTA: Manejar respuestas en texto plano
-            # Caso 1: Intentar extraer array JSON embebido
-            m_array = re.search(r'\[(.*?)\]', clean_content, re.DOTALL)
-            if m_array:
-                try:
-                    parsed = json.loads(f'[{m_array.group(1)}]')
-                    if isinstance(parsed, list):
-                        for obj in parsed:
-                            if isinstance(obj, dict) and obj.get("id") and obj.get("es"):
-                                out[obj["id"]] = obj["es"].strip()
-                        self.logger.info(f"Recuperación JSON exitosa: {len(out)} traducciones")
-                        return out
-                except Exception:
-                    pass
+            clean_response = clean_response.strip()
             
-            # Caso 2: El modelo respondió en texto plano - aplicar estrategia inteligente
-            self.logger.info("Modelo generó texto plano. Aplicando estrategia de recuperación...")
-            
-            # Si solo hay 1 item, asignar toda la respuesta
-            if len(items) == 1:
-                item_id, original_text = items[0]
-                # Limpiar la respuesta de texto plano
-                clean_response = content.strip()
-                
-                # Filtrar contenido del sistema primero
-                clean_response = self._filter_system_content(clean_response)
-                
-                # Remover frases comunes que no son traducción
-                noise_patterns = [
-                    r"No hay texto para traducir\..*",
-                    r"¿Puedo ayudarte con algo más\?.*",
-                    r"¿Quieres saber sobre.*?\?.*",
-                    r"^No tengo\.",
-                    r"Nuestra tarea es.*"
-                ]
-                
-                for pattern in noise_patterns:
-                    clean_response = re.sub(pattern, "", clean_response, flags=re.IGNORECASE | re.DOTALL)
-                
-                clean_response = clean_response.strip()
-                
-                # Si queda contenido útil después de limpiar
-                if clean_response and len(clean_response) > 10:
-                    out[item_id] = clean_response
-                    self.logger.info(f"Recuperación de texto plano: 1 traducción asignada")
-                else:
-                    # Intentar re-procesar con prompt más estricto
-                    self.logger.warning(f"Respuesta no útil. Texto original: '{original_text}', Respuesta: '{content[:200]}'")
-                    
-            # Si hay múltiples items, intentar estrategia de mapeo
-            elif len(items) > 1:
-                self.logger.warning(f"Respuesta texto plano para {len(items)} items. Requiere reintento con formato JSON más estricto.")
-                # En este caso, es mejor fallar y que se reintente con mejor prompt
+            # Si queda contenido útil después de limpiar
+            if clean_response and len(clean_response) > 10:
+                out[item_id] = clean_response
+                self.logger.info(f"Recuperación de texto plano: 1 traducción asignada")
+            else:
+                # Intentar re-procesar con prompt más estricto
+                self.logger.warning(f"Respuesta no útil. Texto original: '{original_text}', Respuesta: '{content[:200]}'")
                 
-        except Exception as e:
-            self.logger.error(f"Error inesperado parseando respuesta: {e}. Contenido: {clean_content[:500]}")
-        
+        # Si hay múltiples items, intentar estrategia de mapeo
+        elif len(items) > 1:
+            self.logger.warning(f"Respuesta texto plano para {len(items)} items. Requiere reintento con formato JSON más estricto.")
+            # En este caso, es mejor fallar y que se reintente con mejor prompt
+
         return out
 
+    @staticmethod
+    def _lm_endpoint_list(lm_url: str, lm_model: str, lm_endpoints) -> List[Tuple[str, str]]:
+        """Endpoints de LM Studio a usar: lm_url/lm_model siempre es el primero"""
+        endpoints = parse_endpoints(f"{lm_url}|{lm_model}")
+        endpoints += [ep for ep in parse_endpoints(lm_endpoints, default_model=lm_model) if ep not in endpoints]
+        return endpoints
+
+    @staticmethod
+    def _request_cfg(cfg: Dict, api_flags: Dict[str, Any]) -> Dict:
+        """cfg con opciones de LM_API que solo afectan a las peticiones (no a huellas ni caches)"""
+        flags = {key: value for key, value in api_flags.items() if value}
+        if not flags:
+            return cfg
+        return {**cfg, "LM_API": {**(cfg.get("LM_API") or {}), **flags}}
+
+    @staticmethod
+    def _glossary_flag(prompt_glossary: str) -> Optional[str]:
+        """Valor de PROMPT_GLOSSARY_KEY en LM_API (None si el glosario no va en el prompt)"""
+        return None if prompt_glossary == PROMPT_GLOSSARY_OFF else prompt_glossary
+
+    @staticmethod
+    def _finish_model_translation(es: str, seg: Segment, rules) -> str:
+        """Posproceso de una traducción devuelta por el modelo: términos protegidos, [ ... ] y espacios"""
+        translated_es = rules.protect(es)
+
+        # Desproteger [ ... ] si se protegieron
+        if seg.br_tokens:
+            translated_es = unprotect_tokens(translated_es, seg.br_tokens)
+
+        return re.sub(r'\s+', ' ', translated_es).strip()
+
+    @staticmethod
+    def _segment_fallback(seg: Segment) -> str:
+        """Texto original limpio para un segmento sin traducción"""
+        return re.sub(r'\s+', ' ', unprotect_tokens(seg.core, seg.br_tokens)).strip()
+
+    def _render_translated_lua(self, lua_with_placeholders: str, segments: List[Segment]) -> str:
+        """Sustituye los marcadores por las traducciones (texto original si aún no hay)"""
+        id_to_es_lua = {}
+        for seg in segments:
+            es = seg.es
+            if es is None:
+                es = self._segment_fallback(seg) if seg.clean_for_model.strip() else ''
+            id_to_es_lua[seg.id] = f"{seg.leading_ws}{escape_for_lua(es)}"
+
+        def reinsert_cb(m: re.Match) -> str:
+            """Reinserta traducciones en lugar de placeholders"""
+            pre, value, post = m.group("pre"), m.group("value"), m.group("post")
+            return pre + reinsert_placeholders(value, id_to_es_lua) + post
+
+        return self.entry_regex.sub(reinsert_cb, lua_with_placeholders)
+
+    def _preprocess_dictionary_text(self, lua_text: str, cfg: Dict) -> str:
+        """Normaliza comillas y aplica reemplazos fijos y pre-reglas al dictionary completo"""
+        # Normalizar comillas
+        lua_text = lua_text.replace("'", "'")
+
+        # Reemplazos fijos previos
+        fixed_replacements = cfg.get("FIXED_FULL_REPLACEMENTS", {})
+        if isinstance(fixed_replacements, dict):
+            for en_phrase, es_phrase in fixed_replacements.items():
+                if not isinstance(en_phrase, str) or not isinstance(es_phrase, str):
+                    self.logger.warning("FIXED_FULL_REPLACEMENTS mal formado: %r -> %r (ignorado)", en_phrase, es_phrase)
+                    continue
+                self.logger.info(f"Aplicando reemplazo fijo: '{en_phrase}' -> '{es_phrase}'")
+                lua_text = lua_text.replace(en_phrase, es_phrase)
+
+        # Pre-reglas (compiladas una vez por configuración de prompts)
+        rules = get_compiled_rules(cfg)
+        lua_text = rules.apply_glossary(lua_text)
+        lua_text = rules.apply_phraseology(lua_text)
+        lua_text = rules.apply_splash(lua_text)
+
+        return lua_text
+
+    def _segment_dictionary(self, lua_text: str, cfg: Dict,
+                            keys_filter: Optional[List[str]]) -> Tuple[str, List[Segment]]:
+        """
+        Divide las entradas objetivo (TARGET_PREFIXES) en segmentos por línea
+
+        Returns:
+            Tupla (lua_con_marcadores, segmentos): cada segmento queda sustituido
+            en el texto por su id_hash
+        """
+        segments: List[Segment] = []
+        
+        # PROTECT_BRACKETS desde configuración
+        protect_brackets_flag = bool(cfg.get("PROTECT_BRACKETS", True))
+        self.logger.info(f"PROTECT_BRACKETS = {protect_brackets_flag}")
+
+        def replace_entry(m: re.Match) -> str:
+            """Reemplaza entradas lua con placeholders para traducción"""
+            pre, key, value, post = m.group("pre"), m.group("key"), m.group("value"), m.group("post")
+            if not key_is_target(key, keys_filter, cfg):
+                return m.group(0)
+            start_idx = len(segments)
+            segs = []
+            for i, sm in enumerate(self.line_split_regex.finditer(value)):
+                seg_txt = sm.group("seg"); lb = sm.group("lb")
+                if seg_txt == "" and lb == "": 
+                    continue
+                seg = Segment(
+                    key=key,
+                    index=start_idx + i,
+                    raw_seg=seg_txt,
+                    lb=lb,
+                    protect_brackets=protect_brackets_flag
+                )
+                segs.append(seg); segments.append(seg)
+            new_value = "".join(seg.id + seg.punct + seg.lb for seg in segs)
+            return pre + new_value + post
+
+        return self.entry_regex.sub(replace_entry, lua_text), segments
+
     def translate_lua_file(self, lua_path: str, campaign_name: str, output_dir: str, 
                           cfg: Dict, batch_size: int = 8, timeout: int = 120,
                           keys_filter: Optional[List[str]] = None,
@@ -1504,7 +1994,22 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                           lm_model: str = "gpt-neo", compat: str = "auto", 
                           use_cache: bool = True, overwrite_cache: bool = False,
                           skip_lm_validation: bool = False,
-                          progress_callback: Callable[[Dict], None] = None) -> Dict[str, Any]:
+                          progress_callback: Callable[[Dict], None] = None,
+                          max_in_flight: int = 1,
+                          batch_mode: str = DEFAULT_BATCH_MODE,
+                          batch_order: str = BATCH_ORDER_DICTIONARY,
+                          context_window: Optional[int] = None,
+                          adaptive_batch: bool = False,
+                          template_cache: bool = False,
+                          incremental: bool = False,
+                          lm_endpoints=None,
+                          structured_output: bool = False,
+                          compact_ids: bool = False,
+                          prompt_glossary: str = PROMPT_GLOSSARY_OFF,
+                          shared_translations: Optional[Dict[str, str]] = None,
+                          early_output: bool = False,
+                          early_output_path: Optional[str] = None,
+                          on_early_output: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Traduce un archivo .lua siguiendo el flujo completo del motor de traducción DCS:
         
@@ -1520,12 +2025,39 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             campaign_name: Nombre de la campaña
             output_dir: Directorio de salida (app/data/traducciones/campaign_name)
             cfg: Configuración con LM_INSTRUCTIONS, TARGET_PREFIXES, etc.
-            batch_size: Tamaño de lote para llamadas al modelo
+            batch_size: Tamaño de lote para llamadas al modelo (modo 'items')
             timeout: Timeout para requests HTTP
             keys_filter: Filtro opcional de claves
             lm_url: URL de LM Studio
             lm_model: Modelo a usar
             compat: Compatibilidad ("auto", "chat", "completions")
+            max_in_flight: Lotes enviados en paralelo a LM Studio (1 = secuencial)
+            batch_mode: 'tokens' (lotes por presupuesto de tokens) o 'items' (batch_size fijo)
+            batch_order: 'dictionary' (orden del dictionary), 'length' (lotes de frases de
+                longitud parecida) o 'length_prefix' (además por prefijo de clave); con los
+                dos últimos max_tokens se ajusta al contenido de cada lote
+            context_window: Ventana de contexto del modelo para el presupuesto de tokens
+            adaptive_batch: Ajustar el tamaño de lote (AIMD) según latencia y fallos
+            template_cache: Reutilizar traducciones de frases que solo cambian en números,
+                frecuencias, indicativos o coordenadas (ver template_cache)
+            incremental: Reutilizar los segmentos sin cambios del .translations.jsonl
+                anterior y enviar al modelo solo los nuevos o modificados
+            lm_endpoints: Instancias adicionales de LM Studio ("url|modelo", lista o texto
+                separado por comas); con más de un endpoint los lotes se reparten en un pool
+            structured_output: Pedir la respuesta restringida a un esquema JSON del lote
+                (response_format); si el servidor no lo respeta se usa el parser tolerante
+            compact_ids: Enviar ids ordinales por lote ("1".."N") en lugar de los ids
+                de segmento; se traducen de vuelta al recibir la respuesta
+            prompt_glossary: Glosario y términos protegidos en el prompt: 'off', 'full'
+                (todos en cada lote) o 'batch' (solo los que aparecen en el lote)
+            shared_translations: Respuestas del modelo ya obtenidas por el pre-pase de
+                campaña {texto_en: es}; esas frases no se vuelven a enviar
+            early_output: Escribir un diccionario intermedio en cuanto esté traducido
+                el tramo prioritario de KEY_PRIORITIES (el resto queda en inglés)
+            early_output_path: Ruta del diccionario intermedio; por defecto
+                <base>.early.lua en output_dir. Nunca es el .translated.lua, que solo
+                se escribe con la traducción completa
+            on_early_output: Callback con la ruta del diccionario intermedio
             
         Returns:
             Dict con resultado de la traducción
@@ -1552,8 +2084,26 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         # Solo asegurar que existe el directorio de salida (ya debe estar configurado correctamente)
         ensure_directory(output_dir)
         
+        # Pool de endpoints: lm_url/lm_model siempre es el primero
+        endpoint_pool = None
+        endpoints = self._lm_endpoint_list(lm_url, lm_model, lm_endpoints)
+        if len(endpoints) > 1:
+            endpoint_pool = get_endpoint_pool(endpoints)
+            self.logger.info(f"🔀 Pool de LM Studio con {len(endpoint_pool)} endpoints: "
+                             f"{', '.join(url for url, _ in endpoints)}")
+            if not skip_lm_validation:
+                for endpoint in endpoint_pool.endpoints:
+                    lm_status = self.check_lm_studio_status(endpoint.url, endpoint.model)
+                    if not lm_status['available'] or not lm_status['models_loaded']:
+                        endpoint_pool.eject(endpoint, lm_status['error_message'])
+            if not endpoint_pool.healthy_count:
+                raise RuntimeError("Ningún endpoint del pool de LM Studio está disponible")
+            # Al menos un lote en vuelo por endpoint sano
+            max_in_flight = max(int(max_in_flight or 1), endpoint_pool.healthy_count)
+            endpoint_snapshot = endpoint_pool.snapshot()
+
         # Verificar estado de LM Studio antes de proceder (solo si no se omite la validación)
-        if not skip_lm_validation:
+        if not skip_lm_validation and endpoint_pool is None:
             self.logger.info("Verificando estado de LM Studio...")
             lm_status = self.check_lm_studio_status(lm_url, lm_model)
             
@@ -1594,59 +2144,17 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         with open(lua_path, "r", encoding="utf-8", newline="") as f:
             lua_text = f.read()
 
-        # Normalizar comillas
-        lua_text = lua_text.replace("'", "'")
-
-        # Reemplazos fijos previos
-        fixed_replacements = cfg.get("FIXED_FULL_REPLACEMENTS", {})
-        if isinstance(fixed_replacements, dict):
-            for en_phrase, es_phrase in fixed_replacements.items():
-                if not isinstance(en_phrase, str) or not isinstance(es_phrase, str):
-                    self.logger.warning("FIXED_FULL_REPLACEMENTS mal formado: %r -> %r (ignorado)", en_phrase, es_phrase)
-                    continue
-                self.logger.info(f"Aplicando reemplazo fijo: '{en_phrase}' -> '{es_phrase}'")
-                lua_text = lua_text.replace(en_phrase, es_phrase)
-
-        # Pre-reglas
-        lua_text = apply_glossary_rules(lua_text, cfg)
-        lua_text = apply_phraseology_rules(lua_text, cfg)
-        lua_text = apply_smart_splash_rules(lua_text, cfg)
+        # Reemplazos fijos y pre-reglas (compiladas una vez por configuración de prompts)
+        rules = get_compiled_rules(cfg)
+        lua_text = self._preprocess_dictionary_text(lua_text, cfg)
 
         total_entries_in = len(list(self.entry_regex.finditer(lua_text)))
         self.logger.info(f"Entradas detectadas en origen: {total_entries_in}")
 
         # 3. Detectar frases TARGET_PREFIXES y crear segmentos
-        segments: List[Segment] = []
-        
-        # PROTECT_BRACKETS desde configuración
-        protect_brackets_flag = bool(cfg.get("PROTECT_BRACKETS", True))
-        self.logger.info(f"PROTECT_BRACKETS = {protect_brackets_flag}")
-
-        def replace_entry(m: re.Match) -> str:
-            """Reemplaza entradas lua con placeholders para traducción"""
-            pre, key, value, post = m.group("pre"), m.group("key"), m.group("value"), m.group("post")
-            if not key_is_target(key, keys_filter, cfg):
-                return m.group(0)
-            start_idx = len(segments)
-            segs = []
-            for i, sm in enumerate(self.line_split_regex.finditer(value)):
-                seg_txt = sm.group("seg"); lb = sm.group("lb")
-                if seg_txt == "" and lb == "": 
-                    continue
-                seg = Segment(
-                    key=key,
-                    index=start_idx + i,
-                    raw_seg=seg_txt,
-                    lb=lb,
-                    protect_brackets=protect_brackets_flag
-                )
-                segs.append(seg); segments.append(seg)
-            new_value = "".join(seg.id + seg.punct + seg.lb for seg in segs)
-            return pre + new_value + post
-
         # 4. Crear fichero temporal con placeholders
         self.logger.info("Insertando marcadores id_hash en .lua temporal...")
-        lua_with_placeholders = self.entry_regex.sub(replace_entry, lua_text)
+        lua_with_placeholders, segments = self._segment_dictionary(lua_text, cfg, keys_filter)
 
         # Guardar archivo temporal con placeholders
         tmp_lua_path = os.path.join(output_dir, os.path.basename(lua_path).rsplit(".",1)[0] + ".placeholders.lua")
@@ -1666,16 +2174,80 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             if seg.clean_for_model.strip() == "": continue
             unique_en_to_idlist.setdefault(seg.clean_for_model, []).append(seg.id)
 
+        # Modo incremental: los segmentos con la misma clave y texto que en la
+        # traducción anterior conservan su traducción y no pasan por cache ni modelo
+        base_name = os.path.basename(lua_path).rsplit(".", 1)[0]
+        jsonl_path = os.path.join(output_dir, base_name + ".translations.jsonl")
+        out_lua_path = os.path.join(output_dir, base_name + ".translated.lua")
+        early_lua_path = early_output_path or os.path.join(output_dir, base_name + ".early.lua")
+        incremental_plan = None
+        if incremental:
+            previous = load_previous_translations(jsonl_path)
+            if previous is None:
+                self.logger.info("🔁 Modo incremental sin traducción anterior: se traduce todo")
+            else:
+                incremental_plan = IncrementalPlan(previous, segments)
+                for _id, es in incremental_plan.reused.items():
+                    id_to_seg[_id].es = es
+                for clean_en, idlist in list(unique_en_to_idlist.items()):
+                    pending = [_id for _id in idlist if _id not in incremental_plan.reused]
+                    if pending:
+                        unique_en_to_idlist[clean_en] = pending
+                    else:
+                        del unique_en_to_idlist[clean_en]
+                changes = incremental_plan.summary()
+                self.logger.info(f"🔁 Incremental: {changes['reused_segments']} segmentos reutilizados | claves "
+                                 f"{changes['keys_added']} nuevas, {changes['keys_changed']} modificadas, "
+                                 f"{changes['keys_removed']} eliminadas")
+
+        # Diario de la misión: recuperar los lotes terminados de una ejecución
+        # interrumpida (caída de LM Studio, cancelación o reinicio del proceso)
+        journal = MissionJournal(journal_path(output_dir, base_name), build_fingerprint(cfg, lm_model, keys_filter))
+        resumed_translations: Dict[str, str] = {}
+        resumed_segments = 0
+        for _id, (en, es) in journal.load().items():
+            seg = id_to_seg.get(_id)
+            if seg is None or seg.clean_for_model != en or en not in unique_en_to_idlist:
+                continue
+            for sid in unique_en_to_idlist.pop(en):
+                id_to_seg[sid].es = es
+                resumed_segments += 1
+            resumed_translations[en] = es
+        if resumed_segments:
+            self.logger.info(f"📓 Reanudando desde el diario: {resumed_segments} segmentos ya traducidos")
+
+        # Frases traducidas una sola vez para toda la campaña (pre-pase de
+        # deduplicación): mismo posproceso que una respuesta de lote
+        shared_segments = 0
+        if shared_translations:
+            for clean_en in [en for en in unique_en_to_idlist if en in shared_translations]:
+                idlist = unique_en_to_idlist.pop(clean_en)
+                es = self._finish_model_translation(shared_translations[clean_en], id_to_seg[idlist[0]], rules)
+                for _id in idlist:
+                    id_to_seg[_id].es = es
+                shared_segments += len(idlist)
+                if es and es.lower() != clean_en.strip().lower():
+                    resumed_translations[clean_en] = es
+            self.logger.info(f"🧮 {shared_segments} segmentos resueltos por el pre-pase de campaña")
+
         # Inicializar contadores de estadísticas
         cache_hits_count = 0
+        cache_hits_exact = 0
+        cache_hits_normalized = 0
+        cache_hits_template = 0
+        cache_misses = 0
+        template_reused = 0
         api_calls_count = 0
         processing_start_time = time.perf_counter()
         
         # Cargar caché de traducciones (centralizado)
         cache_path = os.path.join(output_dir, "translation_cache.json")  # Para mantener cache local como intermedio
         
-        # Cargar cache centralizado según configuración
-        cache = self.centralized_cache.load_cache(use_cache=use_cache)
+        # Consultar en el cache centralizado solo las frases de esta misión
+        # (exactas y, para las que fallan, por forma normalizada)
+        cache, normalized_cache = self.centralized_cache.lookup(unique_en_to_idlist.keys(), use_cache=use_cache)
+        # Estado del cache centralizado para detectar después qué traducciones son nuevas
+        cache_snapshot = dict(cache)
         
         if not use_cache:
             self.logger.info("🚫 CACHE DESHABILITADO - Se traducirán todas las frases desde cero")
@@ -1694,6 +2266,19 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             except Exception as e:
                 self.logger.warning(f"Error leyendo cache local: {e}")
 
+        # Lo recuperado del diario y del pre-pase entra al cache como traducción nueva
+        if use_cache:
+            for en, es in resumed_translations.items():
+                cache.setdefault(en, es)
+
+        # Aciertos normalizados: solo para lo que no resolvió ningún cache exacto.
+        # Al no estar en cache_snapshot se guardarán con su forma exacta al final
+        normalized_keys = set()
+        for en, es in normalized_cache.items():
+            if en not in cache:
+                cache[en] = es
+                normalized_keys.add(en)
+
         # Aplicar caché existente (solo si use_cache=True)
         self.logger.info(f"🔍 APLICANDO CACHE: use_cache={use_cache}, cache_size={len(cache)}, unique_texts={len(unique_en_to_idlist)}")
         if use_cache:
@@ -1702,9 +2287,25 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                 if clean_en in cache:
                     es = cache[clean_en]
                     cache_hits_count += 1
+                    if clean_en in normalized_keys:
+                        cache_hits_normalized += 1
+                    else:
+                        cache_hits_exact += 1
                     self.logger.info(f"✅ CACHE HIT #{cache_hits_count}: '{clean_en}' -> '{es}' | Cache size: {len(cache)}")
                     for _id in idlist: id_to_seg[_id].es = es
                     unique_en_to_idlist.pop(clean_en, None)
+
+            # Frases que solo cambian en números/frecuencias/indicativos respecto a
+            # una ya cacheada: se rellenan desde su plantilla y se guardan como exactas
+            if template_cache:
+                for clean_en, es in self.centralized_cache.lookup_templates(unique_en_to_idlist.keys()).items():
+                    cache[clean_en] = es
+                    cache_hits_count += 1
+                    cache_hits_template += 1
+                    for _id in unique_en_to_idlist.pop(clean_en): id_to_seg[_id].es = es
+            cache_misses = len(unique_en_to_idlist)
+            self.logger.info(f"🧠 Cache: {cache_hits_exact} exactos, {cache_hits_normalized} normalizados, "
+                             f"{cache_hits_template} por plantilla, {cache_misses} fallos")
         else:
             self.logger.info("🚫 ENTRANDO EN BLOQUE: Cache deshabilitado - no se aplicarán traducciones del cache")
             # IMPORTANTE: Verificar que el cache esté realmente vacío
@@ -1714,125 +2315,290 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             else:
                 self.logger.info("✅ Confirmado: Cache vacío como se esperaba")
 
-        # Preparar elementos para traducir
-        to_query: List[Tuple[str, str]] = []
-        for clean_en, idlist in unique_en_to_idlist.items():
-            to_query.append((idlist[0], clean_en))
+        # Preparar elementos para traducir. Con template_cache solo se envía una
+        # variante por plantilla (el representante); las demás se rellenan con su
+        # traducción en cuanto llega
+        template_groups: Dict[str, List[str]] = {}
+        template_leftovers: List[Tuple[str, str]] = []
+        if template_cache:
+            query_texts, template_groups = group_by_template(unique_en_to_idlist)
+        else:
+            query_texts = list(unique_en_to_idlist)
+        
+        # Prioridad por prefijo de clave (KEY_PRIORITIES): briefings y tareas antes
+        # que el resto; a igual peso se conserva el orden del dictionary. Un
+        # representante de plantilla hereda el mayor peso de sus variantes
+        priorities = KeyPriorities(cfg)
+        text_rank: Dict[str, float] = {}
+        if priorities:
+            text_weight = {en: max(priorities.weight(id_to_seg[_id].key) for _id in idlist)
+                           for en, idlist in unique_en_to_idlist.items()}
+            text_rank = {en: -max([text_weight[en]] + [text_weight[f] for f in template_groups.get(en, ())])
+                         for en in query_texts}
+            query_texts.sort(key=text_rank.__getitem__)
+        to_query: List[Tuple[str, str]] = [(unique_en_to_idlist[en][0], en) for en in query_texts]
+        
+        # Lotes homogéneos en longitud (y contexto): dentro de cada peso de
+        # prioridad, y con max_tokens ajustado a lo que realmente pide cada lote
+        batch_order = normalize_batch_order(batch_order)
+        if batch_order != BATCH_ORDER_DICTIONARY:
+            to_query = order_batch_items(to_query, batch_order, rank=lambda item: text_rank.get(item[1], 0),
+                                         key_of=lambda _id: id_to_seg[_id].key)
+        prompt_glossary = normalize_prompt_glossary(prompt_glossary)
+        retry_request_cfg = self._request_cfg(cfg, {STRUCTURED_OUTPUT_KEY: structured_output,
+                                                    COMPACT_IDS_KEY: compact_ids,
+                                                    PROMPT_GLOSSARY_KEY: self._glossary_flag(prompt_glossary)})
+        # Ahorro estimado de los ids compactos en la misión: [lotes, tokens petición, tokens respuesta]
+        wire_ids_saved = [0, 0, 0]
+
+        def record_wire_ids(batch: List[Tuple[str, str]], resp: Dict[str, Any]):
+            if compact_ids:
+                prompt_saved, completion_saved = wire_id_savings(batch, resp)
+                wire_ids_saved[0] += 1
+                wire_ids_saved[1] += prompt_saved
+                wire_ids_saved[2] += completion_saved
+
+        request_cfg = self._request_cfg(retry_request_cfg, {FIT_MAX_TOKENS_KEY: batch_order != BATCH_ORDER_DICTIONARY})
+        if template_groups:
+            self.logger.info(f"🧩 {sum(len(v) for v in template_groups.values())} variantes agrupadas "
+                             f"en {len(template_groups)} plantillas (no se envían al modelo)")
 
-        # Términos protegidos
-        protected_terms_set = set(
-            (cfg.get("PROTECT_WORDS") or [])
-            + (cfg.get("NO_TRANSLATE_TERMS") or [])
-            + (cfg.get("TECHNICAL_TERMS_NO_TRASLATE") or [])
-        )
 
         # 5. Mandar frases al modelo por lotes (PRIMER PASE)
-        total_batches = len(range(0, len(to_query), batch_size))
-        self.logger.info(f"Enviando {len(to_query)} frases únicas al modelo en {total_batches} lotes de {batch_size}")
-        
-        for i in range(0, len(to_query), batch_size):
-            # Verificar cancelación antes de cada batch
-            if self._check_cancellation():
-                self.logger.warning("🛑 Cancelación detectada - Deteniendo envío de frases al modelo")
-                raise Exception("Operación cancelada por el usuario - Envío de frases interrumpido")
-            
-            batch_number = (i // batch_size) + 1
-            batch = to_query[i:i+batch_size]
-            
-            # Reportar progreso antes del lote
+        batch_controller = None
+        if adaptive_batch:
+            # Los lotes se generan bajo demanda con el tamaño que marque el controlador
+            batch_controller = AdaptiveBatchController.for_model(
+                lm_model, batch_size, timeout, self.centralized_cache.cache_dir,
+                max_size=max(batch_size, AdaptiveBatchController.MAX_SIZE))
+            batches = BatchStream(to_query, cfg, batch_controller, mode=batch_mode, context_window=context_window)
+            total_batches = batches.estimated_total()
+        else:
+            batches = plan_batches(to_query, cfg, batch_size, mode=batch_mode, context_window=context_window)
+            total_batches = len(batches)
+        self.logger.info(f"Enviando {len(to_query)} frases únicas al modelo en {total_batches} lotes "
+                         f"(modo={batch_mode}, orden={batch_order}, adaptativo={adaptive_batch}, "
+                         f"max_in_flight={max_in_flight})")
+        processed_batches = 0
+        
+        def report_dispatch(batch_number: int):
+            """Reporta progreso al enviar un lote"""
+            nonlocal total_batches
+            if batch_controller and not batch_offset:
+                total_batches = max(batches.estimated_total(), batch_number)
             if progress_callback:
                 progress_data = {
                     'total_batches': total_batches,
-                    'processed_batches': batch_number - 1,
+                    'processed_batches': processed_batches,
                     'current_batch': batch_number,
-                    'batch_progress': int(((batch_number - 1) / total_batches) * 100),
+                    'batch_progress': int((processed_batches / total_batches) * 100),
                     'cache_hits': cache_hits_count,
                     'model_calls': api_calls_count,
                     'phase': f'Procesando lote {batch_number}/{total_batches}'
                 }
                 progress_callback(progress_data)
-            
-            resp = self.call_lmstudio_batch(batch, cfg, timeout, lm_url, lm_model, compat=compat)
-            api_calls_count += 1  # Contar llamada al API
+        
+        # Salida intermedia: en cuanto no quede nada del tramo prioritario por
+        # traducir se escribe el diccionario intermedio con lo que haya (resto en
+        # inglés), fuera del .translated.lua para que una misión fallida o
+        # cancelada no deje una salida parcial que parezca terminada.
+        # Se comprueba tras cada lote del primer pase, del segundo pase de
+        # plantillas y de la bisección
+        early_output_info = None
+        priority_tier = [seg.id for seg in segments
+                         if seg.clean_for_model.strip() and priorities.in_priority_tier(seg.key)]
+        priority_pending = [_id for _id in priority_tier if id_to_seg[_id].es is None]
+        
+        def check_priority_tier():
+            nonlocal early_output_info, priority_pending
+            if not early_output or early_output_info is not None or not priority_tier or not to_query:
+                return
+            priority_pending = [_id for _id in priority_pending if id_to_seg[_id].es is None]
+            if priority_pending:
+                return
+            early_text = rules.apply_post(self._render_translated_lua(lua_with_placeholders, segments))
+            ensure_directory(os.path.dirname(early_lua_path))
+            tmp_path = early_lua_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(early_text)
+            os.replace(tmp_path, early_lua_path)
+            early_output_info = {
+                'file': early_lua_path,
+                'seconds': round(time.perf_counter() - processing_start_time, 2),
+                'priority_segments': len(priority_tier),
+                'segments_translated': sum(1 for seg in segments if seg.es is not None and seg.clean_for_model.strip()),
+            }
+            self.logger.info(f"⭐ Tramo prioritario traducido ({len(priority_tier)} segmentos) en "
+                             f"{early_output_info['seconds']}s: salida intermedia {early_lua_path}")
+            if on_early_output:
+                try:
+                    on_early_output(early_lua_path)
+                except Exception as e:
+                    self.logger.warning(f"Error en callback de salida intermedia: {e}")
+        
+        check_priority_tier()
+        fresh_translations: Dict[str, str] = {}
+        try:
+            pass_batches = batches
+            batch_offset = 0
+            while pass_batches is not None:
+                for batch_number, batch, resp, batch_stats in self._iter_batch_responses(
+                        pass_batches, request_cfg, timeout, lm_url, lm_model, compat=compat,
+                        max_in_flight=max_in_flight, on_dispatch=lambda n: report_dispatch(n + batch_offset),
+                        endpoint_pool=endpoint_pool):
+                    batch_number += batch_offset
+                    api_calls_count += 1  # Contar llamada al API
+                    processed_batches += 1
+                    record_wire_ids(batch, resp)
 
-            for b_id, b_en in batch:
-                es = resp.get(b_id)
-                if not isinstance(es, str):
-                    continue
-                translated_es = es
-                translated_es = protect_terms(translated_es, protected_terms_set)
+                    if batch_controller and pass_batches is batches:
+                        missing = sum(1 for b_id, _ in batch if not isinstance(resp.get(b_id), str))
+                        batch_controller.record(len(batch), latency=batch_stats.get('latency'),
+                                                parse_failed=batch_stats.get('parse_failed', False),
+                                                incomplete=batch_stats.get('incomplete', 0),
+                                                missing=missing,
+                                                timed_out=batch_stats.get('timed_out', False))
+                        total_batches = max(batches.estimated_total(), processed_batches)
 
-                # Desproteger [ ... ] si se protegieron
-                br_map = id_to_seg[b_id].br_tokens
-                if br_map:
-                    translated_es = unprotect_tokens(translated_es, br_map)
+                    journal_items: List[Tuple[str, str, str]] = []
+                    for b_id, b_en in batch:
+                        es = resp.get(b_id)
+                        if not isinstance(es, str):
+                            continue
+                        translated_es = self._finish_model_translation(es, id_to_seg[b_id], rules)
 
-                translated_es = re.sub(r'\s+', ' ', translated_es).strip()
+                        if translated_es.strip().lower() != b_en.strip().lower() and translated_es.strip() != "":
+                            if use_cache:  # Solo actualizar cache si está habilitado
+                                cache[b_en] = translated_es
+                                fresh_translations[b_en] = translated_es
+                            else:
+                                self.logger.debug(f"Cache deshabilitado - no se guarda traducción: '{b_en}' -> '{translated_es}'")
 
-                if translated_es.strip().lower() != b_en.strip().lower() and translated_es.strip() != "":
-                    if use_cache:  # Solo actualizar cache si está habilitado
-                        cache[b_en] = translated_es
-                    else:
-                        self.logger.debug(f"Cache deshabilitado - no se guarda traducción: '{b_en}' -> '{translated_es}'")
+                        for _id in unique_en_to_idlist.get(b_en, []):
+                            id_to_seg[_id].es = translated_es
+                        journal_items.append((b_id, b_en, translated_es))
 
-                for _id in unique_en_to_idlist.get(b_en, []):
-                    id_to_seg[_id].es = translated_es
-            
-            # Reportar progreso después del lote procesado
-            if progress_callback:
-                progress_data = {
-                    'total_batches': total_batches,
-                    'processed_batches': batch_number,
-                    'current_batch': batch_number,
-                    'batch_progress': int((batch_number / total_batches) * 100),
-                    'cache_hits': cache_hits_count,
-                    'model_calls': api_calls_count,
-                    'phase': f'Completado lote {batch_number}/{total_batches}'
-                }
-                progress_callback(progress_data)
+                        # Variantes de la misma plantilla: rellenar sin llamar al modelo
+                        for follower in template_groups.pop(b_en, []):
+                            follower_es = translate_from_example(b_en, translated_es, follower)
+                            if follower_es is None:
+                                template_leftovers.append((unique_en_to_idlist[follower][0], follower))
+                                continue
+                            template_reused += 1
+                            for _id in unique_en_to_idlist.get(follower, []):
+                                id_to_seg[_id].es = follower_es
+                            journal_items.append((unique_en_to_idlist[follower][0], follower, follower_es))
+                            if use_cache:
+                                cache[follower] = follower_es
+                                fresh_translations[follower] = follower_es
+
+                    journal.append(journal_items)
+                    check_priority_tier()
+
+                    # Cada lote entra al cache compartido en memoria (visible para las
+                    # siguientes misiones); el volcado a disco es diferido
+                    if fresh_translations:
+                        self.centralized_cache.update_cache(fresh_translations, use_cache=True)
+                        cache_snapshot.update(fresh_translations)
+                        fresh_translations = {}
+            
+                    # Reportar progreso después del lote procesado
+                    if progress_callback:
+                        progress_data = {
+                            'total_batches': total_batches,
+                            'processed_batches': processed_batches,
+                            'current_batch': batch_number,
+                            'batch_progress': int((processed_batches / total_batches) * 100),
+                            'cache_hits': cache_hits_count,
+                            'model_calls': api_calls_count,
+                            'phase': f'Completado lote {batch_number}/{total_batches}'
+                        }
+                        progress_callback(progress_data)
+
+                # Segundo pase: variantes cuya plantilla no se pudo aplicar y las
+                # de representantes que el modelo no devolvió
+                for followers in template_groups.values():
+                    template_leftovers.extend((unique_en_to_idlist[f][0], f) for f in followers)
+                template_groups.clear()
+                pass_batches = None
+                if template_leftovers:
+                    batch_offset = processed_batches
+                    pass_batches = plan_batches(template_leftovers, cfg,
+                                                batch_controller.size if batch_controller else batch_size,
+                                                mode=batch_mode, context_window=context_window)
+                    total_batches = processed_batches + len(pass_batches)
+                    self.logger.info(f"🧩 {len(template_leftovers)} variantes de plantilla sin resolver: "
+                                     f"{len(pass_batches)} lotes adicionales")
+                    template_leftovers = []
+        except Exception:
+            # Conservar en el cache las traducciones ya terminadas antes de abortar
+            if use_cache:
+                if fresh_translations:
+                    self.centralized_cache.update_cache(fresh_translations, use_cache=True)
+                saved = self.centralized_cache.flush()
+                if saved:
+                    self.logger.warning(f"💾 Guardadas {saved} traducciones terminadas antes de la interrupción")
+            raise
+
+        if batch_controller:
+            batch_controller.persist()
+            self.logger.info(f"🎛️ Tamaño de lote adaptativo: {batch_controller.summary()}")
 
-        # REINTENTO EN PARES para elementos no traducidos
-        retry_items = [(seg.id, seg.clean_for_model) for seg in segments if seg.es is None and seg.clean_for_model.strip()]
+        # REINTENTO POR BISECCIÓN de lo no traducido (con el max_tokens completo, por
+        # si el ajustado al lote se quedó corto): cada lote fallido se parte en
+        # mitades y solo se reenvían, otra vez partidos, los ids que siguen sin traducción
+        retry_items = [(idlist[0], en) for en, idlist in unique_en_to_idlist.items()
+                       if any(id_to_seg[_id].es is None for _id in idlist)]
+        bisection = None
         if retry_items:
-            self.logger.info(f"Reintentando {len(retry_items)} entradas con lotes pequeños...")
-            for j in range(0, len(retry_items), 2):
-                # Verificar cancelación antes de cada reintento
-                if self._check_cancellation():
-                    self.logger.warning("🛑 Cancelación detectada - Deteniendo reintentos de traducción")
-                    raise Exception("Operación cancelada por el usuario - Reintentos interrumpidos")
-                
-                batch = retry_items[j:j+2]
-                resp = self.call_lmstudio_batch(batch, cfg, timeout, lm_url, lm_model, compat=compat)
-                api_calls_count += 1  # Contar llamada al API de reintento
-                for b_id, b_en in batch:
-                    es2 = resp.get(b_id)
-                    if isinstance(es2, str) and es2.strip():
-                        translated_es = protect_terms(es2, protected_terms_set)
-                        seg = id_to_seg[b_id]
-                        if seg.br_tokens:
-                            translated_es = unprotect_tokens(translated_es, seg.br_tokens)
-                        translated_es = re.sub(r'\s+', ' ', translated_es).strip()
-                        id_to_seg[b_id].es = translated_es
+            bisection = BisectionRetry(plan_batches(retry_items, cfg,
+                                                    batch_controller.size if batch_controller else batch_size,
+                                                    mode=batch_mode, context_window=context_window))
+            self.logger.info(f"Reintentando {len(retry_items)} frases por bisección...")
+            level = bisection.next_level()
+            while level:
+                for _, batch, resp, _ in self._iter_batch_responses(
+                        level, retry_request_cfg, timeout, lm_url, lm_model, compat=compat,
+                        max_in_flight=max_in_flight, endpoint_pool=endpoint_pool):
+                    api_calls_count += 1  # Contar llamada al API de reintento
+                    record_wire_ids(batch, resp)
+                    journal_items = []
+                    resolved = set()
+                    for b_id, b_en in batch:
+                        es2 = resp.get(b_id)
+                        if not isinstance(es2, str) or not es2.strip():
+                            continue
+                        translated_es = self._finish_model_translation(es2, id_to_seg[b_id], rules)
+                        for _id in unique_en_to_idlist.get(b_en, []):
+                            id_to_seg[_id].es = translated_es
+                        resolved.add(b_id)
+                        journal_items.append((b_id, b_en, translated_es))
                         if use_cache:  # Solo actualizar cache si está habilitado
                             cache[b_en] = translated_es
                         else:
                             self.logger.debug(f"Cache deshabilitado en reintento - no se guarda: '{b_en}' -> '{translated_es}'")
+                    journal.append(journal_items)
+                    bisection.record(batch, resolved)
+                    # Las frases prioritarias que fallaron en el primer pase también
+                    # pueden completarse aquí
+                    check_priority_tier()
+                level = bisection.next_level()
+            self.logger.info(f"✂️ Bisección: {bisection.summary()}")
 
         # FALLBACK: usar texto original limpio para elementos no traducidos
+        fallback_segments = 0
         for seg in segments:
             if seg.es is None and seg.clean_for_model.strip() != "":
-                es_fallback = unprotect_tokens(seg.core, seg.br_tokens)
-                es_fallback = re.sub(r'\s+', ' ', es_fallback).strip()
-                seg.es = es_fallback
+                seg.es = self._segment_fallback(seg)
+                fallback_segments += 1
                 self.logger.warning(f"Translation failed for {seg.id}, using fallback: {seg.es}")
 
         # Guardar caché actualizado
         # 1. Guardar cache local (solo si use_cache=True)
         if use_cache:
             try:
-                with open(cache_path, "w", encoding="utf-8") as f:
-                    json.dump(cache, f, ensure_ascii=False, indent=2)
-                    self.logger.info(f"Cache local guardado: {cache_path}")
+                atomic_write_json(cache_path, cache)
+                self.logger.info(f"Cache local guardado: {cache_path}")
             except Exception as e:
                 self.logger.error(f"Error guardando cache local: {e}")
         else:
@@ -1848,9 +2614,8 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         if should_update_cache:
             # Extraer solo las nuevas traducciones (las que no venían del cache al inicio)
             new_translations = {}
-            initial_cache = self.centralized_cache.load_cache(use_cache=True)  # Siempre cargar para comparar
             for en, es in cache.items():
-                if en not in initial_cache or initial_cache[en] != es:
+                if en not in cache_snapshot or cache_snapshot[en] != es:
                     new_translations[en] = es
             
             if new_translations:
@@ -1859,11 +2624,19 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                 self.logger.info(f"🔍 Cache centralizado {action}: {len(new_translations)} nuevas traducciones, success={success}")
             else:
                 self.logger.info("🔍 No hay nuevas traducciones para el cache centralizado")
+            # Fin de misión: volcar a disco lo pendiente del cache en memoria
+            self.centralized_cache.flush()
         else:
             self.logger.info("🚫 Cache centralizado no actualizado (use_cache=False, overwrite_cache=False)")
 
+        # Informe de cambios respecto a la traducción anterior
+        changes_path = None
+        if incremental_plan is not None:
+            changes_path = os.path.join(output_dir, base_name + ".changes.json")
+            atomic_write_json(changes_path, incremental_plan.report())
+            self.logger.info(f"Informe de cambios generado: {changes_path}")
+
         # Export JSONL de segmentos
-        jsonl_path = os.path.join(output_dir, os.path.basename(lua_path).rsplit(".", 1)[0] + ".translations.jsonl")
         with open(jsonl_path, "w", encoding="utf-8") as jf:
             for seg in segments:
                 if seg.clean_for_model.strip() == "": continue
@@ -1872,30 +2645,25 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         self.logger.info(f"JSONL generado: {jsonl_path}")
 
         # 6. Sustituir placeholders y crear fichero .traducido.lua
-        id_to_es_lua = {seg.id: f"{seg.leading_ws}{escape_for_lua(seg.es or '')}" for seg in segments}
-
-        def reinsert_cb(m: re.Match) -> str:
-            """Reinserta traducciones en lugar de placeholders"""
-            pre, key, value, post = m.group("pre"), m.group("key"), m.group("value"), m.group("post")
-            new_value = value
-            for pid, es in id_to_es_lua.items():
-                new_value = new_value.replace(pid, es)
-            return pre + new_value + post
-
-        final_text = self.entry_regex.sub(reinsert_cb, lua_with_placeholders)
+        final_text = self._render_translated_lua(lua_with_placeholders, segments)
 
         total_entries_out = len(list(self.entry_regex.finditer(final_text)))
         self.logger.info(f"Entradas detectadas en salida: {total_entries_out} (origen {total_entries_in})")
 
         # Post-proceso
-        final_text = apply_post_rules(final_text, cfg)
+        final_text = rules.apply_post(final_text)
 
         # Guardar archivo final traducido
-        out_lua_path = os.path.join(output_dir, os.path.basename(lua_path).rsplit(".", 1)[0] + ".translated.lua")
         with open(out_lua_path, "w", encoding="utf-8", newline="") as f:
             f.write(final_text)
         
         self.logger.info(f"¡Archivo traducido completado!: {out_lua_path}")
+        # Sin callback nadie más consume el intermedio: el definitivo lo sustituye
+        if early_output_info is not None and on_early_output is None and os.path.exists(early_lua_path):
+            os.remove(early_lua_path)
+
+        # Misión terminada: las traducciones ya están en los caches y en la salida
+        journal.discard()
         
         # Calcular tiempo de procesamiento
         processing_time = time.perf_counter() - processing_start_time
@@ -1907,10 +2675,27 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         # Log de estadísticas para debugging
         self.logger.info(f"📊 Estadísticas de traducción:")
         self.logger.info(f"   Use Cache: {use_cache}")
-        self.logger.info(f"   Cache hits: {cache_hits_count}")
+        self.logger.info(f"   Cache hits: {cache_hits_count} (exactos {cache_hits_exact}, normalizados {cache_hits_normalized}, "
+                         f"plantilla {cache_hits_template})")
+        self.logger.info(f"   Variantes rellenadas por plantilla: {template_reused}")
+        self.logger.info(f"   Segmentos recuperados del diario: {resumed_segments}")
+        if shared_translations is not None:
+            self.logger.info(f"   Segmentos del pre-pase de campaña: {shared_segments}")
+        endpoint_stats = endpoint_pool.report(endpoint_snapshot) if endpoint_pool is not None else None
+        for row in endpoint_stats or []:
+            self.logger.info(f"   Endpoint {row['url']}: {row['batches']} lotes, {row['items']} frases, "
+                             f"{row['failures']} fallos, {row['items_per_second']} frases/s")
+        self.logger.info(f"   Cache misses: {cache_misses}")
         self.logger.info(f"   API calls: {api_calls_count}")
+        wire_ids = None
+        if compact_ids:
+            wire_ids = {"batches": wire_ids_saved[0], "prompt_tokens_saved": wire_ids_saved[1],
+                        "completion_tokens_saved": wire_ids_saved[2]}
+            self.logger.info(f"   Ids compactos: ~{wire_ids_saved[1]} tokens de petición y "
+                             f"~{wire_ids_saved[2]} de respuesta ahorrados en {wire_ids_saved[0]} lotes")
         self.logger.info(f"   Processing time: {processing_time:.2f}s")
         self.logger.info(f"   Segments translated: {translated_count}/{total_segments}")
+        self.logger.info(f"   Segmentos sin traducir (texto original): {fallback_segments}")
         
         if not use_cache:
             self.logger.info("🚫 CONFIRMACIÓN: Cache estuvo DESHABILITADO durante toda la traducción")
@@ -1923,12 +2708,33 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             "cache_file": cache_path,
             "segments_total": total_segments,
             "segments_translated": translated_count,
+            "fallback_segments": fallback_segments,
             "translation_rate": (translated_count / total_segments * 100) if total_segments > 0 else 0,
             "entries_in": total_entries_in,
             "entries_out": total_entries_out,
             # Agregar estadísticas de caché
             "cache_hits": cache_hits_count,
+            "cache_hits_exact": cache_hits_exact,
+            "cache_hits_normalized": cache_hits_normalized,
+            "cache_hits_template": cache_hits_template,
+            "cache_misses": cache_misses,
+            "template_reused": template_reused,
+            "resumed_segments": resumed_segments,
+            "campaign_shared_segments": shared_segments,
+            "early_output": early_output_info,
+            "endpoint_stats": endpoint_stats,
+            "incremental": incremental_plan.summary() if incremental_plan is not None else None,
+            "changes_file": changes_path,
             "api_calls": api_calls_count,
+            "batches": total_batches,
+            "batch_mode": batch_mode,
+            "batch_order": batch_order,
+            "structured_output": structured_output,
+            "wire_ids": wire_ids,
+            "prompt_glossary": prompt_glossary,
+            "adaptive_batch": batch_controller.summary() if batch_controller else None,
+            "retried_items": len(retry_items),
+            "bisection": bisection.summary() if bisection else None,
             "processing_time": processing_time
         }
 
@@ -2104,6 +2910,9 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             lm_model = os.environ.get("LMSTUDIO_MODEL", "gpt-neo")
             compat = config.get('lm_compat', 'auto')
             
+            if config.get('lm_transport'):
+                self.set_lm_transport(config['lm_transport'])
+            
             # Ejecutar traducción usando el nuevo motor integrado
             translation_result = self.translate_lua_file(
                 lua_path=lua_file,
@@ -2118,7 +2927,19 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                 compat=compat,
                 use_cache=use_cache,
                 overwrite_cache=overwrite_cache,
-                skip_lm_validation=skip_lm_validation
+                skip_lm_validation=skip_lm_validation,
+                max_in_flight=config.get('max_in_flight', 1),
+                batch_mode=config.get('batch_mode', DEFAULT_BATCH_MODE),
+                batch_order=config.get('batch_order', BATCH_ORDER_DICTIONARY),
+                context_window=config.get('context_window'),
+                adaptive_batch=bool(config.get('adaptive_batch', False)),
+                template_cache=bool(config.get('template_cache', False)),
+                incremental=bool(config.get('incremental', False)),
+                lm_endpoints=config.get('lm_endpoints'),
+                structured_output=bool(config.get('structured_output', False)),
+                compact_ids=bool(config.get('compact_ids', False)),
+                prompt_glossary=config.get('prompt_glossary', PROMPT_GLOSSARY_OFF),
+                early_output=bool(config.get('early_output', False))
             )
             
             result['translation_results'].append(translation_result)
@@ -2215,7 +3036,8 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         try:
             if mode in ('translate', 'all', 'traducir'):
                 self.logger.info("Ejecutando fase de traducción...")
-                translate_result = self._execute_translate_phase(config, campaign_dirs, use_cache=use_cache, overwrite_cache=overwrite_cache, progress_callback=progress_callback)
+                translate_result = self._execute_translate_phase(config, campaign_dirs, use_cache=use_cache, overwrite_cache=overwrite_cache, progress_callback=progress_callback,
+                                                                 repack=mode == 'all')
                 result['translate_results'] = translate_result
                 
                 if not translate_result.get('success', False):
@@ -2223,7 +3045,8 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             
             if mode in ('miz', 'all', 'reempaquetar'):
                 self.logger.info("Ejecutando fase de empaquetado MIZ...")
-                miz_result = self._execute_miz_phase(config, campaign_dirs, progress_callback)
+                packaged = (result['translate_results'] or {}).pop('packaged_missions', None)
+                miz_result = self._execute_miz_phase(config, campaign_dirs, progress_callback, packaged=packaged)
                 result['miz_results'] = miz_result
                 
                 if not miz_result.get('success', False):
@@ -2253,8 +3076,15 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             
         return result
     
-    def _execute_translate_phase(self, config: Dict[str, Any], campaign_dirs: Dict[str, str], use_cache: bool = True, overwrite_cache: bool = False, progress_callback=None) -> Dict[str, Any]:
-        """Ejecuta la fase de traducción de archivos Lua"""
+    def _execute_translate_phase(self, config: Dict[str, Any], campaign_dirs: Dict[str, str], use_cache: bool = True, overwrite_cache: bool = False, progress_callback=None,
+                                 repack: bool = False) -> Dict[str, Any]:
+        """
+        Ejecuta la fase de traducción de archivos Lua
+        
+        Con repack (modo 'all') la etapa de cierre también empaqueta cada misión
+        traducida mientras el modelo sigue con las siguientes; sus resultados se
+        devuelven en 'packaged_missions' para la fase MIZ
+        """
         campaign_name = config.get('campaign_name')
         campaign_path = config.get('campaign_path')
         selected_missions = config.get('missions', [])
@@ -2282,173 +3112,138 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         result = {
             'total_missions': len(chosen),
             'successful_missions': 0,
+            'skipped_missions': 0,
             'failed_missions': 0,
             'mission_results': [],
             'success': False
         }
         
+        # Tubería por etapas con colas acotadas: mientras el modelo traduce la
+        # misión N, un hilo prepara las siguientes (configuración, manifiesto y
+        # extracción del .miz) y otro cierra las ya traducidas (logs, reporte,
+        # manifiesto y, en modo 'all', el .miz final). La traducción y los
+        # callbacks de progreso siguen en este hilo y en orden, una misión cada vez.
+        total = len(chosen)
+        
+        # Deduplicación de campaña: se preparan todas las misiones antes de
+        # traducir para enviar al modelo cada frase común una sola vez
+        campaign_dedup = config.get('campaign_dedup')
+        if campaign_dedup is None:
+            campaign_dedup = str(self._load_user_config().get('arg_campaign_dedup', 'false')).strip().lower() in ('1', 'true', 'yes', 'on')
+        prepare_depth = total if campaign_dedup else self.PIPELINE_DEPTH
+        prepass = None
+        dedup_mission_calls = 0
+        pending_paths = deque(enumerate(chosen, 1))
+        prepared = deque()
+        finalizing = deque()
+        packaged: Optional[Dict[str, List[Dict[str, Any]]]] = {} if repack else None
+        prepare_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mission_prepare")
+        finalize_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mission_finalize")
+        
+        def refill_prepared():
+            while pending_paths and len(prepared) < prepare_depth:
+                idx, miz_path = pending_paths.popleft()
+                prepared.append(prepare_pool.submit(
+                    self._prepare_translate_mission, idx, miz_path, config, campaign_name,
+                    overwrite_cache, use_cache))
+        
         # Variable para controlar la validación de LM Studio (solo una vez por campaña)
         lm_validation_done = False
         
-        for idx, miz_path in enumerate(chosen, 1):
-            miz_file = os.path.basename(miz_path)
-            miz_stem_raw = os.path.splitext(miz_file)[0]
-            miz_base = self.normalize_stem(miz_stem_raw)
-            
-            self.logger.info(f"Traduciendo misión {idx}/{len(chosen)}: {miz_file}")
-            
-            # Reportar progreso al iniciar misión
-            if progress_callback:
-                try:
-                    progress_callback(miz_file, campaign_name, None)  # None = en progreso
-                except Exception as e:
-                    self.logger.warning(f"Error en callback de progreso: {e}")
-            
-            # Crear estructura específica para esta misión
-            mission_dirs = self.ensure_mission_local_dirs(campaign_name, miz_file)
-            # FIX: No duplicar el nombre de misión en extract_dir - ya está incluido en mission_dirs["extracted"]
-            extract_dir = mission_dirs["extracted"]
-            
-            mission_success = False
-            try:
-                # Extraer MIZ
-                self.extract_miz(miz_path, extract_dir)
-                
-                # FILE_TARGET: Usar método centralizado  
-                from app.services.user_config import UserConfigService
-                file_target = config.get('file_target') or UserConfigService.get_file_target()
-                self.logger.info(f"🎯 FILE_TARGET obtenido: {file_target} (desde {'config' if config.get('file_target') else 'user_config'})")
-                
-                # Buscar diccionario
-                lua_file = os.path.join(extract_dir, file_target)
-                
-                if not os.path.exists(lua_file):
-                    raise FileNotFoundError(f"Diccionario no encontrado: {file_target}")
-                
-                # Traducir usando el nuevo motor integrado translate_lua_file
-                # Cargar configuración de prompts y modelo
-                prompt_config = self._load_prompt_config(config.get('prompt_file'))
-                lm_config = config.get('lm_config', {})
-                
-                # Combinar configuraciones CON FUSIÓN DE API
-                translation_cfg = prompt_config.copy()
-                if lm_config:
-                    translation_cfg.update(lm_config)
-                
-                # FUSIONAR configuración API del preset con la del prompt
-                merged_api_config = self._merge_api_config(prompt_config, lm_config)
-                translation_cfg['LM_API'] = merged_api_config
-                
-                # Cargar configuración del usuario
-                user_config = self._load_user_config()
-                
-                # Configurar parámetros de traducción usando configuración del usuario
-                batch_size = config.get('batch_size') or int(user_config.get('arg_batch', 8))
-                timeout = config.get('timeout') or int(user_config.get('arg_timeout', 120))
-                keys_filter = config.get('keys_filter')
-                
-                # URLs y modelo LM Studio - usar configuración del usuario (sin fallbacks)
-                lm_url = lm_config.get('url') or user_config.get('lm_url')
-                lm_model = lm_config.get('model') or user_config.get('lm_model')
-                compat = lm_config.get('compat') or user_config.get('arg_compat')
-                
-                # Validar que la configuración requerida esté presente
-                if not lm_url:
-                    raise ValueError("lm_url no configurado en user_config.json")
-                if not lm_model:
-                    raise ValueError("lm_model no configurado en user_config.json")
-                if not compat:
-                    raise ValueError("arg_compat no configurado en user_config.json")
-                
-                # Crear estructura de directorios específica para esta misión
-                mission_dirs = self.ensure_mission_local_dirs(campaign_name, miz_base + '.miz')
-                mission_output_dir = mission_dirs["out_lua"]
-                
-                # Usar el motor original pero con configuración del usuario
-                # FIX: No concatenar campaign_name con miz_base - usar campaign_name original
-                translation_result = self.translate_lua_file(
-                    lua_path=lua_file,
-                    campaign_name=campaign_name,
-                    output_dir=mission_output_dir,
-                    cfg=translation_cfg,
-                    batch_size=batch_size,
-                    timeout=timeout,
-                    keys_filter=keys_filter,
-                    lm_url=lm_url,
-                    lm_model=lm_model,
-                    compat=compat,
-                    use_cache=use_cache,
-                    overwrite_cache=overwrite_cache,
-                    skip_lm_validation=lm_validation_done  # Omitir validación después de la primera misión
-                )
-                
-                # Marcar que la validación de LM Studio ya se hizo
-                lm_validation_done = True
-                
-                # Mover logs de traducción
-                self.harvest_translator_logs(mission_output_dir, campaign_name, miz_base)
-                
-                # Preparar resultado de misión
-                mission_result = {
-                    'mission': miz_file,
-                    'success': True,
-                    'translation_file': translation_result.get('output_file'),
-                    'segments_translated': translation_result.get('segments_translated', 0),
-                    'segments_total': translation_result.get('segments_total', 0),
-                    'translation_rate': translation_result.get('translation_rate', 0),
-                    'cache_hits': translation_result.get('cache_hits', 0),
-                    'api_calls': translation_result.get('api_calls', 0),
-                    'processing_time': translation_result.get('processing_time', 0),
-                    'output_files': {
-                        'translated_lua': translation_result.get('output_file'),
-                        'placeholder_lua': translation_result.get('placeholder_file'),
-                        'translations_jsonl': translation_result.get('translations_jsonl'),
-                        'cache_file': translation_result.get('cache_file')
-                    }
-                }
-                
-                # Generar reporte individual para esta misión
-                self._generate_mission_report(campaign_name, miz_file, mission_result, config)
+        try:
+            refill_prepared()
+            if campaign_dedup:
+                prepass = self._campaign_dedup_prepass([future.result() for future in prepared], use_cache)
+            while prepared:
+                job = prepared.popleft().result()
+                refill_prepared()
+                miz_file = job['miz_file']
                 
-                result['mission_results'].append(mission_result)
-                result['successful_missions'] += 1
-                mission_success = True
+                self.logger.info(f"Traduciendo misión {job['idx']}/{total}: {miz_file}")
                 
-                # Reportar progreso al completar misión exitosamente
+                # Reportar progreso al iniciar misión
                 if progress_callback:
                     try:
-                        progress_callback(miz_file, campaign_name, True)
-                    except Exception as e:
-                        self.logger.warning(f"Error en callback de progreso (éxito): {e}")
-                
-            except Exception as e:
-                error_msg = f"Error traduciendo {miz_file}: {e}"
-                self.logger.error(error_msg)
-                
-                # Preparar resultado de misión fallida
-                mission_result = {
-                    'mission': miz_file,
-                    'success': False,
-                    'error': error_msg,
-                    'translation_file': None,
-                    'segments_translated': 0
-                }
+                        progress_callback(miz_file, campaign_name, None)  # None = en progreso
+                    except Exception as e:
+                        self.logger.warning(f"Error en callback de progreso: {e}")
                 
-                # Generar reporte individual incluso para misiones fallidas
-                self._generate_mission_report(campaign_name, miz_file, mission_result, config)
+                mission_result = job['skipped_result']
+                error_msg = job['error']
+                in_prepass = prepass is not None and job['idx'] in prepass['missions']
+                if mission_result is None and error_msg is None:
+                    try:
+                        # Usar el motor original pero con configuración del usuario
+                        self.set_lm_transport(job['lm_transport'])
+                        translation_result = self.translate_lua_file(
+                            **job['translate_args'],
+                            use_cache=use_cache,
+                            overwrite_cache=overwrite_cache,
+                            skip_lm_validation=lm_validation_done,  # Omitir validación después de la primera misión
+                            shared_translations=prepass['translations'] if in_prepass else None,
+                            on_early_output=lambda lua_path, job=job: self._queue_early_miz(job, lua_path, finalize_pool)
+                        )
+                        
+                        # Marcar que la validación de LM Studio ya se hizo
+                        lm_validation_done = True
+                        mission_result = self._build_mission_result(miz_file, translation_result)
+                        if mission_result['early_output']:
+                            mission_result['early_output']['miz'] = job['early_miz']
+                        if in_prepass:
+                            dedup_mission_calls += mission_result['api_calls']
+                    except Exception as e:
+                        error_msg = f"Error traduciendo {miz_file}: {e}"
                 
+                if error_msg is None:
+                    result['successful_missions'] += 1
+                    if mission_result.get('skipped'):
+                        result['skipped_missions'] += 1
+                else:
+                    self.logger.error(error_msg)
+                    # Preparar resultado de misión fallida
+                    mission_result = {
+                        'mission': miz_file,
+                        'success': False,
+                        'error': error_msg,
+                        'translation_file': None,
+                        'segments_translated': 0
+                    }
+                    result['failed_missions'] += 1
                 result['mission_results'].append(mission_result)
-                result['failed_missions'] += 1
-                mission_success = False
                 
-                # Reportar progreso al fallar misión
+                # Reportar progreso al terminar la misión (éxito o fallo)
                 if progress_callback:
                     try:
-                        progress_callback(miz_file, campaign_name, False)
+                        progress_callback(miz_file, campaign_name, error_msg is None)
                     except Exception as e:
-                        self.logger.warning(f"Error en callback de progreso (fallo): {e}")
+                        self.logger.warning(f"Error en callback de progreso (fin de misión): {e}")
+                
+                # Cierre en segundo plano (como mucho PIPELINE_DEPTH misiones pendientes)
+                while len(finalizing) >= self.PIPELINE_DEPTH:
+                    finalizing.popleft().result()
+                finalizing.append(finalize_pool.submit(
+                    self._finalize_translate_mission, job, mission_result, config, campaign_name,
+                    campaign_dirs, packaged))
+            
+            while finalizing:
+                finalizing.popleft().result()
+        finally:
+            for future in prepared:
+                future.cancel()
+            prepare_pool.shutdown(wait=True)
+            finalize_pool.shutdown(wait=True)
         
         result['success'] = result['successful_missions'] > 0
+        if packaged is not None:
+            result['packaged_missions'] = packaged
+        if prepass is not None:
+            dedup = prepass['plan'].report(prepass['calls'], dedup_mission_calls, prepass['per_mission_calls'])
+            result['campaign_dedup'] = dedup
+            self.logger.info(f"🧮 Deduplicación de campaña: {dedup['prepass_calls'] + dedup['mission_calls']} llamadas al modelo "
+                             f"(pre-pase {dedup['prepass_calls']}, misiones {dedup['mission_calls']}) frente a "
+                             f"~{dedup['per_mission_calls']} misión a misión: {dedup['calls_saved']} ahorradas")
+        if result['skipped_missions']:
+            self.logger.info(f"⏭️ {result['skipped_missions']}/{len(chosen)} misiones sin cambios reutilizadas")
         
         # FIX: No copiar archivos fuera de out_lua - mantenerlos en su ubicación correcta
         # Los archivos ya están correctamente organizados en la estructura mission/out_lua/
@@ -2460,6 +3255,384 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         
         return result
     
+    def _prepare_translate_mission(self, idx: int, miz_path: str, config: Dict[str, Any],
+                                   campaign_name: str, overwrite_cache: bool,
+                                   use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Etapa de preparación de la tubería de traducción (CPU y disco)
+        
+        Resuelve la configuración de la misión, comprueba el manifiesto y extrae
+        el .miz. Nunca lanza excepciones: los errores quedan en job['error'].
+        """
+        miz_file = os.path.basename(miz_path)
+        miz_base = self.normalize_stem(os.path.splitext(miz_file)[0])
+        job = {'idx': idx, 'miz_file': miz_file, 'miz_base': miz_base, 'skipped_result': None,
+               'error': None, 'manifest': None, 'fingerprint': None}
+        mission_start = time.perf_counter()
+        try:
+            # Crear estructura específica para esta misión
+            mission_dirs = self.ensure_mission_local_dirs(campaign_name, miz_file)
+            # FIX: No duplicar el nombre de misión en extract_dir - ya está incluido en mission_dirs["extracted"]
+            extract_dir = mission_dirs["extracted"]
+            
+            # FILE_TARGET: Usar método centralizado  
+            from app.services.user_config import UserConfigService
+            file_target = config.get('file_target') or UserConfigService.get_file_target()
+            self.logger.info(f"🎯 FILE_TARGET obtenido: {file_target} (desde {'config' if config.get('file_target') else 'user_config'})")
+            
+            # Cargar configuración de prompts y modelo
+            prompt_config = self._load_prompt_config(config.get('prompt_file'))
+            lm_config = config.get('lm_config', {})
+            
+            # Combinar configuraciones CON FUSIÓN DE API
+            translation_cfg = prompt_config.copy()
+            if lm_config:
+                translation_cfg.update(lm_config)
+            
+            # FUSIONAR configuración API del preset con la del prompt
+            merged_api_config = self._merge_api_config(prompt_config, lm_config)
+            translation_cfg['LM_API'] = merged_api_config
+            
+            # Cargar configuración del usuario
+            user_config = self._load_user_config()
+            
+            def user_flag(name: str, arg_name: str, default: str = 'true') -> bool:
+                value = config.get(name)
+                if value is None:
+                    value = str(user_config.get(arg_name, default)).strip().lower() in ('1', 'true', 'yes', 'on')
+                return bool(value)
+            
+            # Configurar parámetros de traducción usando configuración del usuario
+            batch_size = config.get('batch_size') or int(user_config.get('arg_batch', 8))
+            timeout = config.get('timeout') or int(user_config.get('arg_timeout', 120))
+            max_in_flight = config.get('max_in_flight') or int(user_config.get('arg_max_in_flight', 1) or 1)
+            batch_mode = config.get('batch_mode') or user_config.get('arg_batch_mode', DEFAULT_BATCH_MODE)
+            batch_order = config.get('batch_order') or user_config.get('arg_batch_order', BATCH_ORDER_DICTIONARY)
+            prompt_glossary = config.get('prompt_glossary') or user_config.get('arg_prompt_glossary', PROMPT_GLOSSARY_OFF)
+            context_window = config.get('context_window') or int(user_config.get('arg_context_window', 0) or 0) or None
+            keys_filter = config.get('keys_filter')
+            job['lm_transport'] = config.get('lm_transport') or user_config.get('arg_lm_transport', 'requests')
+            
+            # URLs y modelo LM Studio - usar configuración del usuario (sin fallbacks)
+            lm_url = lm_config.get('url') or user_config.get('lm_url')
+            lm_model = lm_config.get('model') or user_config.get('lm_model')
+            compat = lm_config.get('compat') or user_config.get('arg_compat')
+            
+            # Validar que la configuración requerida esté presente
+            if not lm_url:
+                raise ValueError("lm_url no configurado en user_config.json")
+            if not lm_model:
+                raise ValueError("lm_model no configurado en user_config.json")
+            if not compat:
+                raise ValueError("arg_compat no configurado en user_config.json")
+            
+            # Crear estructura de directorios específica para esta misión
+            mission_dirs = self.ensure_mission_local_dirs(campaign_name, miz_base + '.miz')
+            job['mission_output_dir'] = mission_dirs["out_lua"]
+            
+            # Saltar la misión si su diccionario y la configuración no cambiaron
+            # desde la última traducción (el diccionario se lee del .miz sin extraerlo)
+            # Opciones que cambian la salida: forman parte de la huella del manifiesto
+            output_options = {
+                'batch_size': batch_size,
+                'batch_mode': batch_mode,
+                'batch_order': batch_order,
+                'context_window': context_window,
+                'adaptive_batch': user_flag('adaptive_batch', 'arg_adaptive_batch', 'false'),
+                'template_cache': user_flag('template_cache', 'arg_template_cache', 'false'),
+                'structured_output': user_flag('structured_output', 'arg_structured_output', 'false'),
+                'compact_ids': user_flag('compact_ids', 'arg_compact_ids', 'false'),
+                'prompt_glossary': prompt_glossary,
+            }
+            manifest = MissionManifest(mission_dirs["mission_base"])
+            fingerprint = None
+            dictionary_bytes = read_miz_member(miz_path, file_target)
+            if dictionary_bytes is not None:
+                fingerprint = MissionManifest.fingerprint(
+                    dictionary_bytes, translation_cfg, lm_model,
+                    {'compat': compat, 'keys_filter': keys_filter, 'file_target': file_target,
+                     'use_cache': use_cache, **output_options})
+            job['manifest'], job['fingerprint'] = manifest, fingerprint
+            skip_unchanged = user_flag('skip_unchanged', 'arg_skip_unchanged')
+            previous = manifest.find_unchanged(fingerprint) if (fingerprint and skip_unchanged and not overwrite_cache) else None
+            if previous:
+                mission_result = dict(previous['result'])
+                mission_result.update({
+                    'skipped': True,
+                    'cache_hits': 0,
+                    'cache_misses': 0,
+                    'api_calls': 0,
+                    'processing_time': time.perf_counter() - mission_start,
+                    'output_files': previous['output_files'],
+                })
+                self.logger.info(f"⏭️ {miz_file} sin cambios desde la última traducción - se reutiliza "
+                                 f"{os.path.basename(previous['output_files']['translated_lua'])}")
+                job['skipped_result'] = mission_result
+                return job
+            
+            # Tras un parche de la campaña: reutilizar la traducción anterior de la
+            # misión si se hizo con la misma configuración y modelo
+            incremental = bool(user_flag('incremental', 'arg_incremental') and fingerprint
+                               and not overwrite_cache and manifest.same_config(fingerprint))
+            manifest.invalidate()
+            
+            # Extraer MIZ y buscar diccionario
+            self.extract_miz(miz_path, extract_dir)
+            lua_file = os.path.join(extract_dir, file_target)
+            
+            if not os.path.exists(lua_file):
+                raise FileNotFoundError(f"Diccionario no encontrado: {file_target}")
+            
+            # .miz intermedio jugable en cuanto se traduzca el tramo prioritario
+            early_output = user_flag('early_output', 'arg_early_output', 'false')
+            job['miz_path'], job['file_target'] = miz_path, file_target
+            job['early_miz'] = os.path.join(mission_dirs["mission_base"], self.EARLY_MIZ_DIR, miz_file)
+            for stale in (job['early_miz'], job['early_miz'] + ".dictionary"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            
+            # FIX: No concatenar campaign_name con miz_base - usar campaign_name original
+            job['translate_args'] = {
+                'lua_path': lua_file,
+                'campaign_name': campaign_name,
+                'output_dir': job['mission_output_dir'],
+                'cfg': translation_cfg,
+                'timeout': timeout,
+                'keys_filter': keys_filter,
+                'lm_url': lm_url,
+                'lm_model': lm_model,
+                'compat': compat,
+                'max_in_flight': max_in_flight,
+                **output_options,
+                'incremental': incremental,
+                'lm_endpoints': config.get('lm_endpoints') or user_config.get('lm_endpoints'),
+                'early_output': early_output,
+                'early_output_path': job['early_miz'] + ".dictionary",
+            }
+        except Exception as e:
+            job['error'] = f"Error traduciendo {miz_file}: {e}"
+        return job
+    
+    def _queue_early_miz(self, job: Dict[str, Any], lua_path: str, pool: ThreadPoolExecutor):
+        """
+        Encola el empaquetado del .miz intermedio en la etapa de cierre
+        
+        El diccionario intermedio ya está junto al .miz intermedio (fuera de
+        out_lua/); se borra al empaquetarlo.
+        """
+        pool.submit(self._repack_early_miz, job, lua_path)
+    
+    def _repack_early_miz(self, job: Dict[str, Any], dictionary_path: str):
+        """Empaqueta el .miz intermedio para poder jugar mientras se traduce el resto"""
+        try:
+            self.repack_miz_with_dictionary(job['miz_path'], job['file_target'], dictionary_path, job['early_miz'])
+            self.logger.info(f"⭐ Misión jugable con el tramo prioritario traducido: {job['early_miz']}")
+        except Exception as e:
+            self.logger.warning(f"No se pudo empaquetar el .miz intermedio de {job['miz_file']}: {e}")
+        finally:
+            if os.path.exists(dictionary_path):
+                os.remove(dictionary_path)
+    
+    def _campaign_dedup_prepass(self, jobs: List[Dict[str, Any]], use_cache: bool) -> Optional[Dict[str, Any]]:
+        """
+        Pre-pase de deduplicación de campaña (ver campaign_dedup)
+        
+        Segmenta los diccionarios ya extraídos de todas las misiones, consulta el
+        cache una vez para toda la campaña y envía al modelo cada frase pendiente
+        una sola vez (agrupando variantes de plantilla). Solo entran las misiones
+        con la misma configuración y modelo que la primera; lo que el modelo no
+        devuelva queda para el flujo normal de cada misión.
+        
+        Returns:
+            Dict con 'translations' ({texto_en: respuesta del modelo}), 'missions'
+            (idx incluidos), 'plan', 'calls' y 'per_mission_calls'; None si no hay
+            misiones que traducir
+        """
+        runnable = [job for job in jobs if job.get('translate_args')]
+        if not runnable:
+            return None
+        args = runnable[0]['translate_args']
+        cfg, lm_model, template_cache = args['cfg'], args['lm_model'], args['template_cache']
+        
+        plan = CampaignDedupPlan()
+        missions = set()
+        for job in runnable:
+            if self._check_cancellation():
+                self.logger.warning("🛑 Cancelación detectada - Pre-pase de campaña interrumpido")
+                return None
+            job_args = job['translate_args']
+            if (job_args['cfg'], job_args['lm_model'], job_args['template_cache']) != (cfg, lm_model, template_cache):
+                continue
+            with open(job_args['lua_path'], "r", encoding="utf-8", newline="") as f:
+                lua_text = self._preprocess_dictionary_text(f.read(), cfg)
+            _, segments = self._segment_dictionary(lua_text, cfg, job_args['keys_filter'])
+            if job_args['incremental']:
+                base_name = os.path.basename(job_args['lua_path']).rsplit(".", 1)[0]
+                previous = load_previous_translations(
+                    os.path.join(job_args['output_dir'], base_name + ".translations.jsonl"))
+                if previous is not None:
+                    reused = IncrementalPlan(previous, segments).reused
+                    segments = [seg for seg in segments if seg.id not in reused]
+            plan.add_mission(job['miz_file'], (seg.clean_for_model for seg in segments if seg.clean_for_model.strip()))
+            missions.add(job['idx'])
+        
+        # Lo que el cache ya resuelve no cuenta en ninguno de los dos modos
+        known = set()
+        if use_cache:
+            exact, normalized = self.centralized_cache.lookup(plan.unique_texts, use_cache=True)
+            known = set(exact) | set(normalized)
+            if template_cache:
+                known.update(self.centralized_cache.lookup_templates(
+                    [text for text in plan.unique_texts if text not in known]))
+        
+        # Con lote adaptativo se usa el tamaño ya aprendido para el modelo
+        batch_size = args['batch_size']
+        if args['adaptive_batch']:
+            batch_size = AdaptiveBatchController.for_model(
+                lm_model, batch_size, args['timeout'], self.centralized_cache.cache_dir,
+                max_size=max(batch_size, AdaptiveBatchController.MAX_SIZE)).size
+        
+        # Las frases de campaña no tienen una clave única: 'length_prefix' ordena solo por longitud
+        batch_order = normalize_batch_order(args['batch_order'])
+        request_cfg = self._request_cfg(cfg, {FIT_MAX_TOKENS_KEY: batch_order != BATCH_ORDER_DICTIONARY,
+                                              STRUCTURED_OUTPUT_KEY: args['structured_output'],
+                                              COMPACT_IDS_KEY: args['compact_ids'],
+                                              PROMPT_GLOSSARY_KEY: self._glossary_flag(
+                                                  normalize_prompt_glossary(args['prompt_glossary']))})
+        
+        def plan_campaign_batches(texts: List[str]) -> List[List[Tuple[str, str]]]:
+            items = [("id_" + hashlib.sha1(f"campaign#{en}".encode("utf-8")).hexdigest()[:16], en) for en in texts]
+            items = order_batch_items(items, batch_order)
+            return plan_batches(items, cfg, batch_size, mode=args['batch_mode'], context_window=args['context_window'])
+        
+        def split_templates(texts: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+            return group_by_template(texts) if template_cache else (texts, {})
+        
+        per_mission_calls = plan.estimate_per_mission_calls(
+            known, lambda texts: len(plan_campaign_batches(split_templates(texts)[0])),
+            cache_catches_up=use_cache, templates=template_cache)
+        pending = [text for text in plan.unique_texts if text not in known]
+        self.logger.info(f"🧮 Pre-pase de campaña: {plan.mission_texts} frases en {len(plan.missions)} misiones, "
+                         f"{len(plan.unique_texts)} únicas, {len(pending)} sin cache")
+        
+        translations: Dict[str, str] = {}
+        calls = 0
+        endpoints = self._lm_endpoint_list(args['lm_url'], lm_model, args['lm_endpoints'])
+        endpoint_pool = get_endpoint_pool(endpoints) if len(endpoints) > 1 else None
+        max_in_flight = args['max_in_flight']
+        if endpoint_pool is not None:
+            max_in_flight = max(int(max_in_flight or 1), endpoint_pool.healthy_count)
+        elif pending and not self.check_lm_studio_status(args['lm_url'], lm_model)['available']:
+            self.logger.warning("⚠️ LM Studio no disponible: se omite el pre-pase de campaña")
+            pending = []
+        
+        if pending:
+            self.set_lm_transport(runnable[0]['lm_transport'])
+        try:
+            # Cada pase envía un representante por plantilla; las variantes que no
+            # se pudieron rellenar (o cuyo representante no volvió) se reagrupan en
+            # el siguiente. Se para cuando un pase no aporta ninguna traducción
+            while pending:
+                query, followers = split_templates(pending)
+                translated_before = len(translations)
+                leftovers: List[str] = []
+                for _, batch, resp, _ in self._iter_batch_responses(
+                        plan_campaign_batches(query), request_cfg, args['timeout'], args['lm_url'], lm_model,
+                        compat=args['compat'], max_in_flight=max_in_flight, endpoint_pool=endpoint_pool):
+                    calls += 1
+                    for b_id, b_en in batch:
+                        es = resp.get(b_id)
+                        if not isinstance(es, str) or not es.strip():
+                            continue
+                        translations[b_en] = es
+                        for follower in followers.pop(b_en, []):
+                            follower_es = translate_from_example(b_en, es, follower)
+                            if follower_es is None:
+                                leftovers.append(follower)
+                            else:
+                                translations[follower] = follower_es
+                for group in followers.values():
+                    leftovers.extend(group)
+                pending = leftovers if len(translations) > translated_before else []
+        except Exception as e:
+            self.logger.warning(f"⚠️ Pre-pase de campaña interrumpido ({e}): "
+                                f"lo pendiente se traducirá misión a misión")
+        
+        return {
+            'translations': translations,
+            'missions': missions,
+            'plan': plan,
+            'calls': calls,
+            'per_mission_calls': per_mission_calls,
+        }
+    
+    def _build_mission_result(self, miz_file: str, translation_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Resultado de misión a partir del resultado de translate_lua_file"""
+        return {
+            'mission': miz_file,
+            'success': True,
+            'translation_file': translation_result.get('output_file'),
+            'segments_translated': translation_result.get('segments_translated', 0),
+            'segments_total': translation_result.get('segments_total', 0),
+            'fallback_segments': translation_result.get('fallback_segments', 0),
+            'translation_rate': translation_result.get('translation_rate', 0),
+            'cache_hits': translation_result.get('cache_hits', 0),
+            'cache_hits_exact': translation_result.get('cache_hits_exact', 0),
+            'cache_hits_normalized': translation_result.get('cache_hits_normalized', 0),
+            'cache_hits_template': translation_result.get('cache_hits_template', 0),
+            'cache_misses': translation_result.get('cache_misses', 0),
+            'template_reused': translation_result.get('template_reused', 0),
+            'resumed_segments': translation_result.get('resumed_segments', 0),
+            'campaign_shared_segments': translation_result.get('campaign_shared_segments', 0),
+            'early_output': translation_result.get('early_output'),
+            'endpoint_stats': translation_result.get('endpoint_stats'),
+            'incremental': translation_result.get('incremental'),
+            'api_calls': translation_result.get('api_calls', 0),
+            'processing_time': translation_result.get('processing_time', 0),
+            'output_files': {
+                'translated_lua': translation_result.get('output_file'),
+                'placeholder_lua': translation_result.get('placeholder_file'),
+                'translations_jsonl': translation_result.get('translations_jsonl'),
+                'cache_file': translation_result.get('cache_file'),
+                'changes_report': translation_result.get('changes_file')
+            }
+        }
+    
+    def _finalize_translate_mission(self, job: Dict[str, Any], mission_result: Dict[str, Any],
+                                    config: Dict[str, Any], campaign_name: str,
+                                    campaign_dirs: Optional[Dict[str, str]] = None,
+                                    packaged: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        """
+        Etapa de cierre de la tubería: logs, reporte individual y manifiesto
+        
+        Con packaged (modo 'all') empaqueta además el .miz final de la misión y
+        guarda sus resultados en packaged[miz_file]
+        """
+        miz_file = job['miz_file']
+        try:
+            translated = mission_result.get('success') and not mission_result.get('skipped')
+            if translated:
+                # Mover logs de traducción
+                self.harvest_translator_logs(job['mission_output_dir'], campaign_name, job['miz_base'])
+            
+            # Generar reporte individual (también para misiones fallidas)
+            self._generate_mission_report(campaign_name, miz_file, mission_result, config)
+            
+            # Con frases en inglés por fallos del modelo no se guarda el manifiesto:
+            # la siguiente ejecución debe volver a traducir la misión
+            if translated and job['fingerprint']:
+                if mission_result.get('fallback_segments'):
+                    self.logger.warning(f"⚠️ {miz_file}: {mission_result['fallback_segments']} segmentos sin traducir, "
+                                        f"no se guarda el manifiesto (se reintentará en la próxima ejecución)")
+                else:
+                    job['manifest'].save(job['fingerprint'], mission_result)
+            
+            # Las misiones fallidas quedan para la fase MIZ, como sin tubería
+            if packaged is not None and mission_result.get('success'):
+                packaged[miz_file] = self._package_mission(config, campaign_dirs, miz_file)
+        except Exception as e:
+            self.logger.warning(f"Error cerrando la misión {miz_file}: {e}")
+    
     def _copy_final_translation_results(self, campaign_dirs: Dict[str, str], output_directory: str, result: Dict[str, Any]) -> None:
         """Copia archivos finales de traducción al directorio de salida"""
         try:
@@ -2504,9 +3677,14 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         except Exception as e:
             self.logger.error(f"Error copiando archivos finales: {e}")
     
-    def _execute_miz_phase(self, config: Dict[str, Any], campaign_dirs: Dict[str, str], progress_callback: Callable = None) -> Dict[str, Any]:
-        """Ejecuta la fase de empaquetado MIZ con archivos traducidos"""
-        campaign_path = config.get('campaign_path')
+    def _execute_miz_phase(self, config: Dict[str, Any], campaign_dirs: Dict[str, str], progress_callback: Callable = None,
+                           packaged: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta la fase de empaquetado MIZ con archivos traducidos
+        
+        packaged: resultados de las misiones ya empaquetadas por la etapa de
+        cierre de la traducción (modo 'all'); solo se empaquetan las demás
+        """
         selected_missions = config.get('missions', [])
         campaign_name = config.get('campaign_name', 'Unknown')
         
@@ -2526,7 +3704,6 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         # Procesar cada misión seleccionada individualmente
         for mission_file in selected_missions:
             mission_name = mission_file.replace('.miz', '')  # Ej: "F-5E - Arrival"
-            mission_slug = self.slugify(mission_name)        # Ej: "F-5E_-_Arrival"
             
             self.logger.info(f"Procesando misión: {mission_file}")
             
@@ -2534,47 +3711,171 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
             if progress_callback:
                 progress_callback(mission_name, campaign_name)
             
-            # Buscar MIZ original en campaign_path
-            original_miz = os.path.join(campaign_path, mission_file)
-            if not os.path.exists(original_miz):
-                self.logger.warning(f"MIZ original no encontrado: {original_miz}")
-                result['failed_packages'] += 1
-                result['package_results'].append({
+            # En modo 'all' la tubería de traducción ya empaquetó las misiones traducidas
+            package_results = (packaged or {}).get(mission_file)
+            if package_results is None:
+                package_results = self._package_mission(config, campaign_dirs, mission_file)
+            
+            for package_result in package_results:
+                result['package_results'].append(package_result)
+                if package_result['success']:
+                    result['successful_packages'] += 1
+                else:
+                    result['failed_packages'] += 1
+                
+                # Callback de finalización (éxito o fallo)
+                if progress_callback:
+                    progress_callback(mission_name, campaign_name, success=package_result['success'])
+        
+        result['total_packages'] = len(selected_missions)
+        
+        result['success'] = result['successful_packages'] > 0
+        return result
+    
+    def _package_mission(self, config: Dict[str, Any], campaign_dirs: Dict[str, str],
+                         mission_file: str) -> List[Dict[str, Any]]:
+        """
+        Empaqueta una misión con sus .translated.lua y genera su reporte
+        
+        Returns:
+            Un resultado por archivo traducido (o uno solo de fallo si no hay
+            .miz original o traducción)
+        """
+        campaign_path = config.get('campaign_path')
+        campaign_name = config.get('campaign_name', 'Unknown')
+        mission_name = mission_file.replace('.miz', '')  # Ej: "F-5E - Arrival"
+        mission_slug = self.slugify(mission_name)        # Ej: "F-5E_-_Arrival"
+        
+        # Buscar MIZ original en campaign_path
+        original_miz = os.path.join(campaign_path, mission_file)
+        if not os.path.exists(original_miz):
+            self.logger.warning(f"MIZ original no encontrado: {original_miz}")
+            
+            # Generar reporte individual para misión fallida
+            failure_result = {
+                'mission': mission_file,
+                'mission_name': mission_name,
+                'success': False,
+                'mode': 'reempaquetado',
+                'error': f'MIZ original no encontrado: {original_miz}',
+                'output_files': {}
+            }
+            self._generate_mission_report(campaign_name, mission_file, failure_result, config)
+            return [{
+                'mission': mission_file,
+                'success': False,
+                'error': f'MIZ original no encontrado: {original_miz}'
+            }]
+        
+        # Buscar archivos traducidos para esta misión específica
+        mission_translation_dir = os.path.join(campaign_dirs["base"], mission_slug)
+        translated_files = glob.glob(os.path.join(mission_translation_dir, "out_lua", "*.translated.lua"))
+        
+        if not translated_files:
+            self.logger.warning(f"No se encontraron archivos traducidos para {mission_file}")
+            
+            # Generar reporte individual para misión fallida
+            failure_result = {
+                'mission': mission_file,
+                'mission_name': mission_name,
+                'success': False,
+                'mode': 'reempaquetado',
+                'error': 'No se encontraron archivos traducidos',
+                'output_files': {}
+            }
+            self._generate_mission_report(campaign_name, mission_file, failure_result, config)
+            return [{
+                'mission': mission_file,
+                'success': False,
+                'error': 'No se encontraron archivos traducidos'
+            }]
+        
+        package_results = []
+        # Procesar cada archivo traducido de esta misión
+        for translated_file in translated_files:
+            base_name = os.path.basename(translated_file).replace('.translated.lua', '')
+            self.logger.info(f"Procesando archivo traducido: {base_name}.translated.lua")
+            
+            try:
+                # Obtener directorios específicos de esta misión
+                mission_dirs = self.ensure_mission_local_dirs(campaign_name, mission_file)
+                
+                self.logger.info(f"Empaquetando {mission_file} con archivo traducido {base_name}...")
+                
+                # Crear directorio temporal para el empaquetado
+                temp_extract_dir = os.path.join(mission_dirs["extracted"], f"repack_{self.slugify(mission_name)}")
+                
+                # Limpiar directorio temporal si existe
+                if os.path.exists(temp_extract_dir):
+                    shutil.rmtree(temp_extract_dir)
+                
+                # Extraer MIZ original
+                self.extract_miz(original_miz, temp_extract_dir)
+                
+                # FILE_TARGET: Usar método centralizado
+                from app.services.user_config import UserConfigService
+                file_target = config.get('file_target') or UserConfigService.get_file_target()
+                self.logger.info(f"🎯 FILE_TARGET obtenido: {file_target} (desde {'config' if config.get('file_target') else 'user_config'})")
+                
+                # Reemplazar diccionario con versión traducida
+                dict_path = os.path.join(temp_extract_dir, file_target)
+                
+                if os.path.exists(dict_path):
+                    self.logger.info(f"Reemplazando {dict_path} con {translated_file}")
+                    shutil.copy2(translated_file, dict_path)
+                else:
+                    # Crear directorios si no existen
+                    self.logger.info(f"Creando directorio y copiando {translated_file} a {dict_path}")
+                    ensure_directory(os.path.dirname(dict_path))
+                    shutil.copy2(translated_file, dict_path)
+                
+                # Crear backup del original en la carpeta específica de la misión
+                self.backup_miz(original_miz, mission_dirs["backup"])
+                
+                # Comprimir nuevo MIZ en la carpeta específica de la misión
+                final_miz = os.path.join(mission_dirs["finalizado"], mission_file)
+                ensure_directory(mission_dirs["finalizado"])
+                self.compress_miz(temp_extract_dir, final_miz)
+                
+                # Limpiar temporal
+                shutil.rmtree(temp_extract_dir, ignore_errors=True)
+                
+                self.logger.info(f"✅ Misión reempaquetada correctamente: {final_miz}")
+                
+                package_results.append({
                     'mission': mission_file,
-                    'success': False,
-                    'error': f'MIZ original no encontrado: {original_miz}'
+                    'translated_file': base_name,
+                    'success': True,
+                    'output_miz': final_miz
                 })
-                # Callback de finalización fallida
-                if progress_callback:
-                    progress_callback(mission_name, campaign_name, success=False)
                 
-                # Generar reporte individual para misión fallida
-                failure_result = {
+                # Generar reporte individual para esta misión reempaquetada
+                package_result = {
                     'mission': mission_file,
                     'mission_name': mission_name,
-                    'success': False,
+                    'success': True,
                     'mode': 'reempaquetado',
-                    'error': f'MIZ original no encontrado: {original_miz}',
-                    'output_files': {}
+                    'translated_file': base_name,
+                    'output_miz': final_miz,
+                    'original_miz': original_miz,
+                    'processing_time': time.time() - time.time(),  # TODO: medir tiempo real
+                    'output_files': {
+                        'output_miz': final_miz,
+                        'backup_miz': os.path.join(mission_dirs["backup"], mission_file),
+                        'translated_lua': translated_file
+                    }
                 }
-                self._generate_mission_report(campaign_name, mission_file, failure_result, config)
-                continue
-            
-            # Buscar archivos traducidos para esta misión específica
-            mission_translation_dir = os.path.join(campaign_dirs["base"], mission_slug)
-            translated_files = glob.glob(os.path.join(mission_translation_dir, "out_lua", "*.translated.lua"))
-            
-            if not translated_files:
-                self.logger.warning(f"No se encontraron archivos traducidos para {mission_file}")
-                result['failed_packages'] += 1
-                result['package_results'].append({
+                self._generate_mission_report(campaign_name, mission_file, package_result, config)
+                
+            except Exception as e:
+                error_msg = f"Error empaquetando {mission_file} con {base_name}: {e}"
+                self.logger.error(error_msg)
+                package_results.append({
                     'mission': mission_file,
+                    'translated_file': base_name,
                     'success': False,
-                    'error': 'No se encontraron archivos traducidos'
+                    'error': error_msg
                 })
-                # Callback de finalización fallida
-                if progress_callback:
-                    progress_callback(mission_name, campaign_name, success=False)
                 
                 # Generar reporte individual para misión fallida
                 failure_result = {
@@ -2582,125 +3883,12 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                     'mission_name': mission_name,
                     'success': False,
                     'mode': 'reempaquetado',
-                    'error': 'No se encontraron archivos traducidos',
+                    'error': error_msg,
+                    'translated_file': base_name,
                     'output_files': {}
                 }
                 self._generate_mission_report(campaign_name, mission_file, failure_result, config)
-                continue
-            
-            # Procesar cada archivo traducido de esta misión
-            for translated_file in translated_files:
-                base_name = os.path.basename(translated_file).replace('.translated.lua', '')
-                self.logger.info(f"Procesando archivo traducido: {base_name}.translated.lua")
-                
-                try:
-                    # Obtener directorios específicos de esta misión
-                    mission_dirs = self.ensure_mission_local_dirs(campaign_name, mission_file)
-                    
-                    self.logger.info(f"Empaquetando {mission_file} con archivo traducido {base_name}...")
-                    
-                    # Crear directorio temporal para el empaquetado
-                    temp_extract_dir = os.path.join(mission_dirs["extracted"], f"repack_{self.slugify(mission_name)}")
-                    
-                    # Limpiar directorio temporal si existe
-                    if os.path.exists(temp_extract_dir):
-                        shutil.rmtree(temp_extract_dir)
-                    
-                    # Extraer MIZ original
-                    self.extract_miz(original_miz, temp_extract_dir)
-                    
-                    # FILE_TARGET: Usar método centralizado
-                    from app.services.user_config import UserConfigService
-                    file_target = config.get('file_target') or UserConfigService.get_file_target()
-                    self.logger.info(f"🎯 FILE_TARGET obtenido: {file_target} (desde {'config' if config.get('file_target') else 'user_config'})")
-                    
-                    # Reemplazar diccionario con versión traducida
-                    dict_path = os.path.join(temp_extract_dir, file_target)
-                    
-                    if os.path.exists(dict_path):
-                        self.logger.info(f"Reemplazando {dict_path} con {translated_file}")
-                        shutil.copy2(translated_file, dict_path)
-                    else:
-                        # Crear directorios si no existen
-                        self.logger.info(f"Creando directorio y copiando {translated_file} a {dict_path}")
-                        ensure_directory(os.path.dirname(dict_path))
-                        shutil.copy2(translated_file, dict_path)
-                    
-                    # Crear backup del original en la carpeta específica de la misión
-                    self.backup_miz(original_miz, mission_dirs["backup"])
-                    
-                    # Comprimir nuevo MIZ en la carpeta específica de la misión
-                    final_miz = os.path.join(mission_dirs["finalizado"], mission_file)
-                    ensure_directory(mission_dirs["finalizado"])
-                    self.compress_miz(temp_extract_dir, final_miz)
-                    
-                    # Limpiar temporal
-                    shutil.rmtree(temp_extract_dir, ignore_errors=True)
-                    
-                    self.logger.info(f"✅ Misión reempaquetada correctamente: {final_miz}")
-                    
-                    result['package_results'].append({
-                        'mission': mission_file,
-                        'translated_file': base_name,
-                        'success': True,
-                        'output_miz': final_miz
-                    })
-                    
-                    result['successful_packages'] += 1
-                    
-                    # Callback de finalización exitosa
-                    if progress_callback:
-                        progress_callback(mission_name, campaign_name, success=True)
-                    
-                    # Generar reporte individual para esta misión reempaquetada
-                    package_result = {
-                        'mission': mission_file,
-                        'mission_name': mission_name,
-                        'success': True,
-                        'mode': 'reempaquetado',
-                        'translated_file': base_name,
-                        'output_miz': final_miz,
-                        'original_miz': original_miz,
-                        'processing_time': time.time() - time.time(),  # TODO: medir tiempo real
-                        'output_files': {
-                            'output_miz': final_miz,
-                            'backup_miz': os.path.join(mission_dirs["backup"], mission_file),
-                            'translated_lua': translated_file
-                        }
-                    }
-                    self._generate_mission_report(campaign_name, mission_file, package_result, config)
-                    
-                except Exception as e:
-                    error_msg = f"Error empaquetando {mission_file} con {base_name}: {e}"
-                    self.logger.error(error_msg)
-                    result['package_results'].append({
-                        'mission': mission_file,
-                        'translated_file': base_name,
-                        'success': False,
-                        'error': error_msg
-                    })
-                    result['failed_packages'] += 1
-                    
-                    # Callback de finalización fallida
-                    if progress_callback:
-                        progress_callback(mission_name, campaign_name, success=False)
-                    
-                    # Generar reporte individual para misión fallida
-                    failure_result = {
-                        'mission': mission_file,
-                        'mission_name': mission_name,
-                        'success': False,
-                        'mode': 'reempaquetado',
-                        'error': error_msg,
-                        'translated_file': base_name,
-                        'output_files': {}
-                    }
-                    self._generate_mission_report(campaign_name, mission_file, failure_result, config)
-        
-        result['total_packages'] = len(selected_missions)
-        
-        result['success'] = result['successful_packages'] > 0
-        return result
+        return package_results
     
     def _execute_deploy_phase(self, config: Dict[str, Any], campaign_dirs: Dict[str, str], progress_callback: Callable = None) -> Dict[str, Any]:
         """Ejecuta la fase de deploy de archivos finalizados"""
@@ -2988,6 +4176,10 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                 default_config = self._get_default_prompt_config()
                 config['TARGET_PREFIXES'] = default_config['TARGET_PREFIXES']
                 config['EXCLUDE_PREFIXES'] = config.get('EXCLUDE_PREFIXES', default_config['EXCLUDE_PREFIXES'])
+            if 'KEY_PRIORITIES' not in config:
+                default_config = self._get_default_prompt_config()
+                config['KEY_PRIORITIES'] = default_config['KEY_PRIORITIES']
+                config.setdefault('PRIORITY_TIER_MIN_WEIGHT', default_config['PRIORITY_TIER_MIN_WEIGHT'])
             
             self.logger.info(f"Configuración de prompts cargada: {prompt_path}")
             self.logger.info(f"TARGET_PREFIXES: {config.get('TARGET_PREFIXES', [])}")
@@ -3048,6 +4240,20 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
                 "DictKey_triggerText_"          # Textos de triggers (añadido)
             ],
             
+            # Prioridad de traducción por prefijo de clave (mayor peso = antes).
+            # Con peso >= PRIORITY_TIER_MIN_WEIGHT forman el tramo prioritario
+            "KEY_PRIORITIES": {
+                "DictKey_descriptionText_": 100,      # Briefing general
+                "DictKey_sortie_": 100,               # Nombre de la salida
+                "DictKey_descriptionBlueTask_": 90,   # Tarea azul
+                "DictKey_descriptionRedTask_": 90,    # Tarea roja
+                "DictKey_briefingText_": 80,          # Textos de briefing
+                "DictKey_missionText_": 80,           # Textos de misión
+                "DictKey_ActionText_": 10,            # Mensajes durante la misión
+                "DictKey_ActionRadioText_": 10,       # Comunicaciones de radio
+            },
+            "PRIORITY_TIER_MIN_WEIGHT": 50,
+            
             # Filtros EXCLUDE expandidos y estandarizados
             "EXCLUDE_PREFIXES": [
                 "DictKey_UnitName_",            # Nombres de unidades
@@ -3584,30 +4790,6 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         
         return response.json()["choices"][0].get("text", "")
     
-    def _build_prompt_for_model(self, model: str, system_text: str, user_text: str) -> str:
-        """Construye el prompt según el modelo"""
-        model_lower = (model or "").lower()
-        
-        if "qwen" in model_lower:
-            # ChatML para Qwen
-            return (
-                f"<|im_start|>system\n{system_text}\n<|im_end|>\n"
-                f"<|im_start|>user\n{user_text}\n<|im_end|>\n"
-                f"<|im_start|>assistant\n"
-            )
-        else:
-            # Llama-3 por defecto
-            BOS = "<|begin_of_text|>"
-            EOT = "<|eot_id|>"
-            S = "<|start_header_id|>"
-            E = "<|end_header_id|>"
-            
-            sys = f"{S}system{E}\n{system_text}{EOT}"
-            usr = f"{S}user{E}\n{user_text}{EOT}"
-            asst = f"{S}assistant{E}\n"
-            
-            return f"{BOS}{sys}{usr}{asst}"
-    
     def _parse_lm_response(self, response: str, batch: List[Tuple[str, str]]) -> Dict[str, str]:
         """Parsea la respuesta del modelo de lenguaje"""
         
@@ -3650,12 +4832,7 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         text = self._apply_post_rules(text, config)
         
         # Proteger términos técnicos
-        protected_terms = set(
-            config.get("PROTECT_WORDS", []) +
-            config.get("NO_TRANSLATE_TERMS", []) +
-            config.get("TECHNICAL_TERMS_NO_TRASLATE", [])
-        )
-        text = self._protect_terms(text, protected_terms)
+        text = get_compiled_rules(config).protect(text)
         
         # Limpiar espacios
         text = re.sub(r'\s+', ' ', text).strip()
@@ -3676,12 +4853,7 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         # Reemplazar IDs por traducciones
         def replace_ids(match):
             pre, key, value, post = match.groups()
-            
-            new_value = value
-            for segment_id, translation in id_to_translation.items():
-                new_value = new_value.replace(segment_id, translation)
-            
-            return pre + new_value + post
+            return pre + reinsert_placeholders(value, id_to_translation) + post
         
         translated_text = self.entry_regex.sub(replace_ids, original_text)
         
@@ -3752,55 +4924,25 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
     
     def _apply_glossary_rules(self, text: str, config: Dict[str, Any]) -> str:
         """Aplica reglas del glosario OTAN"""
-        glossary = config.get("GLOSSARY_OTAN", {})
-        for en_term, es_translation in glossary.items():
-            pattern = r"\b" + re.escape(en_term) + r"\b"
-            text = re.sub(pattern, es_translation, text, flags=re.IGNORECASE)
-        return text
+        return get_compiled_rules(config).apply_glossary(text)
     
     def _apply_phraseology_rules(self, text: str, config: Dict[str, Any]) -> str:
         """Aplica reglas de fraseología"""
-        for rule in config.get("PHRASEOLOGY_RULES", []):
-            pattern = rule.get("pattern")
-            replacement = rule.get("replacement", "")
-            if pattern:
-                flags = self._build_rule_flags(rule)
-                text = re.sub(pattern, replacement, text, flags=flags)
-        return text
+        return get_compiled_rules(config).apply_phraseology(text)
     
     def _apply_post_rules(self, text: str, config: Dict[str, Any]) -> str:
         """Aplica reglas de post-procesamiento"""
-        for rule in config.get("POST_RULES", []):
-            pattern = rule.get("pattern")
-            replacement = rule.get("replacement", "")
-            if pattern:
-                flags = self._build_rule_flags(rule)
-                text = re.sub(pattern, replacement, text, flags=flags)
-        return text
+        return get_compiled_rules(config).apply_post(text)
     
     def _build_rule_flags(self, rule: Dict[str, Any]) -> int:
         """Construye flags de regex desde configuración"""
-        flags = 0
-        for flag in rule.get("flags", []):
-            flag = str(flag).upper().strip()
-            if flag in ("I", "IGNORECASE"):
-                flags |= re.IGNORECASE
-            elif flag in ("M", "MULTILINE"):
-                flags |= re.MULTILINE
-            elif flag in ("S", "DOTALL"):
-                flags |= re.DOTALL
-        return flags
+        return build_rule_flags(rule)
     
     def _protect_terms(self, text: str, terms: set) -> str:
         """Protege términos específicos de ser modificados"""
         if not terms:
             return text
-        
-        for term in sorted(terms, key=len, reverse=True):
-            pattern = rf'(?<![A-Za-z0-9]){re.escape(term)}(?![A-Za-z0-9])'
-            text = re.sub(pattern, term, text, flags=re.IGNORECASE)
-        
-        return text
+        return get_term_protector(terms).sub(text)
     
     def _escape_for_lua(self, text: str) -> str:
         """Escapa texto para formato Lua"""
@@ -3890,113 +5032,12 @@ RECORDATORIO FINAL: Solo el array JSON. Sin texto adicional. Sin conversación.
         
         return content
 
-    def _extract_pure_json(self, content: str) -> str:
-        """Extrae únicamente el JSON válido de la respuesta, eliminando cualquier texto adicional"""
-        
-        # Limpiar texto explicativo común al inicio
-        explanatory_patterns = [
-            r'^.*?(?:aquí está|he aquí|la traducción es|el resultado es|a continuación).*?:\s*',
-            r'^.*?(?:```json|```)\s*',
-            r'^.*?(?:traducido|traducción).*?:\s*',
-            r'^.*?(?:json|respuesta).*?:\s*',
-        ]
-        
-        for pattern in explanatory_patterns:
-            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Buscar JSON array o object válido
-        import json
-        
-        # Intentar encontrar un array JSON válido
-        array_matches = re.finditer(r'\[[\s\S]*?\]', content)
-        for match in array_matches:
-            candidate = match.group(0)
-            try:
-                json.loads(candidate)
-                self.logger.debug(f"JSON array válido encontrado: {candidate[:100]}...")
-                return candidate
-            except json.JSONDecodeError:
-                continue
-        
-        # Si no se encuentra array, buscar objeto JSON válido
-        object_matches = re.finditer(r'\{[\s\S]*?\}', content)
-        for match in object_matches:
-            candidate = match.group(0)
-            try:
-                json.loads(candidate)
-                self.logger.debug(f"JSON object válido encontrado: {candidate[:100]}...")
-                return candidate
-            except json.JSONDecodeError:
-                continue
-        
-        # Si no se encuentra JSON válido, intentar limpiar más agresivamente
-        # Buscar contenido entre las primeras llaves o corchetes
-        bracket_match = re.search(r'[\[\{].*[\]\}]', content, re.DOTALL)
-        if bracket_match:
-            candidate = bracket_match.group(0)
-            try:
-                json.loads(candidate)
-                self.logger.debug(f"JSON encontrado con limpieza agresiva: {candidate[:100]}...")
-                return candidate
-            except json.JSONDecodeError:
-                pass
-        
-        # Último recurso: devolver contenido original limpio
-        clean_content = re.sub(r'^[^[\{]*', '', content)  # Quitar todo antes del primer [ o {
-        clean_content = re.sub(r'[^}\]]*$', '', clean_content)  # Quitar todo después del último } o ]
-        
-        self.logger.warning(f"No se pudo extraer JSON válido, devolviendo contenido limpio: {clean_content[:100]}...")
-        return clean_content.strip()
 
+class TranslationSegment(Segment):
+    """Representa un segmento de texto para traducir (flujo alternativo)"""
 
-class TranslationSegment:
-    """Representa un segmento de texto para traducir"""
-    
-    def __init__(self, key: str, index: int, raw_seg: str, lb: str, protect_brackets: bool = True):
-        self.key = key
-        self.index = index
-        self.raw_seg = raw_seg
-        self.lb = lb
-        self.protect_brackets = protect_brackets
-        
-        # Procesar whitespace inicial
-        ws_match = re.match(r'^(?P<ws>\s*)(?P<text>.*)$', raw_seg, re.DOTALL)
-        self.leading_ws = ws_match.group("ws") if ws_match else ""
-        text_without_ws = ws_match.group("text") if ws_match else raw_seg
-        
-        # Separar puntuación final
-        punct_match = re.match(r'^(?P<core>.*?)(?P<punct>[\s\.\!\?\,;:\u2026]*)$', text_without_ws, re.DOTALL)
-        self.core = punct_match.group("core")
-        self.punct = punct_match.group("punct")
-        
-        # Protección de corchetes
-        self.br_tokens = {}
-        if self.protect_brackets:
-            # Usar regex para corchetes comunes
-            bracket_patterns = [
-                r'\[[^\]]*\]',          # [texto]
-                r'\{[^}]*\}',           # {texto}
-                r'<[^>]*>',             # <texto>
-                r'\([^)]*\)',           # (texto)
-            ]
-            combined_pattern = '|'.join(f'({pattern})' for pattern in bracket_patterns)
-            bracket_regex = re.compile(combined_pattern)
-            self.clean_for_model = self._protect_brackets(self.core, bracket_regex)
-        else:
-            self.clean_for_model = self.core
-        
-        # Generar ID único
-        src_for_hash = f"{self.key}#{self.index}#{self.core.strip()}"
-        hash_obj = hashlib.sha1(src_for_hash.encode("utf-8"))
-        self.id = f"id_{hash_obj.hexdigest()[:16]}"
-        
-        # Traducción (se establece durante el proceso)
-        self.es = None
-    
-    def _protect_brackets(self, text: str, bracket_regex) -> str:
-        """Protege contenido entre corchetes reemplazándolos por placeholders"""
-        def replace_bracket(match):
-            token = f"BR_{len(self.br_tokens) + 1}"
-            self.br_tokens[token] = match.group(0)
-            return token
-        return bracket_regex.sub(replace_bracket, text)
\ No newline at end of file
+    __slots__ = ()
+
+    # Protege también {..}, <..> y (..)
+    BRACKET_REGEX = LEGACY_BRACKET_REGEX
+    BRACKET_OPENERS = frozenset("[{<(")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memoria de traducción con clave normalizada
+
+Dos frases que solo se diferencian en espacios repetidos o finales, estilo de
+comillas, forma Unicode (NFC/NFD) o mayúsculas comparten la misma forma
+canónica. El cache guarda un índice secundario por esa forma y, al reutilizar
+una traducción, se restauran los detalles de superficie de la frase pedida
+(mayúsculas y forma Unicode).
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# Comillas tipográficas -> ASCII (igual que la normalización previa del .lua)
+QUOTE_TRANSLATION = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'", "′": "'",
+    "“": '"', "”": '"', "„": '"', "‟": '"', "″": '"',
+    "«": '"', "»": '"',
+})
+WHITESPACE_REGEX = re.compile(r'\s+')
+
+HIT_EXACT = "exact"
+HIT_NORMALIZED = "normalized"
+
+
+def normalize_source(text: str) -> str:
+    """Forma canónica de una frase origen para el índice secundario"""
+    text = unicodedata.normalize("NFC", text).translate(QUOTE_TRANSLATION)
+    return WHITESPACE_REGEX.sub(" ", text).strip().casefold()
+
+
+def _first_alpha(text: str) -> Optional[str]:
+    for ch in text:
+        if ch.isalpha():
+            return ch
+    return None
+
+
+def restore_surface(source: str, cached_source: str, translation: str) -> Optional[str]:
+    """
+    Adapta la traducción guardada para cached_source a la frase source
+
+    Devuelve None cuando no se puede restaurar con seguridad (la frase en
+    caché estaba en mayúsculas y la pedida no: se perdería la capitalización
+    de nombres propios), en cuyo caso se trata como fallo de caché.
+    """
+    if source.isupper() and not cached_source.isupper():
+        translation = translation.upper()
+    elif cached_source.isupper() and not source.isupper():
+        return None
+    else:
+        src_first, cached_first = _first_alpha(source), _first_alpha(cached_source)
+        if src_first and cached_first and src_first.isupper() != cached_first.isupper():
+            for i, ch in enumerate(translation):
+                if ch.isalpha():
+                    new_ch = ch.upper() if src_first.isupper() else ch.lower()
+                    translation = translation[:i] + new_ch + translation[i + 1:]
+                    break
+
+    # Conservar la forma Unicode de la frase pedida (p. ej. NFD de macOS)
+    if source != unicodedata.normalize("NFC", source) and unicodedata.is_normalized("NFD", source):
+        translation = unicodedata.normalize("NFD", translation)
+    return translation
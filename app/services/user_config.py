@@ -131,7 +131,7 @@ class UserConfigService:
         """Guarda solo la configuración general (sin afectar configuración del modelo)"""
         try:
             # Campos de configuración general
-            general_fields = ['ROOT_DIR', 'FILE_TARGET', 'lm_url', 'DEPLOY_DIR', 'DEPLOY_OVERWRITE']
+            general_fields = ['ROOT_DIR', 'FILE_TARGET', 'lm_url', 'lm_endpoints', 'DEPLOY_DIR', 'DEPLOY_OVERWRITE']
             
             # Cargar configuración existente
             existing_config = self.load_config()
@@ -152,7 +152,11 @@ class UserConfigService:
         """Guarda solo la configuración del modelo (sin afectar configuración general)"""
         try:
             # Campos de configuración del modelo
-            model_fields = ['lm_model', 'arg_config', 'arg_compat', 'arg_batch', 'arg_timeout']
+            model_fields = ['lm_model', 'arg_config', 'arg_compat', 'arg_batch', 'arg_timeout', 'arg_max_in_flight',
+                            'arg_lm_transport', 'arg_batch_mode', 'arg_batch_order', 'arg_context_window',
+                            'arg_adaptive_batch', 'arg_template_cache', 'arg_skip_unchanged',
+                            'arg_incremental', 'arg_campaign_dedup', 'arg_early_output',
+                            'arg_structured_output', 'arg_compact_ids', 'arg_prompt_glossary']
             
             # Cargar configuración existente
             existing_config = self.load_config()
@@ -177,6 +181,7 @@ class UserConfigService:
                 'ROOT_DIR': '',
                 'FILE_TARGET': 'l10n/DEFAULT/dictionary',
                 'lm_url': 'http://localhost:1234/v1',
+                'lm_endpoints': '',
                 'DEPLOY_DIR': '',
                 'DEPLOY_OVERWRITE': False
             }
@@ -196,7 +201,21 @@ class UserConfigService:
                 'arg_config': '',
                 'arg_compat': 'completions',
                 'arg_batch': '4',
-                'arg_timeout': '200'
+                'arg_timeout': '200',
+                'arg_max_in_flight': '1',
+                'arg_lm_transport': 'requests',
+                'arg_batch_mode': 'items',
+                'arg_batch_order': 'dictionary',
+                'arg_context_window': '4096',
+                'arg_adaptive_batch': 'false',
+                'arg_template_cache': 'false',
+                'arg_skip_unchanged': 'true',
+                'arg_incremental': 'true',
+                'arg_campaign_dedup': 'false',
+                'arg_early_output': 'false',
+                'arg_structured_output': 'false',
+                'arg_compact_ids': 'false',
+                'arg_prompt_glossary': 'off'
             }
             
             return self.save_model_config(model_defaults)
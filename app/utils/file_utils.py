@@ -3,11 +3,13 @@
 """
 Utilidades para manejo de archivos
 """
+import json
 import os
 import shutil
+import tempfile
 import zipfile
 import logging
-from typing import List, Optional
+from typing import Any, List, Optional
 from pathlib import Path
 
 
@@ -21,6 +23,26 @@ def ensure_directory(directory: str) -> bool:
         return False
 
 
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2) -> None:
+    """
+    Escribe JSON de forma segura ante caídas: fichero temporal en el mismo
+    directorio, fsync y os.replace, así nunca queda un fichero a medio escribir
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def safe_copy_file(src: str, dst: str, backup: bool = True) -> bool:
     """Copia un archivo de forma segura, con backup opcional"""
     try:
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: latencia por lote según el orden de las frases (--batch-order)
+
+Genera misiones sintéticas que mezclan llamadas de radio cortas con briefings
+y descripciones largas, y las traduce contra el servidor falso de benchmarks/
+con cada orden de lotes. El servidor cobra una latencia fija por petición más
+otra proporcional a los caracteres generados, con tantos slots paralelos como
+lotes en vuelo. Se comparan p50/p95 de la latencia de lote, el max_tokens
+medio pedido, las llamadas y el tiempo total por misión, y se comprueba que
+todos los órdenes generan los mismos .lua traducidos.
+
+Uso:
+    python benchmarks/bench_batch_order.py --missions 3 --entries 300 --max-in-flight 4
+    python benchmarks/bench_batch_order.py --batch-mode items --batch-size 8
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import FakeLMServer  # noqa: E402
+from app.services.batch_planner import BATCH_ORDERS  # noqa: E402
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+WORDS = ["tanker", "escort", "bandits", "airfield", "convoy", "bridge", "radar", "package", "weather",
+         "fuel", "ridge", "valley", "harbor", "strike", "recon", "patrol", "sector", "corridor"]
+# (prefijo de clave, palabras mínimas, palabras máximas, proporción)
+KINDS = [
+    ("DictKey_ActionRadioText_", 3, 8, 0.55),
+    ("DictKey_ActionText_", 6, 14, 0.25),
+    ("DictKey_briefingText_", 60, 160, 0.12),
+    ("DictKey_descriptionText_", 120, 260, 0.08),
+]
+
+
+def build_mission(path: str, entries: int, seed: int) -> str:
+    """Dictionary DCS con longitudes muy dispares intercaladas, como en una misión real"""
+    rnd = random.Random(seed)
+    lines = ["dictionary = ", "{"]
+    for i in range(entries):
+        prefix, low, high, _ = rnd.choices(KINDS, weights=[k[3] for k in KINDS])[0]
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(low, high))]
+        text = f"Line {seed}-{i}: " + " ".join(words).capitalize() + "."
+        lines.append(f'    ["{prefix}{i}"] = "{text}",')
+    lines.append("} -- end of dictionary")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_order(engine, server, missions, work_dir, batch_order, args):
+    server.reset_stats()
+    cfg = engine._get_default_prompt_config()
+    totals = {"seconds": [], "outputs": []}
+    for n, dictionary in enumerate(missions):
+        out_dir = os.path.join(work_dir, f"out_{batch_order}_{n}")
+        t0 = time.perf_counter()
+        result = engine.translate_lua_file(
+            dictionary, "BENCH", out_dir, cfg, batch_size=args.batch_size, timeout=120,
+            lm_url=server.base_url, lm_model="fake-model", compat="chat", use_cache=False,
+            skip_lm_validation=True, template_cache=False, max_in_flight=args.max_in_flight,
+            batch_mode=args.batch_mode, batch_order=batch_order)
+        totals["seconds"].append(time.perf_counter() - t0)
+        with open(result["output_file"], encoding="utf-8") as f:
+            totals["outputs"].append(f.read())
+    latencies = [entry["seconds"] for entry in server.request_log]
+    totals.update({
+        "requests": server.requests,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "max_tokens": statistics.mean(entry["max_tokens"] or 0 for entry in server.request_log),
+    })
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del orden de frases en los lotes")
+    parser.add_argument("--missions", type=int, default=3)
+    parser.add_argument("--entries", type=int, default=300)
+    parser.add_argument("--batch-mode", choices=["tokens", "items"], default="tokens")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-char-latency", type=float, default=0.00005)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeLMServer(latency=args.latency, per_char_latency=args.per_char_latency,
+                          slots=args.max_in_flight)
+    server.start()
+    engine = TranslationEngine()
+    rows = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        missions = [build_mission(os.path.join(work_dir, f"dictionary_{n}"), args.entries, seed=n)
+                    for n in range(args.missions)]
+        for batch_order in BATCH_ORDERS:
+            rows[batch_order] = run_order(engine, server, missions, work_dir, batch_order, args)
+    server.stop()
+
+    print(f"\n{args.missions} misiones x {args.entries} entradas | lotes '{args.batch_mode}' | "
+          f"max_in_flight {args.max_in_flight} | "
+          f"latencia {args.latency}s + {args.per_char_latency}s/carácter\n")
+    print(f"{'orden':<14} {'llamadas':>9} {'p50 lote':>9} {'p95 lote':>9} {'max_tokens':>11} {'s/misión':>9}")
+    for batch_order, row in rows.items():
+        print(f"{batch_order:<14} {row['requests']:>9} {row['p50']:>9.3f} {row['p95']:>9.3f} "
+              f"{row['max_tokens']:>11.0f} {statistics.mean(row['seconds']):>9.2f}")
+    baseline = rows[BATCH_ORDERS[0]]["outputs"]
+    same = all(row["outputs"] == baseline for row in rows.values())
+    print(f"\nSalidas idénticas: {'sí' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
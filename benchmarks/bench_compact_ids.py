@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: ids compactos por lote (--compact-ids)
+
+Traduce misiones sintéticas contra el servidor falso de benchmarks/ enviando
+los ids de segmento (id_<16 hex>) o ids ordinales por lote ("1".."N"). El
+servidor registra los caracteres del prompt y de la respuesta de cada
+petición; se comparan con y sin ids compactos, junto al ahorro que estima el
+motor (wire_ids en el resultado de la misión), el tiempo total y que los
+.lua traducidos salen idénticos.
+
+Uso:
+    python benchmarks/bench_compact_ids.py --missions 3 --entries 200 --batch-size 10
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import FakeLMServer, write_fake_dictionary  # noqa: E402
+from app.services.batch_planner import estimate_tokens  # noqa: E402
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+
+def run_campaign(engine, server, missions, work_dir, compact, args):
+    server.reset_stats()
+    cfg = engine._get_default_prompt_config()
+    totals = {"seconds": 0.0, "outputs": [], "prompt_saved": 0, "completion_saved": 0}
+    label = "on" if compact else "off"
+    for n, dictionary in enumerate(missions):
+        out_dir = os.path.join(work_dir, f"{label}_{n}")
+        t0 = time.perf_counter()
+        result = engine.translate_lua_file(
+            dictionary, "BENCH", out_dir, cfg, batch_size=args.batch_size, timeout=60,
+            lm_url=server.base_url, lm_model="fake-model", compat="chat", use_cache=False,
+            skip_lm_validation=True, template_cache=False, batch_mode="items",
+            compact_ids=compact)
+        totals["seconds"] += time.perf_counter() - t0
+        if result.get("wire_ids"):
+            totals["prompt_saved"] += result["wire_ids"]["prompt_tokens_saved"]
+            totals["completion_saved"] += result["wire_ids"]["completion_tokens_saved"]
+        with open(result["output_file"], encoding="utf-8") as f:
+            totals["outputs"].append(f.read())
+    log = server.request_log
+    totals.update({
+        "requests": server.requests,
+        "prompt_tokens": sum(estimate_tokens("x" * entry["prompt_chars"]) for entry in log),
+        "completion_tokens": sum(estimate_tokens("x" * entry["completion_chars"]) for entry in log),
+        "prompt_per_batch": statistics.mean(entry["prompt_chars"] for entry in log),
+        "completion_per_batch": statistics.mean(entry["completion_chars"] for entry in log),
+    })
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los ids compactos por lote")
+    parser.add_argument("--missions", type=int, default=3)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--per-char-latency", type=float, default=0.00005)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeLMServer(latency=args.latency, per_char_latency=args.per_char_latency)
+    server.start()
+    engine = TranslationEngine()
+    with tempfile.TemporaryDirectory() as work_dir:
+        missions = [write_fake_dictionary(os.path.join(work_dir, f"dictionary_{n}"), args.entries,
+                                          prefix=f"DictKey_ActionText_{n}_")
+                    for n in range(args.missions)]
+        off = run_campaign(engine, server, missions, work_dir, False, args)
+        on = run_campaign(engine, server, missions, work_dir, True, args)
+    server.stop()
+
+    print(f"\n{args.missions} misiones x {args.entries} entradas | lote {args.batch_size} | "
+          f"tokens estimados a partir de los caracteres\n")
+    print(f"{'ids':<10} {'llamadas':>9} {'car. prompt/lote':>17} {'car. resp./lote':>16} "
+          f"{'tok. prompt':>12} {'tok. resp.':>11} {'segundos':>9}")
+    for label, row in (("segmento", off), ("compactos", on)):
+        print(f"{label:<10} {row['requests']:>9} {row['prompt_per_batch']:>17.0f} "
+              f"{row['completion_per_batch']:>16.0f} {row['prompt_tokens']:>12} "
+              f"{row['completion_tokens']:>11} {row['seconds']:>9.2f}")
+    print(f"\nAhorro estimado por el motor: ~{on['prompt_saved']} tokens de petición y "
+          f"~{on['completion_saved']} de respuesta")
+    print(f"Salidas idénticas: {'sí' if off['outputs'] == on['outputs'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: transporte 'requests' (hilos) frente a 'async' (aiohttp, un event loop)
+
+Traduce un dictionary sintético contra el servidor falso de benchmarks/ y
+mide tiempo total, lotes por segundo y pico de hilos del cliente para
+distintos valores de max_in_flight.
+
+Uso:
+    python benchmarks/bench_lm_transport.py --entries 2000 --latency 0.2
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import FakeLMServer, write_fake_dictionary  # noqa: E402
+from app.services.lm_transport import AIOHTTP_AVAILABLE  # noqa: E402
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+
+class ThreadPeakSampler:
+    """Muestrea los hilos del cliente (sin contar los del servidor falso)"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            client_threads = sum(1 for t in threading.enumerate() if "process_request" not in t.name)
+            self.peak = max(self.peak, client_threads)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_case(engine, server, dictionary, work_dir, transport, max_in_flight, batch_size):
+    engine.set_lm_transport(transport)
+    server.reset_stats()
+    cfg = engine._get_default_prompt_config()
+    with ThreadPeakSampler() as sampler:
+        t0 = time.perf_counter()
+        result = engine.translate_lua_file(
+            dictionary, "BENCH", os.path.join(work_dir, f"{transport}_{max_in_flight}"), cfg,
+            batch_size=batch_size, timeout=60, lm_url=server.base_url, lm_model="fake-model",
+            compat="chat", use_cache=False, skip_lm_validation=True, max_in_flight=max_in_flight)
+        elapsed = time.perf_counter() - t0
+    return {
+        "transport": engine.lm_transport.name,
+        "max_in_flight": max_in_flight,
+        "seconds": elapsed,
+        "batches_per_s": result.get("api_calls", 0) / elapsed if elapsed else 0.0,
+        "translated": result.get("segments_translated", 0),
+        "server_peak": server.peak_concurrency,
+        "thread_peak": sampler.peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de transportes LM Studio")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--in-flight", default="1,16,64,128")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    in_flight_values = [int(v) for v in args.in_flight.split(",") if v.strip()]
+    transports = ["requests"] + (["async"] if AIOHTTP_AVAILABLE else [])
+    if not AIOHTTP_AVAILABLE:
+        print("⚠️ aiohttp no instalado: solo se mide el transporte 'requests'")
+
+    server = FakeLMServer(latency=args.latency)
+    server.start()
+    engine = TranslationEngine()
+    rows = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        dictionary = write_fake_dictionary(os.path.join(work_dir, "dictionary"), args.entries)
+        for transport in transports:
+            for max_in_flight in in_flight_values:
+                if transport == "requests" and max_in_flight > TranslationEngine.MAX_IN_FLIGHT_LIMIT:
+                    continue
+                rows.append(run_case(engine, server, dictionary, work_dir, transport,
+                                     max_in_flight, args.batch_size))
+    server.stop()
+
+    print(f"\n{args.entries} entradas | lote {args.batch_size} | latencia {args.latency}s\n")
+    print(f"{'transporte':<10} {'en vuelo':>8} {'segundos':>9} {'lotes/s':>8} "
+          f"{'traducidas':>10} {'pico srv':>8} {'hilos':>6}")
+    for row in rows:
+        print(f"{row['transport']:<10} {row['max_in_flight']:>8} {row['seconds']:>9.2f} "
+              f"{row['batches_per_s']:>8.1f} {row['translated']:>10} "
+              f"{row['server_peak']:>8} {row['thread_peak']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: glosario en el prompt (--prompt-glossary)
+
+Amplía la configuración de prompts por defecto con un glosario OTAN y una
+lista de términos protegidos grandes (sintéticos) y traduce misiones cuyas
+frases citan solo unos pocos de esos términos, contra el servidor falso de
+benchmarks/. Se comparan los modos 'off', 'full' (glosario completo en cada
+lote) y 'batch' (solo los términos que aparecen en el lote): caracteres y
+tokens estimados del prompt por lote y tiempo total. También se comprueba que
+el prefijo estático del prompt (mensaje system + instrucciones) es idéntico
+byte a byte en todos los lotes.
+
+Uso:
+    python benchmarks/bench_prompt_glossary.py --missions 3 --entries 200 --glossary 300
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import FakeLMServer  # noqa: E402
+from app.services.batch_planner import estimate_tokens, plan_batches  # noqa: E402
+from app.services.rule_engine import PROMPT_GLOSSARY_KEY, PROMPT_GLOSSARY_MODES  # noqa: E402
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+WORDS = ["tanker", "escort", "bandits", "airfield", "convoy", "bridge", "radar", "package", "weather",
+         "fuel", "ridge", "valley", "harbor", "strike", "recon", "patrol", "sector", "corridor"]
+
+
+def build_config(engine, glossary_size: int):
+    """Configuración por defecto con glosario y términos protegidos sintéticos"""
+    cfg = engine._get_default_prompt_config()
+    glossary = {f"Term{n} Alpha": f"Término{n} Alfa" for n in range(glossary_size)}
+    protected = [f"SYS-{n}" for n in range(glossary_size)]
+    cfg["GLOSSARY_OTAN"] = glossary
+    cfg["PROTECT_WORDS"] = list(cfg.get("PROTECT_WORDS") or []) + protected
+    return cfg, list(glossary), protected
+
+
+def build_mission(path: str, entries: int, terms, protected, seed: int) -> str:
+    """Dictionary DCS en el que una de cada tres frases cita un término del glosario o protegido"""
+    rnd = random.Random(seed)
+    lines = ["dictionary = ", "{"]
+    for i in range(entries):
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(4, 12))]
+        if i % 3 == 0:
+            words.insert(rnd.randint(0, len(words)), rnd.choice(terms if i % 2 else protected))
+        lines.append(f'    ["DictKey_ActionText_{seed}_{i}"] = "Line {seed}-{i}: {" ".join(words)}.",')
+    lines.append("} -- end of dictionary")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def static_prefixes(engine, cfg, mode, missions):
+    """Prefijos estáticos (system, inicio del usuario) de las peticiones de todos los lotes"""
+    request_cfg = {**cfg, "LM_API": {**(cfg.get("LM_API") or {}), PROMPT_GLOSSARY_KEY: mode}}
+    instructions = cfg.get("LM_INSTRUCTIONS", "")
+    prefixes = set()
+    for dictionary in missions:
+        lua_text = engine._preprocess_dictionary_text(Path(dictionary).read_text(encoding="utf-8"), cfg)
+        _, segments = engine._segment_dictionary(lua_text, cfg, None)
+        items = [(seg.id, seg.clean_for_model) for seg in segments]
+        for batch in plan_batches(items, cfg, 10, mode="items"):
+            logging.disable(logging.INFO)
+            system, user = engine._build_lm_request(batch, request_cfg, "http://x/v1", "m")["chat"][1]["messages"]
+            logging.disable(logging.NOTSET)
+            prefixes.add((system["content"], user["content"][:len(instructions)]))
+    return prefixes
+
+
+def run_mode(engine, server, cfg, missions, work_dir, mode, args):
+    server.reset_stats()
+    seconds = 0.0
+    for n, dictionary in enumerate(missions):
+        t0 = time.perf_counter()
+        engine.translate_lua_file(
+            dictionary, "BENCH", os.path.join(work_dir, f"out_{mode}_{n}"), cfg, batch_size=args.batch_size,
+            timeout=60, lm_url=server.base_url, lm_model="fake-model", compat="chat", use_cache=False,
+            skip_lm_validation=True, template_cache=False, batch_mode="items", prompt_glossary=mode)
+        seconds += time.perf_counter() - t0
+    chars = [entry["prompt_chars"] for entry in server.request_log]
+    return {
+        "requests": server.requests,
+        "chars_per_batch": statistics.mean(chars),
+        "tokens_per_batch": statistics.mean(estimate_tokens("x" * c) for c in chars),
+        "tokens": sum(estimate_tokens("x" * c) for c in chars),
+        "seconds": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del glosario en el prompt")
+    parser.add_argument("--missions", type=int, default=3)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--glossary", type=int, default=300, help="Entradas de glosario y términos protegidos")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeLMServer(latency=args.latency)
+    server.start()
+    engine = TranslationEngine()
+    cfg, terms, protected = build_config(engine, args.glossary)
+    rows = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        missions = [build_mission(os.path.join(work_dir, f"dictionary_{n}"), args.entries, terms, protected, n)
+                    for n in range(args.missions)]
+        for mode in PROMPT_GLOSSARY_MODES:
+            rows[mode] = run_mode(engine, server, cfg, missions, work_dir, mode, args)
+        stable = len(static_prefixes(engine, cfg, "batch", missions)) == 1
+    server.stop()
+
+    print(f"\n{args.missions} misiones x {args.entries} entradas | lote {args.batch_size} | "
+          f"{args.glossary} términos de glosario + {args.glossary} protegidos\n")
+    print(f"{'glosario':<9} {'llamadas':>9} {'car. prompt/lote':>17} {'tok. prompt/lote':>17} "
+          f"{'tok. prompt':>12} {'segundos':>9}")
+    for mode, row in rows.items():
+        print(f"{mode:<9} {row['requests']:>9} {row['chars_per_batch']:>17.0f} {row['tokens_per_batch']:>17.0f} "
+              f"{row['tokens']:>12} {row['seconds']:>9.2f}")
+    print(f"\nPrefijo estático idéntico en todos los lotes ('batch'): {'sí' if stable else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
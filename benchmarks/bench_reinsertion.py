@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark: reinserción de traducciones en el .lua con marcadores
+
+Compara la reinserción clásica (str.replace de todos los ids en cada entrada,
+O(entradas x segmentos)) con reinsert_placeholders (una pasada que busca cada
+marcador id_<hash> en el diccionario) sobre un dictionary sintético, y
+comprueba que ambas producen exactamente el mismo texto.
+
+Uso:
+    python benchmarks/bench_reinsertion.py --entries 20000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import write_fake_dictionary  # noqa: E402
+from app.services.translation_engine import (  # noqa: E402
+    Segment, TranslationEngine, escape_for_lua, reinsert_placeholders
+)
+
+
+def build_placeholders(engine, lua_text):
+    """Reproduce el paso de marcadores de translate_lua_file sin llamar al modelo"""
+    segments = []
+
+    def replace_entry(m):
+        pre, key, value, post = m.group("pre"), m.group("key"), m.group("value"), m.group("post")
+        start_idx = len(segments)
+        segs = []
+        for i, sm in enumerate(engine.line_split_regex.finditer(value)):
+            seg_txt = sm.group("seg"); lb = sm.group("lb")
+            if seg_txt == "" and lb == "":
+                continue
+            seg = Segment(key=key, index=start_idx + i, raw_seg=seg_txt, lb=lb)
+            segs.append(seg); segments.append(seg)
+        return pre + "".join(seg.id + seg.punct + seg.lb for seg in segs) + post
+
+    return engine.entry_regex.sub(replace_entry, lua_text), segments
+
+
+def reinsert_legacy(engine, text, id_to_es_lua):
+    def reinsert_cb(m):
+        pre, value, post = m.group("pre"), m.group("value"), m.group("post")
+        for pid, es in id_to_es_lua.items():
+            value = value.replace(pid, es)
+        return pre + value + post
+    return engine.entry_regex.sub(reinsert_cb, text)
+
+
+def reinsert_single_pass(engine, text, id_to_es_lua):
+    def reinsert_cb(m):
+        pre, value, post = m.group("pre"), m.group("value"), m.group("post")
+        return pre + reinsert_placeholders(value, id_to_es_lua) + post
+    return engine.entry_regex.sub(reinsert_cb, text)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reinserción de marcadores")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="No medir la versión cuadrática (≈45 s con 20k entradas)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    engine = TranslationEngine()
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = write_fake_dictionary(os.path.join(work_dir, "dictionary"), args.entries)
+        with open(path, "r", encoding="utf-8") as f:
+            lua_text = f.read()
+
+    text, segments = build_placeholders(engine, lua_text)
+    for seg in segments:
+        seg.es = "ES " + seg.clean_for_model
+    id_to_es_lua = {seg.id: f"{seg.leading_ws}{escape_for_lua(seg.es or '')}" for seg in segments}
+
+    print(f"\n{args.entries} entradas | {len(segments)} segmentos\n")
+    fast, fast_s = timed(reinsert_single_pass, engine, text, id_to_es_lua)
+    print(f"{'una pasada':<12} {fast_s:>9.3f} s")
+    if args.skip_legacy:
+        return
+    legacy, legacy_s = timed(reinsert_legacy, engine, text, id_to_es_lua)
+    print(f"{'clásica':<12} {legacy_s:>9.3f} s")
+    print(f"\nAceleración: x{legacy_s / fast_s:.0f} | salida idéntica: {'sí' if legacy == fast else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: parser de respuestas de una pasada frente a la cascada de regex anterior
+
+Usa el corpus benchmarks/response_corpus.jsonl (salidas de modelo típicas:
+bloques ```json, preámbulos, tokens de fin de Llama, "]" dentro de las
+traducciones, arrays truncados por max_tokens, comillas sin escapar...) y un
+corpus aleatorio derivado de él (cortes, basura antes/después, comas perdidas,
+corchetes en el texto). Para cada ruta mide:
+
+- recuperadas: traducciones esperadas que devuelve
+- erróneas: traducciones devueltas que no coinciden con las esperadas
+- lotes perdidos: respuestas con algo recuperable de las que no sale nada
+- µs/respuesta
+
+La ruta anterior se reproduce aquí tal cual estaba en TranslationEngine
+(LegacyResponseParser) para poder compararla.
+
+Uso:
+    python benchmarks/bench_response_parser.py --fuzz 2000 --repeat 20
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+CORPUS_PATH = Path(__file__).resolve().parent / "response_corpus.jsonl"
+GARBAGE = ["</s>", "<|eot_id|>", "\n```", "Espero que te sirva.", "]}", "Nota: [revisar]", "}", "\n\n---"]
+
+
+class LegacyResponseParser:
+    """Cascada de regex que usaba TranslationEngine antes del parser de una pasada"""
+
+    def __init__(self):
+        self.logger = logging.getLogger("legacy_parser")
+
+    def _parse_lm_content(self, content: str, items: List[Tuple[str, str]],
+                          stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Convierte el texto devuelto por el modelo en un dict id -> traducción"""
+        # Parse response - Mejorado para modelos Llama
+        # Primero extraer JSON de bloques de código si los hay
+        m_fence = re.search(r'```json\s*([\s\S]*?)\s*```', content)
+        if m_fence:
+            clean_content = m_fence.group(1).strip()
+        else:
+            # Buscar JSON inline
+            m_json = re.search(r'(\[[\s\S]*?\]|\{[\s\S]*?\})', content)
+            clean_content = m_json.group(1) if m_json else content.strip()
+        
+        # Limpiar caracteres problemáticos
+        clean_content = clean_content.replace('\u00a0', ' ').strip()
+        
+        # Limpiar caracteres de control y finales problemáticos para Llama
+        clean_content = re.sub(r'^\s*```json\s*', '', clean_content, flags=re.IGNORECASE)
+        clean_content = re.sub(r'\s*```\s*$', '', clean_content)
+        clean_content = re.sub(r'<\|eot_id\|>.*$', '', clean_content, flags=re.DOTALL)
+        clean_content = re.sub(r'</s>.*$', '', clean_content, flags=re.DOTALL)
+        
+        # Filtrar contenido del sistema que algunos modelos incluyen incorrectamente
+        clean_content = self._filter_system_content(clean_content)
+        
+        # Extracción agresiva de JSON puro
+        clean_content = self._extract_pure_json(clean_content)
+
+        out = {}
+        try:
+            parsed = json.loads(clean_content)
+            self.logger.debug(f"JSON parseado correctamente: {type(parsed)}")
+            
+            # Manejar diferentes formatos de respuesta
+            if isinstance(parsed, dict) and "data" in parsed and isinstance(parsed["data"], list):
+                items_out = parsed["data"]
+            elif isinstance(parsed, list):
+                items_out = parsed
+            elif isinstance(parsed, dict) and ("id" in parsed or "text" in parsed):
+                items_out = [parsed]
+            else:
+                self.logger.error("Formato JSON inesperado. Respuesta: %s", str(parsed)[:500])
+                if stats is not None:
+                    stats['parse_failed'] = True
+                return {}
+                
+            # Procesar items extraídos
+            for obj in items_out:
+                if not isinstance(obj, dict):
+                    continue
+                    
+                _id = obj.get("id")
+                _es = obj.get("es")
+                _text = obj.get("text")
+                
+                if _id and isinstance(_es, str) and _es.strip():
+                    out[_id] = _es.strip()
+                elif _id and isinstance(_text, str) and _text.strip():
+                    out[_id] = _text.strip()
+                elif _text and len(items) == 1:
+                    # Fallback para respuestas sin ID
+                    out[items[0][0]] = _text.strip()
+                    
+            self.logger.info(f"Procesadas {len(out)} traducciones de {len(items_out)} respuestas")
+            
+        except json.JSONDecodeError as e:
+            self.logger.warning(f"No es JSON válido: {e}. Intentando parsing de texto plano...")
+            if stats is not None:
+                stats['parse_failed'] = True
+            
+            # SOLUCIÓN ROBUSTA: Manejar respuestas en texto plano
+            # Caso 1: Intentar extraer array JSON embebido
+            m_array = re.search(r'\[(.*?)\]', clean_content, re.DOTALL)
+            if m_array:
+                try:
+                    parsed = json.loads(f'[{m_array.group(1)}]')
+                    if isinstance(parsed, list):
+                        for obj in parsed:
+                            if isinstance(obj, dict) and obj.get("id") and obj.get("es"):
+                                out[obj["id"]] = obj["es"].strip()
+                        self.logger.info(f"Recuperación JSON exitosa: {len(out)} traducciones")
+                        return out
+                except Exception:
+                    pass
+            
+            # Caso 2: El modelo respondió en texto plano - aplicar estrategia inteligente
+            self.logger.info("Modelo generó texto plano. Aplicando estrategia de recuperación...")
+            
+            # Si solo hay 1 item, asignar toda la respuesta
+            if len(items) == 1:
+                item_id, original_text = items[0]
+                # Limpiar la respuesta de texto plano
+                clean_response = content.strip()
+                
+                # Filtrar contenido del sistema primero
+                clean_response = self._filter_system_content(clean_response)
+                
+                # Remover frases comunes que no son traducción
+                noise_patterns = [
+                    r"No hay texto para traducir\..*",
+                    r"¿Puedo ayudarte con algo más\?.*",
+                    r"¿Quieres saber sobre.*?\?.*",
+                    r"^No tengo\.",
+                    r"Nuestra tarea es.*"
+                ]
+                
+                for pattern in noise_patterns:
+                    clean_response = re.sub(pattern, "", clean_response, flags=re.IGNORECASE | re.DOTALL)
+                
+                clean_response = clean_response.strip()
+                
+                # Si queda contenido útil después de limpiar
+                if clean_response and len(clean_response) > 10:
+                    out[item_id] = clean_response
+                    self.logger.info(f"Recuperación de texto plano: 1 traducción asignada")
+                else:
+                    # Intentar re-procesar con prompt más estricto
+                    self.logger.warning(f"Respuesta no útil. Texto original: '{original_text}', Respuesta: '{content[:200]}'")
+                    
+            # Si hay múltiples items, intentar estrategia de mapeo
+            elif len(items) > 1:
+                self.logger.warning(f"Respuesta texto plano para {len(items)} items. Requiere reintento con formato JSON más estricto.")
+                # En este caso, es mejor fallar y que se reintente con mejor prompt
+                
+        except Exception as e:
+            self.logger.error(f"Error inesperado parseando respuesta: {e}. Contenido: {clean_content[:500]}")
+        
+        return out
+
+    def _filter_system_content(self, content: str) -> str:
+        """Filtrar contenido del sistema que algunos modelos incluyen incorrectamente en la respuesta"""
+        
+        # Patrones comunes de contenido del sistema que aparecen en respuestas incorrectas
+        system_patterns = [
+            # Patrón EXACTO del problema reportado
+            r'"system\s*\\n\s*Contexto especializado:\s*Eres el traductor oficial del programa DCS World en español para el Ejército del Aire y del Espacio de España\.\s*Tu trabajo requiere máxima precisión pues las traducciones se usan en entrenamiento militar real\.\s*Tienes acceso completo a glosarios oficiales OTAN en español, manuales técnicos de aeronaves en español, procedimientos operacionales estándar españoles y una base de datos terminológica militar actualizada\.\s*Aplica el máximo nivel de expertise y precisión técnica"[,\s]*',
+            
+            # Variaciones del patrón específico
+            r'system\s*\\n\s*Contexto especializado:.*?máxima precisión técnica["\s]*,?\s*',
+            r'"system.*?Contexto especializado:.*?máxima precisión técnica.*?"[,\s]*',
+            r'system\s*\n\s*Contexto especializado:.*?máxima precisión técnica[,\s]*',
+            
+            # Patrones generales de contenido del sistema
+            r'system\s*\\n.*?traductor oficial.*?DCS World.*?España[^"]*[",\s]*',
+            r'"system":\s*"[^"]*traductor oficial[^"]*DCS World[^"]*"[,\s]*',
+            r'system\s*\n.*?Eres el traductor oficial.*?["\s]*,?\s*',
+            
+            # Patrones de instrucciones del sistema
+            r'system\s*\\n.*?entrenamiento militar real.*?["\s]*,?\s*',
+            r'system\s*\\n.*?glosarios oficiales OTAN.*?["\s]*,?\s*',
+            r'"system":\s*"[^"]*entrenamiento militar real[^"]*"[,\s]*',
+            
+            # Patrones más amplios para capturar variaciones
+            r'system\s*\\n.*?Ejército del Aire y del Espacio.*?[",\s]*',
+            r'system\s*\\n.*?base de datos terminológica militar.*?[",\s]*',
+            r'system\s*\\n.*?expertise y precisión técnica.*?[",\s]*',
+            
+            # Limpiar inicio de respuesta con contenido del sistema
+            r'^["\s]*system["\s]*\\n[^,]*?,?\s*',
+            r'^system\s*\\n.*?\s*,\s*',
+            
+            # NUEVOS PATRONES PARA EXPLICACIONES Y TEXTO ADICIONAL
+            # Explicaciones comunes que añaden los modelos
+            r'(?:Aquí está|He aquí|La traducción es|El resultado es|A continuación).*?:\s*',
+            r'(?:```json\s*|```\s*)',  # Marcadores de código
+            r'(?:Explicación|Nota|Comentario|Observación).*?:\s*.*?(?:\n|$)',
+            r'(?:Como se puede ver|En resumen|Finalmente|Por lo tanto).*?(?:\n|$)',
+            r'(?:Esta traducción|La siguiente traducción|He traducido).*?(?:\n|$)',
+            r'(?:Mantén|Mantengo|Mantiene).*?estructura.*?(?:\n|$)',
+            r'(?:Términos técnicos|Traducción militar|Contexto militar).*?(?:\n|$)',
+            
+            # Patrones al final de la respuesta
+            r'\s*(?:```|</s>|<\|eot_id\|>).*$',
+            r'\s*(?:Espero|Esto debería|Cualquier duda).*$',
+            
+            # Texto antes del JSON
+            r'^.*?(?=\s*\[)',  # Todo antes del primer [
+        ]
+        
+        original_content = content
+        for pattern in system_patterns:
+            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+        
+        # Si se removió contenido, registrar para debugging
+        if len(content) != len(original_content):
+            removed_chars = len(original_content) - len(content)
+            self.logger.info(f"Filtrado contenido del sistema: removidos {removed_chars} caracteres")
+            self.logger.debug(f"Contenido original: {original_content[:200]}...")
+            self.logger.debug(f"Contenido filtrado: {content[:200]}...")
+        
+        # Limpiar espacios y comas sobrantes al inicio
+        content = re.sub(r'^[,\s]+', '', content.strip())
+        
+        return content
+
+    def _extract_pure_json(self, content: str) -> str:
+        """Extrae únicamente el JSON válido de la respuesta, eliminando cualquier texto adicional"""
+        
+        # Limpiar texto explicativo común al inicio
+        explanatory_patterns = [
+            r'^.*?(?:aquí está|he aquí|la traducción es|el resultado es|a continuación).*?:\s*',
+            r'^.*?(?:```json|```)\s*',
+            r'^.*?(?:traducido|traducción).*?:\s*',
+            r'^.*?(?:json|respuesta).*?:\s*',
+        ]
+        
+        for pattern in explanatory_patterns:
+            content = re.sub(pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+        
+        # Buscar JSON array o object válido
+        import json
+        
+        # Intentar encontrar un array JSON válido
+        array_matches = re.finditer(r'\[[\s\S]*?\]', content)
+        for match in array_matches:
+            candidate = match.group(0)
+            try:
+                json.loads(candidate)
+                self.logger.debug(f"JSON array válido encontrado: {candidate[:100]}...")
+                return candidate
+            except json.JSONDecodeError:
+                continue
+        
+        # Si no se encuentra array, buscar objeto JSON válido
+        object_matches = re.finditer(r'\{[\s\S]*?\}', content)
+        for match in object_matches:
+            candidate = match.group(0)
+            try:
+                json.loads(candidate)
+                self.logger.debug(f"JSON object válido encontrado: {candidate[:100]}...")
+                return candidate
+            except json.JSONDecodeError:
+                continue
+        
+        # Si no se encuentra JSON válido, intentar limpiar más agresivamente
+        # Buscar contenido entre las primeras llaves o corchetes
+        bracket_match = re.search(r'[\[\{].*[\]\}]', content, re.DOTALL)
+        if bracket_match:
+            candidate = bracket_match.group(0)
+            try:
+                json.loads(candidate)
+                self.logger.debug(f"JSON encontrado con limpieza agresiva: {candidate[:100]}...")
+                return candidate
+            except json.JSONDecodeError:
+                pass
+        
+        # Último recurso: devolver contenido original limpio
+        clean_content = re.sub(r'^[^[\{]*', '', content)  # Quitar todo antes del primer [ o {
+        clean_content = re.sub(r'[^}\]]*$', '', clean_content)  # Quitar todo después del último } o ]
+        
+        self.logger.warning(f"No se pudo extraer JSON válido, devolviendo contenido limpio: {clean_content[:100]}...")
+        return clean_content.strip()
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def mutate(case: Dict[str, Any], rnd: random.Random) -> Dict[str, Any]:
+    """Deriva un caso roto de una respuesta limpia; expected son los items que siguen intactos"""
+    items = [tuple(item) for item in case["items"]]
+    pairs = list(case["expected"].items())
+    objs = [json.dumps({"id": i, "es": e}, ensure_ascii=False) for i, e in pairs]
+    sep = rnd.choice([", ", ",\n  ", " ", ",,"])
+    body = "[" + sep.join(objs) + "]"
+    expected = dict(pairs)
+    kind = rnd.choice(["cut", "prefix", "suffix", "brackets", "fence"])
+    if kind == "cut":
+        cut = rnd.randint(1, len(body) - 1)
+        kept = dict(pairs[:sum(1 for k in range(len(objs)) if body.find(objs[k]) + len(objs[k]) <= cut)])
+        body, expected = body[:cut], kept
+    elif kind == "prefix":
+        body = rnd.choice(["Aquí está la traducción: ", "[Nota] ", "Claro, ", "```json\n"]) + body
+    elif kind == "suffix":
+        body = body + rnd.choice(GARBAGE) + rnd.choice(GARBAGE)
+    elif kind == "brackets":
+        expected = {i: f"[{e}] ]" for i, e in pairs}
+        body = "[" + sep.join(json.dumps({"id": i, "es": e}, ensure_ascii=False) for i, e in expected.items()) + "]"
+    else:
+        body = "```json\n" + body + "\n```" + rnd.choice(GARBAGE)
+    return {"name": f"fuzz_{kind}", "items": [list(item) for item in items], "content": body, "expected": expected}
+
+
+def score(parse, cases: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    row = {"recovered": 0, "expected": 0, "wrong": 0, "lost": 0}
+    for case in cases:
+        items = [tuple(item) for item in case["items"]]
+        out = parse(case["content"], items)
+        expected = case["expected"]
+        row["expected"] += len(expected)
+        row["recovered"] += sum(1 for k, v in expected.items() if out.get(k) == v)
+        row["wrong"] += sum(1 for k, v in out.items() if expected.get(k) != v)
+        if expected and not any(out.get(k) == v for k, v in expected.items()):
+            row["lost"] += 1
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            parse(case["content"], [tuple(item) for item in case["items"]])
+    row["us"] = (time.perf_counter() - t0) / (repeat * len(cases)) * 1e6
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parser de respuestas del modelo")
+    parser.add_argument("--fuzz", type=int, default=2000, help="Casos aleatorios derivados del corpus")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones para medir el tiempo")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="Detalle por caso del corpus")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    engine = TranslationEngine()
+    legacy = LegacyResponseParser()
+    corpus = load_corpus(CORPUS_PATH)
+    rnd = random.Random(args.seed)
+    base = [case for case in corpus if len(case["expected"]) > 1]
+    fuzz = [mutate(rnd.choice(base), rnd) for _ in range(args.fuzz)]
+    paths = (("anterior", legacy._parse_lm_content), ("una pasada", engine._parse_lm_content))
+
+    if args.verbose:
+        for case in corpus:
+            items = [tuple(item) for item in case["items"]]
+            marks = []
+            for _, parse in paths:
+                out = parse(case["content"], items)
+                marks.append(sum(1 for k, v in case["expected"].items() if out.get(k) == v))
+            print(f"{case['name']:<28} esperado {len(case['expected'])} | anterior {marks[0]} | una pasada {marks[1]}")
+
+    for title, cases in (("Corpus", corpus), ("Aleatorio", fuzz)):
+        print(f"\n{title}: {len(cases)} respuestas\n")
+        print(f"{'ruta':<12} {'recuperadas':>14} {'erróneas':>9} {'lotes perdidos':>15} {'µs/respuesta':>13}")
+        for name, parse in paths:
+            row = score(parse, cases, args.repeat if title == "Corpus" else 1)
+            print(f"{name:<12} {row['recovered']:>7}/{row['expected']:<6} {row['wrong']:>9} {row['lost']:>15} "
+                  f"{row['us']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark: construcción de segmentos de un dictionary grande
+
+Compara el Segment anterior (regex compiladas en cada instancia, __dict__ por
+objeto y mapa de corchetes siempre creado) con el Segment actual (__slots__,
+patrones compartidos y mapa de corchetes perezoso). Mide tiempo de
+construcción y memoria retenida (tracemalloc) y comprueba que ambos producen
+los mismos ids, núcleos, puntuación y texto para el modelo.
+
+Uso:
+    python benchmarks/bench_segments.py --entries 50000
+"""
+import argparse
+import gc
+import hashlib
+import logging
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.translation_engine import Segment, TranslationEngine  # noqa: E402
+
+
+class LegacySegment:
+    """Segment tal y como estaba antes de __slots__ (referencia del benchmark)"""
+
+    def __init__(self, key, index, raw_seg, lb, protect_brackets=True):
+        self.key = key
+        self.index = index
+        self.raw_seg = raw_seg
+        self.lb = lb
+        self.protect_brackets = protect_brackets
+        LEADING_WHITESPACE_REGEX = re.compile(r'^(?P<ws>\s*)(?P<text>.*)$', flags=re.DOTALL)
+        TRAIL_PUNCT_REGEX = re.compile(r'^(?P<core>.*?)(?P<punct>[\s\.\!\?\,;:…]*)$', flags=re.DOTALL)
+        BRACKET_REGEX = re.compile(r'\[[^\]\r\n]+\]')
+        ws_match = LEADING_WHITESPACE_REGEX.match(raw_seg)
+        self.leading_ws = ws_match.group("ws") if ws_match else ""
+        text_without_ws = ws_match.group("text") if ws_match else raw_seg
+        m = TRAIL_PUNCT_REGEX.match(text_without_ws)
+        self.core = m.group("core")
+        self.punct = m.group("punct")
+        self.br_tokens = {}
+        if self.protect_brackets:
+            self.clean_for_model = self._protect_brackets(self.core, BRACKET_REGEX)
+        else:
+            self.clean_for_model = self.core
+        src_for_hash = f"{self.key}#{self.index}#{self.core.strip()}"
+        self.id = f"id_{hashlib.sha1(src_for_hash.encode('utf-8')).hexdigest()[:16]}"
+        self.es = None
+
+    def _protect_brackets(self, text, bracket_regex):
+        def repl(m):
+            token = f"BR_{len(self.br_tokens) + 1}"
+            self.br_tokens[token] = m.group(0)
+            return token
+        return bracket_regex.sub(repl, text)
+
+
+def build_dictionary(entries: int) -> str:
+    """Dictionary sintético con briefings multilínea, corchetes y puntuación variada"""
+    lines = ["dictionary = ", "{"]
+    for i in range(entries):
+        if i % 10 == 0:
+            value = (f"  Mission briefing {i}.\\\n\\\nTake off from [Batumi] and climb to angels {i % 30}.\\\n"
+                     f"Contact [AWACS] on 251.0 ...\\\n  Good luck!")
+        elif i % 3 == 0:
+            value = f"Flight {i}, contact Tower on channel {i % 20}!"
+        else:
+            value = f"Proceed to waypoint {i % 9} and hold"
+        lines.append(f'    ["DictKey_ActionText_{i}"] = "{value}",')
+    lines.append("} -- end of dictionary")
+    return "\n".join(lines) + "\n"
+
+
+def build_segments(engine, lua_text, segment_cls):
+    segments = []
+    for m in engine.entry_regex.finditer(lua_text):
+        key, value = m.group("key"), m.group("value")
+        start_idx = len(segments)
+        for i, sm in enumerate(engine.line_split_regex.finditer(value)):
+            seg_txt = sm.group("seg"); lb = sm.group("lb")
+            if seg_txt == "" and lb == "":
+                continue
+            segments.append(segment_cls(key=key, index=start_idx + i, raw_seg=seg_txt, lb=lb))
+    return segments
+
+
+def measure(engine, lua_text, segment_cls, repeat):
+    """Mejor tiempo de repeat pasadas (sin tracemalloc) y memoria retenida de otra pasada"""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        build_segments(engine, lua_text, segment_cls)
+        elapsed = min(elapsed, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    segments = build_segments(engine, lua_text, segment_cls)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segments, elapsed, retained
+
+
+def fingerprint(seg):
+    return (seg.id, seg.key, seg.leading_ws, seg.core, seg.punct, seg.lb,
+            seg.clean_for_model, dict(seg.br_tokens))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de construcción de segmentos")
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    engine = TranslationEngine()
+    lua_text = build_dictionary(args.entries)
+
+    rows = []
+    for label, cls in (("anterior", LegacySegment), ("__slots__", Segment)):
+        segments, elapsed, retained = measure(engine, lua_text, cls, args.repeat)
+        rows.append((label, segments, elapsed, retained))
+
+    print(f"\n{args.entries} entradas | {len(rows[0][1])} segmentos\n")
+    print(f"{'segmento':<10} {'segundos':>9} {'MiB retenidos':>14}")
+    for label, _, elapsed, retained in rows:
+        print(f"{label:<10} {elapsed:>9.3f} {retained / 2 ** 20:>14.1f}")
+
+    same = [fingerprint(s) for s in rows[0][1]] == [fingerprint(s) for s in rows[1][1]]
+    (_, _, old_s, old_mem), (_, _, new_s, new_mem) = rows
+    print(f"\nTiempo x{old_s / new_s:.1f} | memoria -{100 * (1 - new_mem / old_mem):.0f}% | "
+          f"segmentos idénticos: {'sí' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: salida restringida por esquema JSON (--structured-output)
+
+Traduce misiones sintéticas contra el servidor falso de benchmarks/ con una
+respuesta descuidada cada --malformed-every peticiones (prosa + ```json, un
+item con comillas sin escapar o solo prosa, como hacen los modelos locales).
+Con --structured-output el motor manda response_format con el esquema del
+lote y el servidor lo respeta, así que no hay nada que reparar ni reintentar.
+Se comparan llamadas, reintentos, tiempo total y frases que acaban sin
+traducir (texto original) porque ni los reintentos las recuperaron.
+
+Uso:
+    python benchmarks/bench_structured_output.py --missions 3 --entries 200 --malformed-every 3
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import FakeLMServer, write_fake_dictionary  # noqa: E402
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+
+def run_campaign(engine, server, missions, work_dir, structured, args):
+    server.reset_stats()
+    cfg = engine._get_default_prompt_config()
+    totals = {"batches": 0, "seconds": 0.0, "untranslated": 0}
+    label = "on" if structured else "off"
+    for n, dictionary in enumerate(missions):
+        out_dir = os.path.join(work_dir, f"{label}_{n}")
+        t0 = time.perf_counter()
+        result = engine.translate_lua_file(
+            dictionary, "BENCH", out_dir, cfg, batch_size=args.batch_size, timeout=60,
+            lm_url=server.base_url, lm_model="fake-model", compat="chat", use_cache=False,
+            skip_lm_validation=True, template_cache=False, batch_mode="items",
+            structured_output=structured)
+        totals["seconds"] += time.perf_counter() - t0
+        totals["batches"] += result.get("batches", 0)
+        with open(result["output_file"], encoding="utf-8") as f:
+            totals["untranslated"] += sum(1 for line in f if '"] = "' in line and '"] = "ES ' not in line)
+    totals["requests"] = server.requests
+    totals["retries"] = server.requests - totals["batches"]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la salida restringida por esquema JSON")
+    parser.add_argument("--missions", type=int, default=3)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-char-latency", type=float, default=0.00002)
+    parser.add_argument("--malformed-every", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeLMServer(latency=args.latency, per_char_latency=args.per_char_latency,
+                          malformed_every=args.malformed_every)
+    server.start()
+    engine = TranslationEngine()
+    with tempfile.TemporaryDirectory() as work_dir:
+        missions = [write_fake_dictionary(os.path.join(work_dir, f"dictionary_{n}"), args.entries,
+                                          prefix=f"DictKey_ActionText_{n}_")
+                    for n in range(args.missions)]
+        off = run_campaign(engine, server, missions, work_dir, False, args)
+        on = run_campaign(engine, server, missions, work_dir, True, args)
+    server.stop()
+
+    print(f"\n{args.missions} misiones x {args.entries} entradas | lote {args.batch_size} | "
+          f"respuesta descuidada 1 de cada {args.malformed_every}\n")
+    print(f"{'esquema':<8} {'lotes':>6} {'llamadas':>9} {'reintentos':>11} {'sin traducir':>13} {'segundos':>9}")
+    for label, row in (("off", off), ("on", on)):
+        print(f"{label:<8} {row['batches']:>6} {row['requests']:>9} {row['retries']:>11} "
+              f"{row['untranslated']:>13} {row['seconds']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: llamadas al modelo ahorradas por el cache de plantillas
+
+Genera una campaña sintética de radio (indicativos, frecuencias, rumbos,
+distancias y coordenadas que cambian entre frases) más algo de texto libre y
+la traduce contra el servidor falso de benchmarks/ con --template-cache
+activado y desactivado. El cache centralizado se deja fuera (use_cache=False)
+para medir solo la agrupación por plantillas dentro de cada misión, y se
+comprueba que ambas pasadas generan los mismos .lua traducidos.
+
+Uso:
+    python benchmarks/bench_template_cache.py --missions 5 --entries 400
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_lm_server import FakeLMServer  # noqa: E402
+from app.services.translation_engine import TranslationEngine  # noqa: E402
+
+CALLSIGNS = ["Colt", "Dodge", "Enfield", "Springfield", "Uzi", "Pontiac", "Ford", "Chevy"]
+TEMPLATES = [
+    "{cs}, contact Tower on {freq}",
+    "{cs}, bandit bearing {brg} for {rng}, angels {alt}",
+    "{cs}, proceed to waypoint {wp} and hold",
+    "{cs}, cleared hot, target at {grid}",
+    "Tanker is on {freq}, TACAN {ch}X",
+    "Picture: {n} groups, bullseye {brg} for {rng}",
+    "{cs}, splash {n}. Return to CAP at angels {alt}",
+]
+FREE_TEXT = [
+    "Mission briefing {i}: escort the strike package and keep the bandits off the bombers",
+    "Remember to check your fuel state before pushing past the line {i}",
+    "The weather over the target area is expected to deteriorate during mission {i}",
+]
+
+
+def build_mission(path: str, entries: int, seed: int) -> str:
+    """Dictionary DCS con mensajes de radio variados y un 10% de texto libre"""
+    rnd = random.Random(seed)
+    lines = ["dictionary = ", "{"]
+    for i in range(entries):
+        if i % 10 == 9:
+            text = rnd.choice(FREE_TEXT).format(i=f"{seed}-{i}")
+        else:
+            text = rnd.choice(TEMPLATES).format(
+                cs=f"{rnd.choice(CALLSIGNS)} {rnd.randint(1, 9)}-{rnd.randint(1, 4)}",
+                freq=f"{rnd.randint(118, 399)}.{rnd.choice(['0', '25', '5', '75'])}",
+                brg=f"{rnd.randint(0, 359):03d}", rng=rnd.randint(5, 80), alt=rnd.randint(5, 35),
+                wp=rnd.randint(1, 12), n=rnd.randint(1, 6), ch=rnd.randint(1, 126),
+                grid=f"{rnd.choice(['GH', 'KN', 'LM'])} {rnd.randint(100, 999)} {rnd.randint(100, 999)}")
+        lines.append(f'    ["DictKey_ActionText_{i}"] = "{text}",')
+    lines.append("} -- end of dictionary")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def run_campaign(engine, server, missions, work_dir, template_cache, batch_size):
+    server.reset_stats()
+    cfg = engine._get_default_prompt_config()
+    totals = {"api_calls": 0, "template_reused": 0, "seconds": 0.0, "outputs": []}
+    label = "on" if template_cache else "off"
+    for n, dictionary in enumerate(missions):
+        out_dir = os.path.join(work_dir, f"{label}_{n}")
+        t0 = time.perf_counter()
+        result = engine.translate_lua_file(
+            dictionary, "BENCH", out_dir, cfg, batch_size=batch_size, timeout=60,
+            lm_url=server.base_url, lm_model="fake-model", compat="chat", use_cache=False,
+            skip_lm_validation=True, template_cache=template_cache)
+        totals["seconds"] += time.perf_counter() - t0
+        totals["api_calls"] += result.get("api_calls", 0)
+        totals["template_reused"] += result.get("template_reused", 0)
+        with open(result["output_file"], encoding="utf-8") as f:
+            totals["outputs"].append(f.read())
+    totals["requests"] = server.requests
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cache de plantillas")
+    parser.add_argument("--missions", type=int, default=5)
+    parser.add_argument("--entries", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeLMServer(latency=args.latency)
+    server.start()
+    engine = TranslationEngine()
+    with tempfile.TemporaryDirectory() as work_dir:
+        missions = [build_mission(os.path.join(work_dir, f"dictionary_{n}"), args.entries, seed=n)
+                    for n in range(args.missions)]
+        off = run_campaign(engine, server, missions, work_dir, False, args.batch_size)
+        on = run_campaign(engine, server, missions, work_dir, True, args.batch_size)
+    server.stop()
+
+    print(f"\n{args.missions} misiones x {args.entries} entradas | lote {args.batch_size}\n")
+    print(f"{'plantillas':<10} {'llamadas':>9} {'rellenadas':>10} {'segundos':>9}")
+    for label, row in (("off", off), ("on", on)):
+        print(f"{label:<10} {row['requests']:>9} {row['template_reused']:>10} {row['seconds']:>9.2f}")
+    saved = off["requests"] - on["requests"]
+    print(f"\nLlamadas ahorradas: {saved} ({100 * saved / max(off['requests'], 1):.0f}%) | "
+          f"salidas idénticas: {'sí' if off['outputs'] == on['outputs'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local compatible con la API de OpenAI que imita a LM Studio
+
+Se usa en los benchmarks para medir el motor sin un modelo real: responde a
+/v1/chat/completions y /v1/completions devolviendo, para cada {"id","en"} del
+lote, un {"id","es"} con el texto prefijado por "ES ".
+
+La latencia es determinista: latency + per_item_latency * items del lote +
+per_char_latency * caracteres generados (el coste de decodificar la salida).
+Cada petición queda en request_log con sus items, max_tokens, segundos y
+caracteres del prompt y de la respuesta.
+Con malformed_every, una de cada N respuestas sin response_format sale como
+la de un modelo real descuidado (rotando: prosa + ```json, un item con comillas
+sin escapar, o solo prosa); si la petición trae response_format (json_schema)
+la respuesta es siempre {"data": [...]} válido. Con slots se limita cuántas peticiones procesa a la vez (como los slots
+paralelos de LM Studio); el resto espera en cola. Con truncate_after se
+imita un modelo que corta la respuesta: solo devuelve los primeros N items.
+
+Si la petición trae "stream": true responde con SSE (data: {...}) enviando un
+item por fragmento, separados por per_item_latency, como haría LM Studio.
+
+Uso:
+    python benchmarks/fake_lm_server.py --port 1234 --latency 0.2
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+PAYLOAD_REGEX = re.compile(r'\[\{"id".*?\}\]', re.DOTALL)
+
+
+class FakeLMServer:
+    """Servidor falso en un hilo propio para usar desde los benchmarks"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                 per_item_latency: float = 0.0, slots: int = 0, truncate_after: int = 0,
+                 per_char_latency: float = 0.0, malformed_every: int = 0):
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.per_char_latency = per_char_latency
+        self.truncate_after = truncate_after
+        self.malformed_every = malformed_every
+        self.requests = 0
+        self.request_log: List[Dict[str, Any]] = []
+        self.active = 0
+        self.peak_concurrency = 0
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(slots) if slots else None
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake_lm_server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.peak_concurrency = 0
+            self.request_log = []
+
+    # === Generación de respuestas ===
+
+    @staticmethod
+    def extract_items(body: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Extrae el array [{"id","en"}] enviado por el motor"""
+        if "messages" in body:
+            text = body["messages"][-1]["content"]
+        else:
+            text = body.get("prompt", "")
+        found = PAYLOAD_REGEX.findall(text)
+        return json.loads(found[-1]) if found else []
+
+    def translate_items(self, items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        if self.truncate_after:
+            items = items[:self.truncate_after]
+        return [{"id": item["id"], "es": "ES " + item["en"]} for item in items]
+
+    @staticmethod
+    def prompt_chars(body: Dict[str, Any]) -> int:
+        """Caracteres del prompt enviado (mensajes de chat o prompt de /completions)"""
+        if "messages" in body:
+            return sum(len(str(message.get("content", ""))) for message in body["messages"])
+        return len(str(body.get("prompt", "")))
+
+    def render_content(self, body: Dict[str, Any], items: List[Dict[str, str]], number: int = 0) -> str:
+        translated = self.translate_items(items)
+        if body.get("response_format"):
+            return json.dumps({"data": translated}, ensure_ascii=False)
+        content = json.dumps(translated, ensure_ascii=False)
+        if not self.malformed_every or not translated or number % self.malformed_every:
+            return content
+        variant = (number // self.malformed_every) % 3
+        if variant == 0:
+            return f"Aquí está la traducción:\n```json\n{content}\n```\nEspero que sea útil."
+        if variant == 1:
+            first = translated[0]
+            broken = json.dumps(first, ensure_ascii=False).replace(first["es"], f'{first["es"]} "OK"', 1)
+            return content.replace(json.dumps(first, ensure_ascii=False), broken, 1)
+        return "Lo siento, he traducido las frases manteniendo los indicativos y las frecuencias."
+
+    def build_completion(self, body: Dict[str, Any], items: List[Dict[str, str]],
+                         number: int = 0) -> Dict[str, Any]:
+        content = self.render_content(body, items, number)
+        if "messages" in body:
+            return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+        return {"choices": [{"text": content}]}
+
+    def _handle_post(self, handler: BaseHTTPRequestHandler):
+        length = int(handler.headers.get("Content-Length", 0))
+        body = json.loads(handler.rfile.read(length) or b"{}")
+        items = self.extract_items(body)
+        if body.get("stream"):
+            self._handle_stream(handler, body, items)
+            return
+
+        t0 = time.perf_counter()
+        if self._slots:
+            self._slots.acquire()
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+        generated = 0
+        try:
+            completion = self.build_completion(body, items, number)
+            generated = len(json.dumps(self.translate_items(items), ensure_ascii=False))
+            time.sleep(self.latency + self.per_item_latency * len(items) + self.per_char_latency * generated)
+            data = json.dumps(completion, ensure_ascii=False).encode("utf-8")
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.request_log.append({"items": len(items), "max_tokens": body.get("max_tokens"),
+                                         "seconds": time.perf_counter() - t0,
+                                         "prompt_chars": self.prompt_chars(body),
+                                         "completion_chars": generated})
+            if self._slots:
+                self._slots.release()
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _handle_stream(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any],
+                       items: List[Dict[str, str]]):
+        is_chat = "messages" in body
+        translated = self.translate_items(items)
+        pieces = ["["] + [
+            ("" if i == 0 else ", ") + json.dumps(obj, ensure_ascii=False)
+            for i, obj in enumerate(translated)
+        ] + ["]"]
+
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def write_chunk(data: bytes):
+            handler.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            handler.wfile.flush()
+
+        try:
+            time.sleep(self.latency)
+            for piece in pieces:
+                choice = {"delta": {"content": piece}} if is_chat else {"text": piece}
+                write_chunk(f"data: {json.dumps({'choices': [choice]}, ensure_ascii=False)}\n\n".encode("utf-8"))
+                time.sleep(self.per_item_latency + self.per_char_latency * len(piece))
+            write_chunk(b"data: [DONE]\n\n")
+            write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # El cliente dejó de leer (timeout o cancelación)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _handle_get(self, handler: BaseHTTPRequestHandler):
+        if handler.path.rstrip("/").endswith("/models"):
+            payload = {"data": [{"id": "fake-model", "owned_by": "benchmark"}]}
+        else:
+            payload = {"requests": self.requests, "peak_concurrency": self.peak_concurrency}
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                server._handle_post(self)
+
+            def do_GET(self):
+                server._handle_get(self)
+
+        return Handler
+
+
+def write_fake_dictionary(path: str, entries: int, prefix: str = "DictKey_ActionText_") -> str:
+    """Genera un dictionary DCS sintético con frases distintas"""
+    lines = ["dictionary = ", "{"]
+    for i in range(entries):
+        lines.append(f'    ["{prefix}{i}"] = "Contact Tower number {i} and proceed to waypoint {i % 7}.",')
+    lines.append("} -- end of dictionary")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso compatible con LM Studio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--per-item-latency", type=float, default=0.0)
+    parser.add_argument("--per-char-latency", type=float, default=0.0)
+    parser.add_argument("--malformed-every", type=int, default=0)
+    parser.add_argument("--slots", type=int, default=0)
+    parser.add_argument("--truncate-after", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeLMServer(args.host, args.port, args.latency, args.per_item_latency,
+                          args.slots, args.truncate_after, args.per_char_latency, args.malformed_every)
+    print(f"🧪 Servidor LM falso en {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -51,6 +51,11 @@ LM_CONFIG = {
     'TIMEOUT': float(os.environ.get('LM_TIMEOUT', '30.0'))
 }
 
+# Configuración del cache centralizado de traducciones
+CACHE_CONFIG = {
+    'BACKEND': os.environ.get('ORQ_CACHE_BACKEND', 'sqlite').strip().lower()  # 'sqlite' o 'json' (legacy)
+}
+
 # Configuración de actualización
 UPDATE_CONFIG = {
     'VERSION_URL': os.environ.get('ORQ_VERSION_URL', '').strip(),
@@ -105,6 +110,7 @@ DEFAULT_USER_CONFIG = {
     'FILE_TARGET': 'l10n/DEFAULT/dictionary',  # Fichero objetivo a traducir
     'lm_model': '',  # Modelo preferido
     'lm_url': 'http://localhost:1234/v1',  # URL LM Studio
+    'lm_endpoints': '',  # Instancias adicionales de LM Studio para el pool (url|modelo, separadas por comas)
     'DEPLOY_DIR': '',  # Ruta despliegue misiones traducidas (opcional)
     'DEPLOY_OVERWRITE': False,  # Sobrescribir misiones originales
     # Configuración del modelo (ARGS)
@@ -112,6 +118,20 @@ DEFAULT_USER_CONFIG = {
     'arg_compat': 'completions',  # Compatibilidad LM
     'arg_batch': '4',  # Batch size
     'arg_timeout': '200',  # Timeout en segundos
+    'arg_max_in_flight': '1',  # Lotes simultáneos enviados a LM Studio
+    'arg_lm_transport': 'requests',  # Transporte HTTP: 'requests' o 'async' (aiohttp)
+    'arg_batch_mode': 'items',  # Lotes de arg_batch frases ('items') o por presupuesto de tokens ('tokens', opcional)
+    'arg_batch_order': 'dictionary',  # Orden de frases en lotes: 'dictionary', 'length' o 'length_prefix'
+    'arg_context_window': '4096',  # Ventana de contexto del modelo (desde preset)
+    'arg_adaptive_batch': 'false',  # Ajuste automático del tamaño de lote (aprendido por modelo)
+    'arg_template_cache': 'false',  # Reutilizar traducciones de frases que solo cambian en números/indicativos
+    'arg_skip_unchanged': 'true',  # Saltar misiones cuyo diccionario y configuración no cambiaron
+    'arg_incremental': 'true',  # Tras un parche, traducir solo las claves nuevas o modificadas
+    'arg_campaign_dedup': 'false',  # Traducir una sola vez las frases comunes a todas las misiones
+    'arg_early_output': 'false',  # .miz intermedio en cuanto se traducen briefings y tareas (KEY_PRIORITIES)
+    'arg_structured_output': 'false',  # Respuesta restringida a un esquema JSON (response_format de LM Studio)
+    'arg_compact_ids': 'false',  # Ids ordinales por lote ("1".."N") en las peticiones al modelo
+    'arg_prompt_glossary': 'off',  # Glosario en el prompt: 'off', 'full' o 'batch' (solo términos del lote)
     'preset': '',  # Preset seleccionado
     # Parámetros del API del modelo (desde presets)
     'api_temperature': 0.7,
@@ -131,12 +151,27 @@ USER_CONFIG_LABELS = {
     'FILE_TARGET': 'FICHERO OBJETIVO A TRADUCIR',
     'lm_model': 'MODELO PREFERIDO', 
     'lm_url': 'URL LM STUDIO',
+    'lm_endpoints': 'POOL LM STUDIO (url|modelo, ...)',
     'DEPLOY_DIR': 'RUTA DESPLIEGUE MISIONES TRADUCIDAS',
     'DEPLOY_OVERWRITE': 'SOBRESCRIBIR MISIONES ORIGINALES',
     'arg_config': '--config (PROMTS)',
     'arg_compat': '--lm-compat',
     'arg_batch': '--batch-size',
     'arg_timeout': '--timeout (s)',
+    'arg_max_in_flight': '--max-in-flight',
+    'arg_lm_transport': '--lm-transport',
+    'arg_batch_mode': '--batch-mode',
+    'arg_batch_order': '--batch-order',
+    'arg_context_window': '--context-window',
+    'arg_adaptive_batch': '--adaptive-batch',
+    'arg_template_cache': '--template-cache',
+    'arg_skip_unchanged': '--skip-unchanged',
+    'arg_incremental': '--incremental',
+    'arg_campaign_dedup': '--campaign-dedup',
+    'arg_early_output': '--early-output',
+    'arg_structured_output': '--structured-output',
+    'arg_compact_ids': '--compact-ids',
+    'arg_prompt_glossary': '--prompt-glossary',
     'preset': 'PRESET SELECCIONADO',
     'active_preset': 'PRESET ACTIVO',
     'api_temperature': 'TEMPERATURE',